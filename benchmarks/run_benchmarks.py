@@ -0,0 +1,659 @@
+"""
+BeginView - ベンチマーク
+offscreen の Qt プラットフォームで BeginViewWindow を操作し、スキャン・デコード・
+拡大縮小・画像の切り替えの所要時間を測って JSON で出力する
+
+合成した画像のフォルダ（枚数・解像度・形式・サブフォルダの階層を指定できる）を
+作ってから、フォルダを開く、スライドショーのタイマー、前後への移動、ウィンドウの
+サイズ変更、ズームを順に実行し、各操作の p50/p99 の所要時間、スループット、
+最大 RSS（プロセス全体の値なので、それまでのシナリオの分を含む）を記録する。
+キャッシュは本来のものとは別の場所（QStandardPaths のテストモード）に作り、
+開始時に空にする。
+
+使い方:
+    python benchmarks/run_benchmarks.py --count 60 --size 3000x2000 --output new.json
+    python benchmarks/run_benchmarks.py --scenarios scan,navigation --depth 2
+    python benchmarks/run_benchmarks.py --compare base.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR / "src"))
+
+import PySide6  # noqa: E402
+from PySide6.QtCore import QRectF, QSize, QStandardPaths, Qt, qVersion  # noqa: E402
+from PySide6.QtGui import QColor, QImage, QLinearGradient, QPainter  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from beginview_window import BeginViewWindow  # noqa: E402
+from folder_index import FolderIndex, get_cache_dir  # noqa: E402
+from image_loader import ImagePrefetcher, decode_image  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 実行するシナリオ（既定ではすべてをこの順に実行する）
+SCENARIOS = ("scan", "decode", "navigation", "slideshow", "resize", "zoom")
+# 結果の形式の版（項目の意味を変えたら上げる）
+RESULT_FORMAT_VERSION = 1
+# 操作の完了を待つ上限（秒）
+WAIT_TIMEOUT = 30.0
+
+
+def percentile(values: List[float], p: float) -> float:
+    """最近傍順位法による百分位数（values は空でないこと）"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values_ms: List[float]) -> Dict[str, Any]:
+    """所要時間（ミリ秒）のリストを要約"""
+    if not values_ms:
+        return {"count": 0}
+    return {
+        "count": len(values_ms),
+        "p50": round(percentile(values_ms, 50), 3),
+        "p99": round(percentile(values_ms, 99), 3),
+        "mean": round(sum(values_ms) / len(values_ms), 3),
+        "max": round(max(values_ms), 3),
+    }
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """プロセスの最大 RSS（取得できない環境では None）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト単位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def pump(app: QApplication, seconds: float) -> None:
+    """指定した時間イベントを処理する"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def wait_until(
+    app: QApplication, condition: Callable[[], bool], timeout: float = WAIT_TIMEOUT
+) -> bool:
+    """条件を満たすまでイベントを処理する（タイムアウトしたら False）"""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() >= deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.0005)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# 合成した画像のフォルダ
+# ---------------------------------------------------------------------------
+
+
+def dataset_dirs(root: Path, depth: int, fanout: int) -> List[Path]:
+    """画像を置くフォルダのリスト（depth 階層、各階層 fanout 個のサブフォルダ）"""
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        level = [parent / f"d{d}_{i}" for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    return dirs
+
+
+def draw_image(size: QSize, rng: random.Random, alpha: bool) -> QImage:
+    """グラデーションと図形を描いた画像（JPEG の圧縮率が写真に近くなるよう細かい模様を含む）"""
+    image_format = (
+        QImage.Format.Format_ARGB32_Premultiplied if alpha else QImage.Format.Format_RGB32
+    )
+    image = QImage(size, image_format)
+    image.fill(Qt.GlobalColor.transparent if alpha else Qt.GlobalColor.black)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    gradient = QLinearGradient(0, 0, size.width(), size.height())
+    for stop in (0.0, 0.5, 1.0):
+        gradient.setColorAt(stop, QColor.fromHsv(rng.randrange(360), 160, 220))
+    painter.fillRect(image.rect(), gradient)
+    unit = max(8, min(size.width(), size.height()) // 40)
+    for _ in range(200):
+        color = QColor.fromHsv(
+            rng.randrange(360), rng.randrange(256), rng.randrange(256), rng.randrange(64, 256)
+        )
+        painter.setBrush(color)
+        painter.setPen(color.darker())
+        rect = QRectF(
+            rng.uniform(0, size.width()),
+            rng.uniform(0, size.height()),
+            rng.uniform(1, 8) * unit,
+            rng.uniform(1, 8) * unit,
+        )
+        if rng.random() < 0.5:
+            painter.drawEllipse(rect)
+        else:
+            painter.drawRect(rect)
+    painter.end()
+    return image
+
+
+def generate_dataset(args: argparse.Namespace) -> Tuple[Path, List[Path]]:
+    """
+    合成した画像のフォルダを作る（同じ条件のフォルダが作成済みなら再利用する）
+
+    Returns:
+        （ルートフォルダ, 画像ファイルのリスト）
+    """
+    width, height = args.size
+    name = (
+        f"{args.count}_{width}x{height}_{'-'.join(args.formats)}"
+        f"_d{args.depth}x{args.fanout}_s{args.seed}"
+    )
+    root = Path(args.workdir) / name
+    manifest = root / "manifest.json"
+    if manifest.exists():
+        files = [root / rel for rel in json.loads(manifest.read_text("utf-8"))]
+        if all(path.exists() for path in files):
+            return root, files
+    shutil.rmtree(root, ignore_errors=True)
+
+    dirs = dataset_dirs(root, args.depth, args.fanout)
+    for directory in dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(args.seed)
+    files = []
+    started = time.perf_counter()
+    for i in range(args.count):
+        image_format = args.formats[i % len(args.formats)]
+        path = dirs[i % len(dirs)] / f"img{i:06d}.{image_format}"
+        image = draw_image(QSize(width, height), rng, alpha=image_format == "png")
+        if not image.save(str(path), None, 90):
+            raise OSError(f"Failed to write {path}")
+        files.append(path)
+    manifest.write_text(
+        json.dumps([str(path.relative_to(root)) for path in files]), "utf-8"
+    )
+    print(
+        f"Generated {len(files)} images in {time.perf_counter() - started:.1f} s: {root}",
+        file=sys.stderr,
+    )
+    # 更新されたばかりのフォルダは FolderIndex が毎回列挙し直すので、キャッシュ
+    # ありのスキャンを正しく測れるよう、その期間が過ぎるまで待つ
+    time.sleep(FolderIndex.RACY_WINDOW_NS / 1e9)
+    return root, files
+
+
+# ---------------------------------------------------------------------------
+# ウィンドウの操作と計測
+# ---------------------------------------------------------------------------
+
+
+class WindowProbe:
+    """
+    BeginViewWindow の表示と描画を記録する
+
+    インスタンスのメソッドを計測用のラッパーに置き換える（ウィンドウ内部の
+    self._display_image() などの呼び出しが記録される）。
+    """
+
+    def __init__(self, window: BeginViewWindow) -> None:
+        self.window = window
+        # (時刻, インデックス, 先読みした本体の画像か（埋め込みのプレビューなら False）)
+        self.displays: List[Tuple[float, int, bool]] = []
+        self.scale_ms: List[float] = []
+        self.render_ms: List[float] = []  # 高品質の描画
+        self.fast_render_ms: List[float] = []  # サイズ変更やズーム中の描画
+        self._wrap("_display_image", self._on_display)
+        self._wrap("_scaled_rendition", self._on_scale)
+        self._wrap("_render", self._on_render)
+
+    def _wrap(self, name: str, wrapper: Callable) -> None:
+        original = getattr(self.window, name)
+        setattr(self.window, name, lambda *a, **kw: wrapper(original, *a, **kw))
+
+    def _on_display(self, original: Callable, image: QImage) -> None:
+        window = self.window
+        entry_id = window.image_files.entry_id(window.current_index)
+        key = ImagePrefetcher._key(
+            window.image_files.path_of(entry_id),
+            window.image_files.mtime_of(entry_id),
+            window._decode_size(),
+        )
+        cache = window._prefetcher.cache
+        full = key in cache or ImagePrefetcher._full_key(key) in cache
+        self.displays.append((time.perf_counter(), window.current_index, full))
+        original(image)
+
+    def _on_scale(self, original: Callable, *args, **kwargs):
+        started = time.perf_counter()
+        result = original(*args, **kwargs)
+        self.scale_ms.append((time.perf_counter() - started) * 1000)
+        return result
+
+    def _on_render(self, original: Callable, fast: bool = False) -> None:
+        started = time.perf_counter()
+        original(fast)
+        elapsed = (time.perf_counter() - started) * 1000
+        (self.fast_render_ms if fast else self.render_ms).append(elapsed)
+
+    def shown_full(self, index: int, since: float) -> bool:
+        """since 以降に index の本体の画像を表示したかどうか"""
+        return any(t >= since and i == index and full for t, i, full in self.displays)
+
+
+def open_window(
+    app: QApplication, args: argparse.Namespace, folder: Path
+) -> Tuple[BeginViewWindow, WindowProbe, Dict[str, float]]:
+    """
+    ウィンドウを作ってフォルダを開き、スキャンの完了と最初の画像の表示を待つ
+
+    スライドショーは止めておく。
+
+    Returns:
+        （ウィンドウ, 計測, {最初の表示・プレビュー・スキャン完了までの時間（ミリ秒）}）
+    """
+    window = BeginViewWindow()
+    window.resize(*args.window)
+    window.include_subfolders = args.depth > 0
+    window.show()
+    probe = WindowProbe(window)
+    app.processEvents()
+
+    started = time.perf_counter()
+    window._start_folder_scan(folder)
+    timings: Dict[str, float] = {}
+    if not wait_until(app, lambda: bool(probe.displays)):
+        raise RuntimeError("No image was displayed")
+    timings["first_paint_ms"] = (probe.displays[0][0] - started) * 1000
+    # 再生を止め、以降の計測にスライドショーの切り替えが混ざらないようにする
+    window._slideshow.stop()
+    window.is_playing = False
+    if not wait_until(app, lambda: window._scan_worker is None):
+        raise RuntimeError("Folder scan did not finish")
+    timings["scan_ms"] = (time.perf_counter() - started) * 1000
+    if not wait_until(app, lambda: probe.shown_full(window.current_index, started)):
+        raise RuntimeError("The first image was not decoded")
+    timings["first_full_image_ms"] = (
+        next(t for t, i, full in probe.displays if full) - started
+    ) * 1000
+    return window, probe, timings
+
+
+def close_window(app: QApplication, window: BeginViewWindow) -> None:
+    """ウィンドウを閉じてバックグラウンドの処理を止める"""
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def clear_cache_dir() -> None:
+    """キャッシュ（テストモードの場所）を空にする"""
+    shutil.rmtree(get_cache_dir(), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# シナリオ
+# ---------------------------------------------------------------------------
+
+
+def bench_scan(
+    app: QApplication, args: argparse.Namespace, folder: Path, files: List[Path]
+) -> Dict[str, Any]:
+    """フォルダを開く（キャッシュなし、キャッシュあり）"""
+    results: Dict[str, Any] = {"files": len(files)}
+    for label in ("cold", "warm"):
+        if label == "cold":
+            clear_cache_dir()
+        window, _, timings = open_window(app, args, folder)
+        found = len(window.image_files)
+        close_window(app, window)
+        if found != len(files):
+            raise RuntimeError(f"Scan found {found} of {len(files)} images")
+        timings["files_per_s"] = len(files) / (timings["scan_ms"] / 1000)
+        results[label] = {key: round(value, 3) for key, value in timings.items()}
+    return results
+
+
+def bench_decode(
+    app: QApplication, args: argparse.Namespace, folder: Path, files: List[Path]
+) -> Dict[str, Any]:
+    """GUI を介さない1スレッドでのデコード（元の解像度、ウィンドウに合わせた縮小）"""
+    results: Dict[str, Any] = {}
+    sample = files[: args.decode_samples]
+    fit_size = QSize(*args.window)
+    for label, max_size in (("full", None), ("fit", fit_size)):
+        times = []
+        pixels = 0
+        for path in sample:
+            started = time.perf_counter()
+            image = decode_image(str(path), max_size)
+            times.append((time.perf_counter() - started) * 1000)
+            pixels += image.width() * image.height()
+        total_s = sum(times) / 1000
+        results[label] = {
+            **summarize(times),
+            "images_per_s": round(len(sample) / total_s, 3),
+            "output_megapixels_per_s": round(pixels / 1e6 / total_s, 3),
+        }
+    return results
+
+
+def bench_navigation(
+    app: QApplication, args: argparse.Namespace, folder: Path, files: List[Path]
+) -> Dict[str, Any]:
+    """
+    次の画像への移動（先読みが追いつく間隔で操作した場合と、連打した場合）
+
+    所要時間は移動の操作から次の画像の本体を表示するまで。
+    """
+    clear_cache_dir()
+    window, probe, _ = open_window(app, args, folder)
+    results: Dict[str, Any] = {}
+    for label, think_ms in (("prefetched", args.think_ms), ("burst", 0)):
+        latencies = []
+        hits = 0
+        probe.scale_ms.clear()
+        for _ in range(min(args.steps, len(files) - 1)):
+            target = (window.current_index + 1) % len(window.image_files)
+            hits += window._decoded_image(target) is not None
+            started = time.perf_counter()
+            window._next_image()
+            if not wait_until(app, lambda: probe.shown_full(target, started)):
+                raise RuntimeError(f"Image {target} was not displayed")
+            latencies.append((time.perf_counter() - started) * 1000)
+            if think_ms:
+                pump(app, think_ms / 1000)
+        results[label] = {
+            **summarize(latencies),
+            "prefetch_hit_ratio": round(hits / max(1, len(latencies)), 3),
+            "scale_ms": summarize(probe.scale_ms),
+        }
+    close_window(app, window)
+    return results
+
+
+def bench_slideshow(
+    app: QApplication, args: argparse.Namespace, folder: Path, files: List[Path]
+) -> Dict[str, Any]:
+    """スライドショーのタイマーによる切り替え（実際の間隔と締め切りからの遅れ）"""
+    clear_cache_dir()
+    window, probe, _ = open_window(app, args, folder)
+    window._set_interval(args.interval)
+    probe.displays.clear()
+    window.is_playing = True
+    window._slideshow.start()
+    window._update_prefetch()
+    started = time.perf_counter()
+
+    def switched() -> List[float]:
+        times = []
+        last_index = None
+        for t, index, _ in probe.displays:
+            if index != last_index:
+                times.append(t)
+                last_index = index
+        return times
+
+    wait_until(
+        app,
+        lambda: len(switched()) >= args.slides,
+        timeout=args.slides * args.interval / 1000 * 3 + WAIT_TIMEOUT,
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats = window._slideshow.stats()
+    close_window(app, window)
+
+    times = switched()
+    intervals = [(b - a) * 1000 for a, b in zip(times, times[1:])]
+    return {
+        "interval_ms": args.interval,
+        "slides": len(times),
+        "elapsed_ms": round(elapsed_ms, 3),
+        "achieved_interval_ms": summarize(intervals),
+        "deviation_ms": summarize([abs(i - args.interval) for i in intervals]),
+        "missed_deadlines": stats.missed,
+        "skipped_slides": stats.skipped,
+        "max_late_ms": round(stats.max_late_ms, 3),
+    }
+
+
+def bench_resize(
+    app: QApplication, args: argparse.Namespace, folder: Path, files: List[Path]
+) -> Dict[str, Any]:
+    """ウィンドウのサイズ変更（変更中の描画と、止まった後の高品質な描画）"""
+    window, probe, _ = open_window(app, args, folder)
+    sizes = [(800, 600), (1280, 800), (1920, 1080), (1024, 768)]
+    resize_ms = []
+    probe.render_ms.clear()
+    probe.fast_render_ms.clear()
+    for _ in range(args.repeats):
+        for width, height in sizes:
+            rendered = len(probe.fast_render_ms) + len(probe.render_ms)
+            started = time.perf_counter()
+            window.resize(width, height)
+            wait_until(
+                app,
+                lambda: len(probe.fast_render_ms) + len(probe.render_ms) > rendered,
+            )
+            resize_ms.append((time.perf_counter() - started) * 1000)
+        # 高品質な描画（とウィンドウに合わせたデコードし直し）の完了を待つ
+        pump(app, (window.SMOOTH_RENDER_DELAY_MS + 100) / 1000)
+    close_window(app, window)
+    return {
+        "resize_to_paint_ms": summarize(resize_ms),
+        "fast_render_ms": summarize(probe.fast_render_ms),
+        "smooth_render_ms": summarize(probe.render_ms),
+    }
+
+
+def bench_zoom(
+    app: QApplication, args: argparse.Namespace, folder: Path, files: List[Path]
+) -> Dict[str, Any]:
+    """ズーム（拡大・縮小の操作と、100% 表示・ウィンドウに合わせた表示への切り替え）"""
+    window, probe, _ = open_window(app, args, folder)
+    index = window.current_index
+
+    def settled() -> bool:
+        decoded = window._decoded_image(index)
+        shown = window._displayed_image
+        return decoded is not None and shown is not None and (
+            shown.cacheKey() == decoded.cacheKey()
+        )
+
+    step_ms: List[float] = []
+    switch_ms: Dict[str, List[float]] = {"100": [], "fit": []}
+    for _ in range(args.repeats):
+        for action in [window._zoom_in] * 3 + [window._zoom_out] * 3:
+            started = time.perf_counter()
+            action()
+            app.processEvents()
+            step_ms.append((time.perf_counter() - started) * 1000)
+        for label, action in (("100", window._zoom_100), ("fit", window._zoom_fit)):
+            started = time.perf_counter()
+            action()
+            if not wait_until(app, settled):
+                raise RuntimeError(f"Zoom {label} did not finish")
+            switch_ms[label].append((time.perf_counter() - started) * 1000)
+    close_window(app, window)
+    return {
+        "zoom_step_ms": summarize(step_ms),
+        "zoom_100_ms": summarize(switch_ms["100"]),
+        "zoom_fit_ms": summarize(switch_ms["fit"]),
+        "scale_ms": summarize(probe.scale_ms),
+    }
+
+
+BENCHMARKS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "scan": bench_scan,
+    "decode": bench_decode,
+    "navigation": bench_navigation,
+    "slideshow": bench_slideshow,
+    "resize": bench_resize,
+    "zoom": bench_zoom,
+}
+
+
+# ---------------------------------------------------------------------------
+# 結果の出力と比較
+# ---------------------------------------------------------------------------
+
+
+def environment() -> Dict[str, Any]:
+    """結果を比較するときに確認する実行環境"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pyside": PySide6.__version__,
+        "qt": qVersion(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(base_path: Path, new_path: Path) -> None:
+    """2つの結果の p50/p99 とスループットを並べて表示"""
+    base = json.loads(base_path.read_text("utf-8"))
+    new = json.loads(new_path.read_text("utf-8"))
+    print(f"base: {base['environment']['commit']}  new: {new['environment']['commit']}")
+
+    def walk(old: Any, current: Any, path: str) -> None:
+        if isinstance(old, dict) and isinstance(current, dict):
+            for key in old:
+                if key in current:
+                    walk(old[key], current[key], f"{path}.{key}" if path else key)
+            return
+        leaf = path.rsplit(".", 1)[-1]
+        if not isinstance(old, (int, float)) or not isinstance(current, (int, float)):
+            return
+        if leaf not in ("p50", "p99") and not leaf.endswith(("_ms", "_per_s", "_bytes")):
+            return
+        change = f"{(current - old) / old * 100:+.1f}%" if old else ""
+        print(f"{path:60} {old:>12.3f} {current:>12.3f} {change:>9}")
+
+    walk(base["results"], new["results"], "")
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """"幅x高さ" を解析"""
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size: {text}")
+    return width, height
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="BeginView headless benchmarks")
+    parser.add_argument("--count", type=int, default=60, help="number of images")
+    parser.add_argument("--size", type=parse_size, default=(3000, 2000), help="WxH")
+    parser.add_argument(
+        "--formats", default="jpg", help="comma-separated image formats (jpg,png)"
+    )
+    parser.add_argument("--depth", type=int, default=0, help="subfolder depth")
+    parser.add_argument("--fanout", type=int, default=3, help="subfolders per level")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--workdir",
+        default=os.path.join(tempfile.gettempdir(), "beginview-bench"),
+        help="where generated folders are kept (reused across runs)",
+    )
+    parser.add_argument("--window", type=parse_size, default=(1280, 800), help="WxH")
+    parser.add_argument(
+        "--scenarios", default=",".join(SCENARIOS), help="comma-separated scenarios"
+    )
+    parser.add_argument("--steps", type=int, default=20, help="navigation steps")
+    parser.add_argument(
+        "--think-ms", type=int, default=500, help="pause between prefetched steps"
+    )
+    parser.add_argument("--interval", type=int, default=1000, help="slide interval ms")
+    parser.add_argument("--slides", type=int, default=10, help="slides to show")
+    parser.add_argument("--repeats", type=int, default=3, help="resize/zoom rounds")
+    parser.add_argument("--decode-samples", type=int, default=10)
+    parser.add_argument("--output", help="write JSON here (default: stdout)")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files"
+    )
+    args = parser.parse_args(argv)
+    args.formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+def main(argv: List[str]) -> int:
+    """ベンチマークを実行して結果を出力"""
+    args = parse_args(argv)
+    if args.compare:
+        compare(Path(args.compare[0]), Path(args.compare[1]))
+        return 0
+
+    # 本来のキャッシュに触れないよう、テスト用の場所を使う
+    QStandardPaths.setTestModeEnabled(True)
+    app = QApplication([sys.argv[0]])
+    app.setApplicationName("BeginViewBenchmark")
+
+    folder, files = generate_dataset(args)
+    results: Dict[str, Any] = {}
+    for name in args.scenarios:
+        print(f"Running {name}...", file=sys.stderr)
+        started = time.perf_counter()
+        results[name] = BENCHMARKS[name](app, args, folder, files)
+        results[name]["wall_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        results[name]["peak_rss_bytes"] = peak_rss_bytes()
+    clear_cache_dir()
+
+    report = {
+        "version": RESULT_FORMAT_VERSION,
+        "environment": environment(),
+        "parameters": {
+            "count": args.count,
+            "size": list(args.size),
+            "formats": args.formats,
+            "depth": args.depth,
+            "fanout": args.fanout,
+            "window": list(args.window),
+            "interval_ms": args.interval,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", "utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
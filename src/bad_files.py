@@ -0,0 +1,202 @@
+"""
+BeginView - 読み込めない画像の記録モジュール
+デコードに失敗した画像をパスと更新日時で記録し、次からはデコードせずに飛ばす
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class BadFileRegistry:
+    """
+    読み込めない画像の記録（ネガティブキャッシュ）
+
+    パスごとに、失敗したときの更新日時とエラーメッセージを SQLite の
+    テーブルに保存し、起動時にすべてメモリに読み込んで O(1) で引く。
+    ファイルが書き換えられる（コピー途中だったファイルが完成するなど）と
+    更新日時が変わるので、記録は自動的に無効になる。
+
+    件数が MAX_ENTRIES を超えたら、記録したのが古いものから削除する。
+    保存先を開けない場合はメモリ上だけで記録する。GUI スレッドから使う。
+
+    メモリ上の記録はすぐに更新し、保存先への書き込みは溜めておいて
+    FLUSH_BATCH 件ごと（または FLUSH_INTERVAL 秒ごと）に1回のトランザク
+    ションで行う。flush() と close() で残りを書き込む。
+    """
+
+    FORMAT_VERSION = 1
+    # 記録する件数の上限（1件あたりメモリ・ディスクとも 200 バイト程度）
+    MAX_ENTRIES = 100_000
+    # 保存先への書き込みを溜めておく件数と時間（秒）の上限
+    FLUSH_BATCH = 256
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        """
+        記録を開く（無ければ作成する）
+
+        Args:
+            path: 保存先のファイル（省略時はメモリ上だけで記録する）
+
+        Raises:
+            OSError, sqlite3.Error: 保存先を開けない場合
+        """
+        # パス → (更新日時 ns, エラーメッセージ)。挿入順が記録した順
+        self._entries: Dict[str, Tuple[int, str]] = {}
+        # まだ書き込んでいない変更（パス → 行。None は削除）
+        self._pending: Dict[str, Optional[Tuple[int, str, int]]] = {}
+        self._pending_since = 0.0  # 最初の変更を溜めた時刻（time.monotonic()）
+        self._db: Optional[sqlite3.Connection] = None
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(path), timeout=5.0)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != self.FORMAT_VERSION:
+                db.executescript(
+                    f"""
+                    DROP TABLE IF EXISTS bad_files;
+                    CREATE TABLE bad_files (
+                        path TEXT PRIMARY KEY,
+                        mtime_ns INTEGER NOT NULL,
+                        error TEXT NOT NULL,
+                        recorded INTEGER NOT NULL
+                    );
+                    CREATE INDEX bad_files_recorded ON bad_files (recorded);
+                    PRAGMA user_version = {self.FORMAT_VERSION};
+                    """
+                )
+            for file_path, mtime_ns, error in db.execute(
+                "SELECT path, mtime_ns, error FROM bad_files ORDER BY recorded"
+            ):
+                self._entries[file_path] = (mtime_ns, error)
+        except sqlite3.Error:
+            db.close()
+            raise
+        self._db = db
+
+    @classmethod
+    def open(cls, path: Path) -> "BadFileRegistry":
+        """
+        記録を開く
+
+        Args:
+            path: 保存先のファイル
+
+        Returns:
+            開いた記録（保存先を開けない場合はメモリ上だけで記録するもの）
+        """
+        try:
+            return cls(path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening bad file registry {path}: {e}")
+            return cls()
+
+    def __len__(self) -> int:
+        """記録している件数"""
+        return len(self._entries)
+
+    def contains(self, path: str, mtime_ns: int) -> bool:
+        """
+        読み込めないと記録されているかどうか
+
+        Args:
+            path: 画像ファイルのパス
+            mtime_ns: 画像の更新日時（記録したときと異なれば False）
+        """
+        entry = self._entries.get(path)
+        return entry is not None and entry[0] == mtime_ns
+
+    def error(self, path: str, mtime_ns: int) -> Optional[str]:
+        """
+        記録したときのエラーメッセージ
+
+        Args:
+            path: 画像ファイルのパス
+            mtime_ns: 画像の更新日時
+
+        Returns:
+            エラーメッセージ（記録されていない場合は None）
+        """
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        return entry[1]
+
+    def add(self, path: str, mtime_ns: int, error: str) -> None:
+        """
+        読み込めない画像を記録（同じパスの古い記録は置き換える）
+
+        Args:
+            path: 画像ファイルのパス
+            mtime_ns: 画像の更新日時
+            error: エラーメッセージ
+        """
+        if self.contains(path, mtime_ns):
+            return
+        self._entries.pop(path, None)
+        self._entries[path] = (mtime_ns, error)
+        self._write(path, (mtime_ns, error, time.time_ns()))
+        while len(self._entries) > self.MAX_ENTRIES:
+            oldest = next(iter(self._entries))
+            del self._entries[oldest]
+            self._write(oldest, None)
+
+    def discard(self, path: str) -> None:
+        """
+        記録を取り除く（読み込めるようになった場合）
+
+        Args:
+            path: 画像ファイルのパス（記録されていない場合は何もしない）
+        """
+        if self._entries.pop(path, None) is not None:
+            self._write(path, None)
+
+    def flush(self) -> None:
+        """溜めておいた変更を保存先に書き込む"""
+        pending = self._pending
+        self._pending = {}
+        if self._db is None or not pending:
+            return
+        deleted = [(path,) for path, row in pending.items() if row is None]
+        inserted = [(path,) + row for path, row in pending.items() if row is not None]
+        try:
+            with self._db:
+                self._db.executemany("DELETE FROM bad_files WHERE path = ?", deleted)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO bad_files VALUES (?, ?, ?, ?)", inserted
+                )
+        except sqlite3.Error as e:
+            # 保存に失敗してもメモリ上の記録で動作する
+            print(f"Error saving bad file records: {e}")
+
+    def close(self) -> None:
+        """残りの変更を書き込んで保存先を閉じる（以降はメモリ上だけで記録する）"""
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def _write(self, path: str, row: Optional[Tuple[int, str, int]]) -> None:
+        """
+        保存先への変更を溜め、件数か時間が上限に達したら書き込む
+
+        Args:
+            path: 画像ファイルのパス
+            row: （更新日時 ns, エラーメッセージ, 記録した時刻 ns）。None は削除
+        """
+        if self._db is None:
+            return
+        now = time.monotonic()
+        if not self._pending:
+            self._pending_since = now
+        self._pending[path] = row
+        if (
+            len(self._pending) >= self.FLUSH_BATCH
+            or now - self._pending_since >= self.FLUSH_INTERVAL
+        ):
+            self.flush()
@@ -3,9 +3,12 @@ BeginView - メインウィンドウクラス
 画像スライドショー表示機能を提供
 """
 
+import bisect
 import os
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from PySide6.QtWidgets import (
     QMainWindow,
@@ -16,11 +19,35 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QWidget,
     QInputDialog,
+    QPushButton,
 )
-from PySide6.QtCore import Qt, QTimer, QSize, QPoint
-from PySide6.QtGui import QPixmap, QKeyEvent, QImage, QMouseEvent, QWheelEvent
+from PySide6.QtCore import Qt, QTimer, QSize, QPoint, QThread
+from PySide6.QtGui import QPixmap, QKeyEvent, QImage, QFontDatabase
 
 from i18n import get_text
+from bad_files import BadFileRegistry
+from folder_index import DirectoryListing, FolderIndex, get_cache_dir
+from folder_scanner import FolderScanWorker
+from folder_watcher import FolderWatcher
+from image_cache import ByteLRUCache
+from image_loader import ImagePrefetcher, is_large, is_reduced, original_size
+from image_view import ImageView
+from metadata_index import MetadataIndex, MetadataScanWorker
+from metrics import (
+    MetricsInterval,
+    MetricsLog,
+    PerformanceMetrics,
+    latency_columns,
+    resident_memory,
+)
+from mipmap import PyramidBuilder, nearest_level
+from playlist import Playlist, SortOrder
+from preview_cache import PreviewCache
+from process_decoder import ProcessDecoder
+from shuffle import ShuffleOrder
+from slideshow import LatePolicy, SlideshowScheduler
+from tile_loader import TileLoader
+from tracing import traced
 
 
 class BeginViewWindow(QMainWindow):
@@ -29,23 +56,151 @@ class BeginViewWindow(QMainWindow):
     # サポートする画像拡張子
     SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 
+    # 移動している方向に先読みする枚数と、反対方向に残しておく枚数
+    PREFETCH_AHEAD = 3
+    PREFETCH_BEHIND = 1
+    # スライドショー中は、この時間（ミリ秒）のうちに表示する画像を先読みする
+    # （間隔が短い場合は PREFETCH_AHEAD より多く先読みする）
+    SLIDESHOW_LOOKAHEAD_MS = 1500
+    # デコード済みの画像を保持するメモリの上限（バイト数）
+    DECODED_CACHE_BUDGET = 512 * 1024 * 1024
+    # 先読みでファイルを読み込むスレッド数と、読み込んだ内容を保持するメモリの
+    # 上限（バイト数）。デコードとは別に読み込むので、ネットワーク上のファイル
+    # でも読み込みの待ち時間とデコードが重なる
+    READ_AHEAD_THREADS = 2
+    READ_AHEAD_BUDGET = 128 * 1024 * 1024
+    # デコードに使うプロセス数（0 はスレッドプールでデコードする）。コアの多い
+    # 環境では GIL に縛られずにデコードを並列化できるが、プロセスの起動に時間と
+    # メモリを使う
+    DECODE_PROCESSES = 0
+    # 表示中の画像を拡大縮小したものを保持するメモリの上限（バイト数）
+    SCALED_CACHE_BUDGET = 64 * 1024 * 1024
+    # 縮小表示用のピラミッド（半分ずつ縮小した段階）を保持するメモリの上限
+    PYRAMID_CACHE_BUDGET = 128 * 1024 * 1024
+    # ウィンドウに合わせて縮小した画像をディスクに保存しておく容量の上限
+    PREVIEW_CACHE_BUDGET = 1024 * 1024 * 1024
+    # 巨大な画像の一部分を高い解像度でデコードしたタイルを保持するメモリの上限
+    TILE_CACHE_BUDGET = 256 * 1024 * 1024
+    # ウィンドウに合わせて表示する場合のデコードサイズの刻み（ピクセル）。
+    # ウィンドウのサイズ変更のたびにデコードし直さないよう、切り上げて使う
+    DECODE_SIZE_STEP = 256
+    # サイズ変更やホイールでのズームが止まってから高品質に描画し直すまでの時間
+    SMOOTH_RENDER_DELAY_MS = 200
+    # 読み込めない画像を飛ばすときに、イベントループに戻らずに調べる枚数
+    # （読み込めない画像が何万枚続いても、操作を受け付けながら飛ばす）
+    SKIP_SCAN_CHUNK = 1000
+    # パフォーマンス情報を集計する間隔（ミリ秒）。表示とログの行もこの間隔で更新する
+    METRICS_SAMPLE_MS = 1000
+    # 所要時間を計測する処理（ログの列の順）。show は画像の切り替えを要求して
+    # から表示されるまで、prepare・tick はスライドショーの準備と締め切りの処理、
+    # slide は再生中に実際に切り替わった間隔
+    METRIC_LATENCIES = (
+        "show", "read", "decode", "scale", "render", "prepare", "tick", "slide", "scan"
+    )
+
     def __init__(self) -> None:
         """ウィンドウを初期化"""
         super().__init__()
 
         # 状態管理
         self.current_language: str = "ja"  # デフォルトは日本語
-        self.image_files: List[Path] = []
+        self.image_files: Playlist = Playlist()
         self.current_index: int = 0
         self.is_playing: bool = False
-        self.slide_timer: Optional[QTimer] = None
+        self._slideshow: Optional[SlideshowScheduler] = None
         self.slide_interval: int = 3000  # デフォルト3秒（ミリ秒）
         self.include_subfolders: bool = False  # サブフォルダを含めるかどうか
+        self.watch_folder: bool = False  # フォルダの変更を監視するかどうか
+        self.sort_order: SortOrder = SortOrder.NAME  # 画像の並び順
+        self.shuffle: bool = False  # ランダムな順に表示するかどうか
+        self._shuffle = ShuffleOrder()
         
         # ズーム機能用の状態
         self.original_pixmap: Optional[QPixmap] = None  # 元の画像
+        # 元の画像のファイルでのサイズ（縮小してデコードした場合は original_pixmap
+        # より大きい）。表示倍率はこのサイズに対する倍率
+        self._image_size: QSize = QSize()
         self.zoom_factor: float = 1.0  # ズーム倍率（1.0 = 100%）
         self.zoom_mode: str = "fit"  # "fit", "100", "custom"
+        self._displayed_path: Optional[str] = None  # original_pixmap のファイル
+        # original_pixmap の元になったデコード結果（縮小表示用の画像を作る元）
+        self._displayed_image: Optional[QImage] = None
+        # original_pixmap を縮小してデコードしたときの最大サイズ（元の解像度なら None）
+        self._displayed_decode_size: Optional[QSize] = None
+        # original_pixmap を拡大縮小したもの。全画面の切り替えやズームの
+        # 往復で同じ拡大縮小を繰り返さないようにする（画像が変わったら破棄）
+        self._scaled_cache: ByteLRUCache[QPixmap] = ByteLRUCache(
+            self.SCALED_CACHE_BUDGET
+        )
+        # スライドショーで次に表示する画像を締め切りの前に準備したもの
+        # （画像の cacheKey, Pixmap, 縮小表示用の画像のキャッシュ）
+        self._prepared_slide: Optional[
+            Tuple[int, QPixmap, ByteLRUCache[QPixmap]]
+        ] = None
+        # 縮小表示用のピラミッドをバックグラウンドで作る
+        self._pyramids = PyramidBuilder(
+            cache_budget=self.PYRAMID_CACHE_BUDGET, parent=self
+        )
+        self._pyramids.pyramid_ready.connect(self._on_pyramid_ready)
+
+        # バックグラウンドスキャン用の状態
+        self._scan_id: int = 0  # 古いスキャンの結果を無視するための識別番号
+        self._scan_thread: Optional[QThread] = None
+        self._scan_worker: Optional[FolderScanWorker] = None
+        self._scan_count: int = 0
+        self._scan_error: Optional[str] = None  # スキャンが失敗した場合のエラー
+        self._folder_index: Optional[FolderIndex] = None  # 最後に完了したスキャンの結果
+        self._folder_watcher: Optional[FolderWatcher] = None
+
+        # 画像のヘッダから読み取ったメタデータ（エントリ番号で引く）
+        self._metadata = MetadataIndex()
+        self._metadata_scan_id: int = 0
+        self._metadata_worker: Optional[MetadataScanWorker] = None
+
+        # デコードに失敗した画像の記録（次からはデコードせずに飛ばす）
+        self._bad_files = BadFileRegistry.open(get_cache_dir() / "bad_files.sqlite")
+        # 実行中の読み込めない画像の飛ばし（古いものを止めるための識別番号）
+        self._skip_generation: int = 0
+
+        # パフォーマンスの計測（情報の表示中かログの記録中だけ計測する）
+        self.show_metrics: bool = False
+        self._metrics = PerformanceMetrics()
+        self._metrics_log: Optional[MetricsLog] = None
+        self._show_started: float = 0.0  # 表示待ちの切り替えを要求した時刻
+        self._scan_started: float = 0.0
+        self._last_scan: Optional[Tuple[float, int]] = None  # (所要時間 ms, 枚数)
+        self._last_slide_time: float = 0.0  # 再生中に最後に切り替わった時刻
+        # 前回の集計までのデコード済み画像のキャッシュのヒット・ミスの回数
+        self._cache_counts: Tuple[int, int] = (0, 0)
+
+        # 画像の先読み用の状態
+        disk_cache = PreviewCache.open(
+            get_cache_dir() / "previews.sqlite", self.PREVIEW_CACHE_BUDGET
+        )
+        self._prefetcher = ImagePrefetcher(
+            cache_budget=self.DECODED_CACHE_BUDGET,
+            disk_cache=disk_cache,
+            io_threads=self.READ_AHEAD_THREADS,
+            read_budget=self.READ_AHEAD_BUDGET,
+            process_decoder=(
+                ProcessDecoder(self.DECODE_PROCESSES, disk_cache)
+                if self.DECODE_PROCESSES > 0
+                else None
+            ),
+            bad_files=self._bad_files,
+            metrics=self._metrics,
+            parent=self,
+        )
+        self._prefetcher.image_ready.connect(self._on_image_ready)
+        self._prefetcher.image_failed.connect(self._on_image_failed)
+        self._prefetcher.preview_ready.connect(self._on_preview_ready)
+        self._nav_direction: int = 1  # 直前の移動方向（1: 次へ, -1: 前へ）
+        self._failed_in_row: int = 0  # 連続して読み込みに失敗した枚数
+
+        # 巨大な画像の拡大表示用（見えている範囲だけをタイルで読み込む）
+        self._tile_loader = TileLoader(cache_budget=self.TILE_CACHE_BUDGET, parent=self)
+        self._tile_loader.tiles_ready.connect(self._update_tiles)
+        self._large_image: bool = False  # 表示中の画像が巨大な画像かどうか
 
         # UI初期化
         self._init_ui()
@@ -61,21 +216,41 @@ class BeginViewWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # 画像表示用のラベル
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setStyleSheet("background-color: black;")
-        self.image_label.setText("フォルダを選択してください")
-        # マウスイベントを有効化
-        self.image_label.setMouseTracking(False)
-        self.image_label.mousePressEvent = self._on_image_label_clicked
-        self.image_label.mouseDoubleClickEvent = self._on_image_label_double_clicked
-        self.image_label.wheelEvent = self._on_image_label_wheel
-        layout.addWidget(self.image_label)
+        # 画像表示用のビュー
+        self.image_view = ImageView()
+        self.image_view.setText("フォルダを選択してください")
+        self.image_view.clicked.connect(self._on_image_view_clicked)
+        self.image_view.double_clicked.connect(self._on_image_view_double_clicked)
+        self.image_view.wheel_scrolled.connect(self._on_image_view_wheel)
+        self.image_view.panned.connect(self._update_tiles)
+        layout.addWidget(self.image_view)
+
+        # パフォーマンス情報（画像の上に重ねて表示する）
+        self.metrics_overlay = QLabel(self.image_view)
+        self.metrics_overlay.setFont(
+            QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        )
+        self.metrics_overlay.setStyleSheet(
+            "color: #e0e0e0; background-color: rgba(0, 0, 0, 160); padding: 6px;"
+        )
+        self.metrics_overlay.setAttribute(
+            Qt.WidgetAttribute.WA_TransparentForMouseEvents
+        )
+        self.metrics_overlay.move(8, 8)
+        self.metrics_overlay.hide()
 
         # メニューバーを作成
         self._create_menu_bar()
 
+        # ステータスバー（スキャンの進捗とキャンセルボタン）
+        self.scan_status_label = QLabel()
+        self.scan_cancel_button = QPushButton()
+        self.scan_cancel_button.clicked.connect(self._cancel_folder_scan)
+        self.statusBar().addPermanentWidget(self.scan_status_label)
+        self.statusBar().addPermanentWidget(self.scan_cancel_button)
+        self.scan_status_label.hide()
+        self.scan_cancel_button.hide()
+
         # ウィンドウ設定
         self.setMinimumSize(800, 600)
         self.resize(1200, 800)
@@ -91,6 +266,10 @@ class BeginViewWindow(QMainWindow):
         self.open_folder_action = file_menu.addAction("")
         self.open_folder_action.triggered.connect(self._on_open_folder)
 
+        self.cancel_scan_action = file_menu.addAction("")
+        self.cancel_scan_action.triggered.connect(self._cancel_folder_scan)
+        self.cancel_scan_action.setEnabled(False)
+
         file_menu.addSeparator()
 
         self.exit_action = file_menu.addAction("")
@@ -149,11 +328,27 @@ class BeginViewWindow(QMainWindow):
         self.interval_custom_action = interval_menu.addAction("")
         self.interval_custom_action.triggered.connect(self._set_custom_interval)
 
+        interval_menu.addSeparator()
+
+        self.skip_late_slides_action = interval_menu.addAction("")
+        self.skip_late_slides_action.setCheckable(True)
+        self.skip_late_slides_action.triggered.connect(self._toggle_skip_late_slides)
+
         settings_menu.addSeparator()
 
         self.include_subfolders_action = settings_menu.addAction("")
         self.include_subfolders_action.setCheckable(True)
         self.include_subfolders_action.triggered.connect(self._toggle_include_subfolders)
+
+        self.watch_folder_action = settings_menu.addAction("")
+        self.watch_folder_action.setCheckable(True)
+        self.watch_folder_action.triggered.connect(self._toggle_watch_folder)
+
+        settings_menu.addSeparator()
+
+        self.metrics_log_action = settings_menu.addAction("")
+        self.metrics_log_action.setCheckable(True)
+        self.metrics_log_action.triggered.connect(self._toggle_metrics_log)
         
         # View メニュー
         view_menu = menubar.addMenu("")
@@ -178,11 +373,74 @@ class BeginViewWindow(QMainWindow):
         self.show_info_action = view_menu.addAction("")
         self.show_info_action.triggered.connect(self._show_image_info)
 
+        self.show_metrics_action = view_menu.addAction("")
+        self.show_metrics_action.setCheckable(True)
+        self.show_metrics_action.triggered.connect(self._toggle_metrics_overlay)
+
+        view_menu.addSeparator()
+
+        # 並び順サブメニュー
+        sort_menu = view_menu.addMenu("")
+        self.sort_menu = sort_menu
+
+        self.sort_name_action = sort_menu.addAction("")
+        self.sort_name_action.setCheckable(True)
+        self.sort_name_action.setChecked(True)
+        self.sort_name_action.triggered.connect(
+            lambda: self._set_sort_order(SortOrder.NAME)
+        )
+
+        self.sort_directory_action = sort_menu.addAction("")
+        self.sort_directory_action.setCheckable(True)
+        self.sort_directory_action.triggered.connect(
+            lambda: self._set_sort_order(SortOrder.DIRECTORY)
+        )
+
+        self.sort_modified_action = sort_menu.addAction("")
+        self.sort_modified_action.setCheckable(True)
+        self.sort_modified_action.triggered.connect(
+            lambda: self._set_sort_order(SortOrder.MODIFIED)
+        )
+
+        self.sort_size_action = sort_menu.addAction("")
+        self.sort_size_action.setCheckable(True)
+        self.sort_size_action.triggered.connect(
+            lambda: self._set_sort_order(SortOrder.SIZE)
+        )
+
+        self.sort_captured_action = sort_menu.addAction("")
+        self.sort_captured_action.setCheckable(True)
+        self.sort_captured_action.triggered.connect(
+            lambda: self._set_sort_order(SortOrder.CAPTURED)
+        )
+
+        sort_menu.addSeparator()
+
+        self.shuffle_action = sort_menu.addAction("")
+        self.shuffle_action.setCheckable(True)
+        self.shuffle_action.triggered.connect(self._toggle_shuffle)
+
     def _init_timer(self) -> None:
-        """スライドショー用タイマーを初期化"""
-        self.slide_timer = QTimer(self)
-        self.slide_timer.timeout.connect(self._on_timer_tick)
-        self.slide_timer.setInterval(self.slide_interval)
+        """スライドショーのスケジューラと描画用タイマーを初期化"""
+        self._slideshow = SlideshowScheduler(self.slide_interval, parent=self)
+        self._slideshow.prepare.connect(self._on_slide_prepare)
+        self._slideshow.deadline.connect(self._on_slide_deadline)
+
+        # サイズ変更やホイールでのズーム中の描画をまとめるタイマー
+        self._fast_render_timer = QTimer(self)
+        self._fast_render_timer.setSingleShot(True)
+        self._fast_render_timer.setInterval(0)
+        self._fast_render_timer.timeout.connect(lambda: self._render(fast=True))
+
+        self._smooth_render_timer = QTimer(self)
+        self._smooth_render_timer.setSingleShot(True)
+        self._smooth_render_timer.setInterval(self.SMOOTH_RENDER_DELAY_MS)
+        self._smooth_render_timer.timeout.connect(self._render)
+
+        # パフォーマンス情報の集計（計測中だけ動かす）
+        self._metrics_timer = QTimer(self)
+        self._metrics_timer.setInterval(self.METRICS_SAMPLE_MS)
+        self._metrics_timer.timeout.connect(self._sample_metrics)
 
     def _update_ui_texts(self) -> None:
         """現在の言語設定に基づいてUIテキストを更新"""
@@ -194,6 +452,9 @@ class BeginViewWindow(QMainWindow):
         self.open_folder_action.setText(
             get_text(self.current_language, "menu_open_folder")
         )
+        self.cancel_scan_action.setText(
+            get_text(self.current_language, "menu_cancel_scan")
+        )
         self.exit_action.setText(get_text(self.current_language, "menu_exit"))
 
         self.lang_menu.setTitle(get_text(self.current_language, "menu_language"))
@@ -229,6 +490,17 @@ class BeginViewWindow(QMainWindow):
             get_text(self.current_language, "menu_include_subfolders")
         )
         self.include_subfolders_action.setChecked(self.include_subfolders)
+        self.watch_folder_action.setText(
+            get_text(self.current_language, "menu_watch_folder")
+        )
+        self.watch_folder_action.setChecked(self.watch_folder)
+        self.skip_late_slides_action.setText(
+            get_text(self.current_language, "menu_skip_late_slides")
+        )
+        self.metrics_log_action.setText(
+            get_text(self.current_language, "menu_metrics_log")
+        )
+        self.metrics_log_action.setChecked(self._metrics_log is not None)
         
         # View メニュー
         self.view_menu.setTitle(get_text(self.current_language, "menu_view"))
@@ -247,6 +519,27 @@ class BeginViewWindow(QMainWindow):
         self.show_info_action.setText(
             get_text(self.current_language, "menu_show_info")
         )
+        self.show_metrics_action.setText(
+            get_text(self.current_language, "menu_show_metrics")
+        )
+        self.show_metrics_action.setChecked(self.show_metrics)
+        self.sort_menu.setTitle(get_text(self.current_language, "menu_sort"))
+        self.sort_name_action.setText(
+            get_text(self.current_language, "menu_sort_name")
+        )
+        self.sort_directory_action.setText(
+            get_text(self.current_language, "menu_sort_directory")
+        )
+        self.sort_modified_action.setText(
+            get_text(self.current_language, "menu_sort_modified")
+        )
+        self.sort_size_action.setText(
+            get_text(self.current_language, "menu_sort_size")
+        )
+        self.sort_captured_action.setText(
+            get_text(self.current_language, "menu_sort_captured")
+        )
+        self.shuffle_action.setText(get_text(self.current_language, "menu_shuffle"))
 
         # Help メニュー
         if self.current_language == "ja":
@@ -257,12 +550,18 @@ class BeginViewWindow(QMainWindow):
             get_text(self.current_language, "menu_about")
         )
 
+        # スキャン進捗
+        self.scan_cancel_button.setText(
+            get_text(self.current_language, "button_cancel")
+        )
+        self._update_scan_status()
+
         # 画像が無い場合のラベルテキスト
         if not self.image_files:
             if self.current_language == "ja":
-                self.image_label.setText("フォルダを選択してください")
+                self.image_view.setText("フォルダを選択してください")
             else:
-                self.image_label.setText("Please select a folder")
+                self.image_view.setText("Please select a folder")
 
     def _set_language(self, lang_code: str) -> None:
         """言語を切り替え"""
@@ -278,137 +577,1026 @@ class BeginViewWindow(QMainWindow):
         if not folder_path:
             return  # キャンセルされた場合
 
-        # 画像ファイルを取得
-        folder = Path(folder_path)
-        
-        if self.include_subfolders:
-            # サブフォルダも含めて再帰的に検索
-            image_files = [
-                f
-                for f in folder.rglob("*")
-                if f.is_file() and f.suffix.lower() in self.SUPPORTED_EXTENSIONS
-            ]
+        self._start_folder_scan(Path(folder_path))
+
+    def _start_folder_scan(self, folder: Path) -> None:
+        """
+        バックグラウンドで画像ファイルのスキャンを開始
+
+        実行中のスキャンがあれば中止する。それまでに見つかった画像の
+        Playlist が随時 _on_scan_playlist に届き、最初の1回で表示と再生を
+        開始する。
+
+        Args:
+            folder: スキャンするフォルダ
+        """
+        self._cancel_folder_scan()
+        self._cancel_metadata_scan()
+        self._stop_folder_watcher()
+        self._folder_index = None
+        self._metadata.clear()
+
+        # 画像リストをリセット
+        self._slideshow.stop()
+        self.is_playing = False
+        self.image_files = Playlist(self.sort_order)
+        self.current_index = 0
+        self.original_pixmap = None
+        self._displayed_image = None
+        self._displayed_path = None
+        self._scaled_cache.clear()
+        self.image_view.clear()
+        self._prefetcher.request([])
+        self._prefetcher.warm_up([], QSize())
+        self._failed_in_row = 0
+
+        self._scan_id += 1
+        self._scan_count = 0
+        self._scan_error = None
+        self._scan_started = self._metrics.start()
+        self._last_slide_time = 0.0
+
+        thread = QThread(self)
+        thread.setObjectName("beginview-folder-scan")
+        worker = FolderScanWorker(
+            self._scan_id,
+            folder,
+            self.include_subfolders,
+            self.SUPPORTED_EXTENSIONS,
+            self.sort_order,
+        )
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.playlist_ready.connect(self._on_scan_playlist)
+        worker.progress.connect(self._on_scan_progress)
+        worker.finished.connect(self._on_scan_finished)
+        worker.failed.connect(self._on_scan_failed)
+        worker.index_ready.connect(self._on_scan_index_ready)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        self._scan_thread = thread
+        self._scan_worker = worker
+        self.cancel_scan_action.setEnabled(True)
+        self._update_scan_status()
+
+        thread.start()
+
+    def _cancel_folder_scan(self) -> None:
+        """実行中のスキャンを中止"""
+        if self._scan_worker is not None:
+            self._scan_worker.cancel()
+        self._scan_worker = None
+        self._scan_thread = None
+        self.cancel_scan_action.setEnabled(False)
+        self._update_scan_status()
+
+    def _update_scan_status(self) -> None:
+        """ステータスバーのスキャン進捗表示を更新"""
+        scanning = self._scan_worker is not None
+        self.scan_status_label.setVisible(scanning)
+        self.scan_cancel_button.setVisible(scanning)
+        if scanning:
+            self.scan_status_label.setText(
+                get_text(self.current_language, "status_scanning").format(
+                    count=self._scan_count
+                )
+            )
+
+    def _on_scan_playlist(self, scan_id: int, playlist: Playlist) -> None:
+        """
+        画像リストをスキャン途中の Playlist に差し替える
+
+        表示中の画像は、リストが並べ替わっても同じファイルを指し続ける。
+
+        Args:
+            scan_id: スキャンの識別番号
+            playlist: それまでに見つかった画像（ワーカーで作成した複製）
+        """
+        if scan_id != self._scan_id:
+            return  # 古いスキャンの結果
+
+        current_entry = (
+            self.image_files.entry_id(self.current_index) if self.image_files else None
+        )
+
+        # エントリ番号は同じスキャンの Playlist 間で共通
+        self.image_files = playlist
+        # 並び順の変更がワーカーに反映される前に作られたもの
+        self.image_files.set_sort_order(self.sort_order)
+
+        if current_entry is None:
+            # 最初の通知: 表示と再生を開始
+            self.current_index = 0
+            self.is_playing = True
+            self._reset_shuffle()
+            self._slideshow.start()
+            self._show_image(self.current_index)
         else:
-            # 現在のフォルダのみ
-            image_files = [
-                f
-                for f in folder.iterdir()
-                if f.is_file() and f.suffix.lower() in self.SUPPORTED_EXTENSIONS
-            ]
+            self.current_index = self.image_files.position_of(current_entry) or 0
+            self._update_prefetch()
+
+    def _on_scan_progress(self, scan_id: int, count: int) -> None:
+        """スキャンの進捗を表示"""
+        if scan_id != self._scan_id:
+            return
+        self._scan_count = count
+        self._update_scan_status()
 
-        # ファイル名でソート
-        image_files.sort(key=lambda x: x.name.lower())
+    def _on_scan_failed(self, scan_id: int, error: str) -> None:
+        """
+        スキャンの失敗を記録する（終了時の _on_scan_finished で知らせる）
 
-        if not image_files:
-            # 画像が無い場合のメッセージ
-            QMessageBox.information(
+        Args:
+            scan_id: スキャンの識別番号
+            error: エラーメッセージ
+        """
+        if scan_id != self._scan_id:
+            return
+        self._scan_error = error
+
+    def _on_scan_finished(self, scan_id: int, completed: bool) -> None:
+        """
+        スキャン終了時の処理
+
+        Args:
+            scan_id: スキャンの識別番号
+            completed: 最後まで完了したか（キャンセルされた・失敗した場合は
+                False）
+        """
+        if scan_id != self._scan_id:
+            return
+
+        self._scan_worker = None
+        self._scan_thread = None
+        self.cancel_scan_action.setEnabled(False)
+        self._update_scan_status()
+        scan_ms = self._metrics.stop("scan", self._scan_started)
+        if scan_ms:
+            self._last_scan = (scan_ms, len(self.image_files))
+        self._scan_started = 0.0
+
+        if self._scan_error is not None and not self.image_files:
+            # フォルダを読めなかった場合は、空のフォルダとは区別して知らせる
+            self._update_ui_texts()
+            QMessageBox.warning(
                 self,
-                get_text(self.current_language, "msg_no_images_title"),
-                get_text(self.current_language, "msg_no_images_body"),
+                get_text(self.current_language, "msg_scan_failed_title"),
+                get_text(self.current_language, "msg_scan_failed_body").format(
+                    error=self._scan_error
+                ),
             )
             return
 
-        # 画像リストを更新
-        self.image_files = image_files
-        self.current_index = 0
-        self.is_playing = True
+        if not self.image_files:
+            # 画像が無い場合のメッセージ
+            self._update_ui_texts()
+            if completed:
+                QMessageBox.information(
+                    self,
+                    get_text(self.current_language, "msg_no_images_title"),
+                    get_text(self.current_language, "msg_no_images_body"),
+                )
+            return
 
-        # タイマーを開始
-        self.slide_timer.start()
+        if self._scan_error is not None:
+            status_key = "status_scan_failed"
+        elif completed:
+            status_key = "status_scan_done"
+        else:
+            status_key = "status_scan_cancelled"
+        self.statusBar().showMessage(
+            get_text(self.current_language, status_key).format(
+                count=len(self.image_files)
+            ),
+            5000,
+        )
+        self._start_preview_warmup()
+        self._start_metadata_scan()
 
-        # 最初の画像を表示
-        self._show_image(self.current_index)
+    def _start_preview_warmup(self) -> None:
+        """
+        これから表示する画像のプレビューをバックグラウンドで作っておく
+
+        ウィンドウに合わせて表示する場合のみ。作ったプレビューはディスクに
+        保存され、次に同じフォルダを開いたときにもデコードせずに済む。
+        """
+        if self.zoom_mode != "fit" or not self.image_files:
+            self._prefetcher.warm_up([], QSize())
+            return
+        self._prefetcher.warm_up(self._upcoming_images(), self._decode_size())
+
+    def _upcoming_images(self) -> Iterator[Tuple[Path, int]]:
+        """
+        表示中の画像から表示する順に1周分の（パス, 更新日時 ns）を順に返す
+
+        別のフォルダを開くなどして画像リストが置き換わったら終わる。
+        """
+        playlist = self.image_files
+        indices = self._neighbor_indices(forward=True)
+        index = self.current_index
+        for offset in range(len(playlist)):
+            if playlist is not self.image_files or offset >= len(playlist):
+                return
+            if offset > 0:
+                index = next(indices, None)
+                if index is None:
+                    return
+            if self._is_bad(index):
+                continue
+            entry_id = playlist.entry_id(index)
+            yield playlist.path_of(entry_id), playlist.mtime_of(entry_id)
+
+    def _start_metadata_scan(self) -> None:
+        """
+        バックグラウンドで画像リストのすべての画像のメタデータの読み取りを開始
+
+        実行中の読み取りがあれば中止する。エントリ番号は変わらないので、
+        それまでに読み取った分は残しておく。フォルダインデックスがあれば、
+        その隣に保存したメタデータのうち変更されていないファイルの分を再利用
+        する。
+        """
+        self._cancel_metadata_scan()
+        if not self.image_files:
+            return
+
+        if self._folder_index is not None:
+            root = self._folder_index.root
+            cache_file = self._folder_index.metadata_file()
+        else:
+            root = str(self.image_files.path_of(self.image_files.entry_id(0)).parent)
+            cache_file = None
+
+        thread = QThread(self)
+        thread.setObjectName("beginview-metadata")
+        worker = MetadataScanWorker(
+            self._metadata_scan_id, self.image_files.copy(), root, cache_file
+        )
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.metadata_ready.connect(self._on_metadata_ready)
+        worker.finished.connect(self._on_metadata_finished)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        self._metadata_worker = worker
+        thread.start()
+
+    def _cancel_metadata_scan(self) -> None:
+        """
+        実行中のメタデータの読み取りを中止
+
+        識別番号を進めるので、中止したワーカーが送信済みの結果も無視される。
+        """
+        if self._metadata_worker is not None:
+            self._metadata_worker.cancel()
+        self._metadata_worker = None
+        self._metadata_scan_id += 1
+
+    def _on_metadata_ready(self, scan_id: int, batch: list) -> None:
+        """
+        読み取ったメタデータをインデックスに登録
+
+        Args:
+            scan_id: メタデータの読み取りの識別番号
+            batch: （エントリ番号, メタデータ）のリスト
+        """
+        if scan_id != self._metadata_scan_id:
+            return
+        for entry_id, metadata in batch:
+            self._metadata.set(entry_id, metadata)
+            if not metadata.format:
+                # ヘッダも読めない画像は、表示の順番が来る前に飛ばす対象にする
+                self._bad_files.add(
+                    str(self.image_files.path_of(entry_id)),
+                    self.image_files.mtime_of(entry_id),
+                    "Unreadable image header",
+                )
+
+    def _on_metadata_finished(self, scan_id: int, completed: bool) -> None:
+        """
+        メタデータの読み取り終了時に、撮影日時を画像リストの列に反映
+
+        撮影日時順で表示中の場合は並べ替わるが、表示中の画像はそのまま
+        選択しておく。
+
+        Args:
+            scan_id: メタデータの読み取りの識別番号
+            completed: 最後まで完了したか（キャンセルされた場合は False）
+        """
+        if scan_id != self._metadata_scan_id:
+            return
+        self._metadata_worker = None
+        # 読み取り中に記録した読み込めない画像をまとめて保存
+        self._bad_files.flush()
+        if not self.image_files:
+            return
+
+        current_entry = self.image_files.entry_id(self.current_index)
+        self.image_files.set_captured(self._metadata.captured_times())
+        if self.sort_order == SortOrder.CAPTURED:
+            self.current_index = self.image_files.position_of(current_entry) or 0
+            self._update_prefetch()
+
+    def _on_scan_index_ready(self, scan_id: int, index: FolderIndex) -> None:
+        """
+        完了したスキャンのフォルダインデックスを受け取る
+
+        Args:
+            scan_id: スキャンの識別番号
+            index: フォルダインデックス
+        """
+        if scan_id != self._scan_id:
+            return
+        self._folder_index = index
+        if self.watch_folder:
+            self._start_folder_watcher()
+
+    def _start_folder_watcher(self) -> None:
+        """現在のフォルダの監視を開始"""
+        self._stop_folder_watcher()
+        if self._folder_index is None:
+            return  # スキャン完了時に開始する
+        self._folder_watcher = FolderWatcher(self._folder_index, self)
+        self._folder_watcher.changes_ready.connect(self._on_folder_changed)
+
+    def _stop_folder_watcher(self) -> None:
+        """フォルダの監視を停止"""
+        if self._folder_watcher is None:
+            return
+        self._folder_watcher.stop()
+        self._folder_watcher.deleteLater()
+        self._folder_watcher = None
+
+    def _on_folder_changed(
+        self, added: List[DirectoryListing], removed: List[Path]
+    ) -> None:
+        """
+        フォルダの変更を画像リストに反映
+
+        表示中の画像が残っていれば同じファイルを指し続ける。削除された場合は
+        その位置にある次の画像を表示する。
+
+        Args:
+            added: 追加された画像（ディレクトリごと）
+            removed: 削除された画像
+        """
+        current_entry = (
+            self.image_files.entry_id(self.current_index) if self.image_files else None
+        )
+
+        removed_positions = self.image_files.remove_paths(removed)
+        current_removed = (
+            current_entry is not None
+            and self.image_files.position_of(current_entry) is None
+        )
+        if current_removed and self.image_files:
+            # 表示中の画像が削除された: その位置に繰り上がった画像を追う
+            shift = bisect.bisect_left(removed_positions, self.current_index)
+            index = min(self.current_index - shift, len(self.image_files) - 1)
+            current_entry = self.image_files.entry_id(index)
+
+        self.image_files.add_listings(added)
+
+        if not self.image_files:
+            # すべて削除された
+            self._slideshow.stop()
+            self.is_playing = False
+            self.current_index = 0
+            self.original_pixmap = None
+            self._displayed_image = None
+            self._displayed_path = None
+            self._scaled_cache.clear()
+            self.image_view.clear()
+            self._prefetcher.request([])
+            self._update_ui_texts()
+            return
+
+        if current_entry is None:
+            # 空のフォルダに画像が追加された: 表示と再生を開始
+            self.current_index = 0
+            self.is_playing = True
+            self._reset_shuffle()
+            self._slideshow.start()
+            self._show_image(self.current_index)
+            return
+
+        self.current_index = self.image_files.position_of(current_entry) or 0
+        if current_removed:
+            self._show_image(self.current_index)
+        else:
+            self._update_prefetch()
+        if added:
+            self._start_metadata_scan()
+
+    def closeEvent(self, event) -> None:
+        """ウィンドウを閉じる前にスキャンスレッドとフォルダ監視、先読みを停止"""
+        self._cancel_folder_scan()
+        self._cancel_metadata_scan()
+        self._stop_folder_watcher()
+        self._prefetcher.shutdown()
+        self._tile_loader.shutdown()
+        self._pyramids.shutdown()
+        self._bad_files.close()
+        self._metrics_timer.stop()
+        if self._metrics_log is not None:
+            self._metrics_log.close()
+            self._metrics_log = None
+        # キャンセル済みでまだ終了していないスレッドも含めて待機する
+        for thread in self.findChildren(QThread):
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
 
     def _show_image(self, index: int) -> None:
         """
         指定されたインデックスの画像を表示
-        
+
+        先読み済みであればすぐに表示し、そうでなければデコードの完了を待って
+        _on_image_ready で表示する（それまでは前の画像を表示したまま）。
+        読み込めないと記録されている画像は、移動している方向に飛ばす。
+
         Args:
             index: 表示する画像のインデックス
         """
         if not self.image_files or index < 0 or index >= len(self.image_files):
             return
 
-        try:
-            image_path = self.image_files[index]
-            pixmap = QPixmap(str(image_path))
-
-            if pixmap.isNull():
-                raise ValueError(f"Failed to load image: {image_path}")
-
-            # 元の画像を保存
-            self.original_pixmap = pixmap
-            
-            # ズームモードに応じて表示
-            if self.zoom_mode == "fit":
-                self.zoom_factor = 1.0
-                scaled_pixmap = self._scale_pixmap(pixmap)
-            elif self.zoom_mode == "100":
-                self.zoom_factor = 1.0
-                scaled_pixmap = pixmap
-            else:  # custom
-                scaled_pixmap = self._apply_zoom(pixmap)
-            
-            self.image_label.setPixmap(scaled_pixmap)
+        self._skip_generation += 1  # 実行中の飛ばしは不要になった
+        self.current_index = index
+        if self._is_bad(index):
+            self._navigate(1 if self._nav_direction >= 0 else -1)
+            return
+        self._update_prefetch()
+
+        # 表示されるまでの時間を計測する（先読み済みでなければ _display_image で）
+        self._show_started = self._metrics.start()
+        image = self._decoded_image(index)
+        if image is not None:
+            self._metrics.count("prefetch_hit")
+            self._display_image(image)
+        else:
+            self._metrics.count("prefetch_miss")
+
+    def _decoded_image(self, index: int) -> Optional[QImage]:
+        """指定されたインデックスの画像が先読み済みであれば返す"""
+        entry_id = self.image_files.entry_id(index)
+        return self._prefetcher.get(
+            self.image_files.path_of(entry_id),
+            self.image_files.mtime_of(entry_id),
+            self._decode_size(),
+        )
 
-            self.current_index = index
+    def _update_prefetch(self) -> None:
+        """
+        表示中の画像の前後を先読みするよう要求
 
-        except Exception as e:
-            # エラーログをコンソールに出力（本番ではロガーを使う）
-            print(
-                get_text(self.current_language, "msg_error_loading_body").format(
-                    filename=str(self.image_files[index])
-                )
+        移動している方向に _prefetch_ahead() 枚、反対方向に PREFETCH_BEHIND 枚
+        を近い順に並べる。範囲から外れた画像の待機中のデコードは取り消される。
+        """
+        if not self.image_files:
+            return
+        forward = self._nav_direction > 0
+        ahead = list(islice(self._readable_neighbors(forward), self._prefetch_ahead()))
+        behind = list(
+            islice(self._readable_neighbors(not forward), self.PREFETCH_BEHIND)
+        )
+        indices = [self.current_index]
+        for step in range(max(len(ahead), len(behind))):
+            indices.extend(ahead[step:step + 1])
+            indices.extend(behind[step:step + 1])
+
+        images = []
+        for index in indices:
+            entry_id = self.image_files.entry_id(index)
+            images.append(
+                (self.image_files.path_of(entry_id), self.image_files.mtime_of(entry_id))
             )
-            print(f"Error details: {e}")
+        self._prefetcher.request(images, self._decode_size())
 
-            # 次の画像へ進む（最後の画像の場合は先頭へ）
-            if index < len(self.image_files) - 1:
-                self._show_image(index + 1)
-            elif len(self.image_files) > 0:
-                self._show_image(0)
+    def _neighbor_indices(self, forward: bool) -> Iterator[int]:
+        """
+        表示中の画像の次から、表示する順に画像のインデックスを返す
 
-    def _scale_pixmap(self, pixmap: QPixmap) -> QPixmap:
+        通常は表示順に前後の画像を（1周するまで）、シャッフル中は巡る順に
+        返す。どちらも表示中の画像の位置は動かさない。
+
+        Args:
+            forward: 進む方向なら True、戻る方向なら False
         """
-        ウィンドウサイズに合わせてPixmapをスケーリング
-        
+        if self.shuffle:
+            return self._shuffle.upcoming(self.image_files, forward)
+        count = len(self.image_files)
+        direction = 1 if forward else -1
+        return (
+            (self.current_index + step * direction) % count for step in range(1, count)
+        )
+
+    def _readable_neighbors(self, forward: bool) -> Iterator[int]:
+        """
+        _neighbor_indices のうち、読み込めないと記録されていない画像
+
+        調べるのは SKIP_SCAN_CHUNK 枚まで（読み込めない画像が続いても止まらない）。
+        """
+        return (
+            index
+            for index in islice(self._neighbor_indices(forward), self.SKIP_SCAN_CHUNK)
+            if not self._is_bad(index)
+        )
+
+    def _is_bad(self, index: int) -> bool:
+        """指定されたインデックスの画像が読み込めないと記録されているかどうか"""
+        if not self._bad_files:
+            return False
+        entry_id = self.image_files.entry_id(index)
+        return self._bad_files.contains(
+            str(self.image_files.path_of(entry_id)),
+            self.image_files.mtime_of(entry_id),
+        )
+
+    def _navigate(self, direction: int, steps: int = 1) -> None:
+        """
+        読み込めないと記録されている画像を飛ばして、steps 枚先の画像へ移動
+
+        SKIP_SCAN_CHUNK 枚調べても見つからなければ、残りはイベントループに
+        戻りながら _continue_skip で調べる（その間は前の画像を表示したまま）。
+
         Args:
-            pixmap: スケーリングするQPixmap
-        
+            direction: 1 なら次へ、-1 なら前へ
+            steps: 移動する枚数（読み込める画像だけを数える）
+        """
+        self._nav_direction = direction
+        index = None
+        for _ in range(steps):
+            index = self._step_readable(direction)
+            if index is None:
+                self._skip_unreadable(direction, self.SKIP_SCAN_CHUNK)
+                return
+        self._show_image(index)
+
+    def _step_readable(self, direction: int) -> Optional[int]:
+        """
+        読み込めないと記録されていない画像まで current_index を進める
+
+        Args:
+            direction: 1 なら次へ、-1 なら前へ
+
         Returns:
-            スケーリングされたQPixmap
+            見つかった画像のインデックス（SKIP_SCAN_CHUNK 枚、または1周
+            調べても見つからなければ None）
+        """
+        for _ in range(min(self.SKIP_SCAN_CHUNK, len(self.image_files))):
+            index = self._step_index(direction)
+            self.current_index = index
+            if not self._is_bad(index):
+                return index
+        return None
+
+    def _skip_unreadable(self, direction: int, examined: int) -> None:
+        """
+        読み込めない画像の続きを、イベントループに戻ってから調べる
+
+        1周分調べても見つからなければ（すべて読み込めない）再生を止める。
+
+        Args:
+            direction: 1 なら次へ、-1 なら前へ
+            examined: これまでに調べた枚数
+        """
+        if examined >= len(self.image_files):
+            self._stop_no_readable_images()
+            return
+        self._skip_generation += 1
+        generation = self._skip_generation
+        QTimer.singleShot(
+            0, lambda: self._continue_skip(direction, examined, generation)
+        )
+
+    def _stop_no_readable_images(self) -> None:
+        """読み込める画像が1枚もないので再生を止め、ステータスバーで知らせる"""
+        self._slideshow.stop()
+        self.is_playing = False
+        self.statusBar().showMessage(
+            get_text(self.current_language, "status_no_readable_images"), 5000
+        )
+
+    def _continue_skip(self, direction: int, examined: int, generation: int) -> None:
+        """読み込めない画像の飛ばしを続ける（その間に移動していれば何もしない）"""
+        if generation != self._skip_generation or not self.image_files:
+            return
+        index = self._step_readable(direction)
+        if index is None:
+            self._skip_unreadable(direction, examined + self.SKIP_SCAN_CHUNK)
+            return
+        self._show_image(index)
+
+    def _step_index(self, steps: int) -> int:
         """
-        label_size = self.image_label.size()
-        if label_size.width() <= 0 or label_size.height() <= 0:
-            return pixmap
+        steps 枚進んだ（負なら戻った）画像のインデックスを返す
 
-        scaled = pixmap.scaled(
-            label_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
+        シャッフル中は巡る順のカーソルも動かす。
+
+        Args:
+            steps: 進む枚数
+        """
+        if self.shuffle:
+            target = self._shuffle.move(self.image_files, steps)
+            if target is not None:
+                return target[1]
+        return (self.current_index + steps) % len(self.image_files)
+
+    def _reset_shuffle(self) -> None:
+        """表示中の画像から、新しい乱数の種で巡り直す"""
+        self._shuffle = ShuffleOrder()
+        if self.image_files:
+            self._shuffle.start(
+                self.image_files, self.image_files.entry_id(self.current_index)
+            )
+
+    def _prefetch_ahead(self) -> int:
+        """
+        移動している方向に先読みする枚数
+
+        スライドショー中は SLIDESHOW_LOOKAHEAD_MS のうちに表示する枚数まで
+        増やす（間隔が短くても、デコードを締め切りより十分前に始めるため）。
+        """
+        if not self.is_playing:
+            return self.PREFETCH_AHEAD
+        return max(
+            self.PREFETCH_AHEAD,
+            -(-self.SLIDESHOW_LOOKAHEAD_MS // max(1, self.slide_interval)),
+        )
+
+    def _decode_size(self) -> Optional[QSize]:
+        """
+        画像をデコードする最大サイズ
+
+        ウィンドウに合わせて表示する場合は、表示領域のサイズを DECODE_SIZE_STEP
+        単位に切り上げたサイズまで縮小してデコードする。100% 表示やズーム時は
+        元の解像度が必要なので None を返す。
+        """
+        if self.zoom_mode != "fit":
+            return None
+        step = self.DECODE_SIZE_STEP
+        label_size = self.image_view.size()
+        return QSize(
+            max(1, -(-label_size.width() // step)) * step,
+            max(1, -(-label_size.height() // step)) * step,
         )
+
+    def _is_current_path(self, path: str) -> bool:
+        """表示しようとしている画像のパスかどうか"""
+        return (
+            0 <= self.current_index < len(self.image_files)
+            and str(self.image_files[self.current_index]) == path
+        )
+
+    def _on_image_ready(self, path: str, image: QImage) -> None:
+        """
+        先読みしたデコード結果を受け取る
+
+        Args:
+            path: 画像のパス
+            image: デコードした画像
+        """
+        if self._is_current_path(path):
+            self._display_image(image)
+
+    def _on_preview_ready(self, path: str, image: QImage) -> None:
+        """
+        サムネイルか埋め込みのプレビューを、本体のデコードが完了するまでの間
+        表示する
+
+        Args:
+            path: 画像のパス
+            image: プレビュー（元のサイズに引き伸ばして表示する）
+        """
+        if self._is_current_path(path) and path != self._displayed_path:
+            self._display_image(image)
+
+    def _on_image_failed(self, path: str, error: str) -> None:
+        """
+        デコードに失敗した画像を飛ばして次の画像へ進む
+
+        Args:
+            path: 画像のパス
+            error: エラーメッセージ
+        """
+        if not self._is_current_path(path):
+            return  # 先読みのみ。表示しようとしたときに改めて処理する
+
+        # エラーログをコンソールに出力（本番ではロガーを使う）
+        print(
+            get_text(self.current_language, "msg_error_loading_body").format(
+                filename=path
+            )
+        )
+        print(f"Error details: {error}")
+
+        # 移動していた方向の次の画像へ進む（端の場合は反対の端へ）。すべて
+        # 失敗したら止める
+        self._failed_in_row += 1
+        if self._failed_in_row >= len(self.image_files):
+            self._stop_no_readable_images()
+            return
+        self._navigate(1 if self._nav_direction >= 0 else -1)
+
+    @traced("display image", "paint")
+    def _display_image(self, image: QImage) -> None:
+        """
+        デコード済みの画像を表示
+
+        Args:
+            image: 表示用の形式に変換済みの画像
+        """
+        self._failed_in_row = 0
+        self._displayed_decode_size = self._decode_size() if is_reduced(image) else None
+        prepared = self._prepared_slide
+        self._prepared_slide = None
+        if prepared is not None and prepared[0] == image.cacheKey():
+            # スライドショーの締め切りの前に準備したもの
+            _, pixmap, scaled_cache = prepared
+            self._scaled_cache = scaled_cache
+        else:
+            pixmap = QPixmap.fromImage(image)
+            self._scaled_cache.clear()
+
+        # 元の画像を保存（同じ画像を別の解像度で読み直した場合は表示位置を保つ）
+        entry_id = self.image_files.entry_id(self.current_index)
+        path = str(self.image_files.path_of(entry_id))
+        if self.is_playing and path != self._displayed_path:
+            # 再生中に実際に切り替わった間隔
+            now = self._metrics.start()
+            if now and self._last_slide_time:
+                self._metrics.record("slide", (now - self._last_slide_time) * 1000.0)
+            self._last_slide_time = now
+        self.original_pixmap = pixmap
+        self._displayed_image = image
+        self._image_size = original_size(image)
+        self.image_view.set_pixmap(
+            pixmap,
+            keep_position=path == self._displayed_path,
+            image_size=self._image_size,
+        )
+        self._displayed_path = path
+
+        # 巨大な画像は縮小したものしかデコードしないので、拡大表示では
+        # 見えている範囲をタイルで読み込む
+        self._large_image = is_large(self._image_size)
+        if self._large_image:
+            self._tile_loader.set_image(
+                path, self.image_files.mtime_of(entry_id), self._image_size
+            )
+
+        if self.zoom_mode in ("fit", "100"):
+            self.zoom_factor = 1.0
+        self._render()
+        # スライドショーの締め切りに対して表示した時刻を記録する（サムネイルや
+        # プレビューを表示した場合も、画像が切り替わったものとして扱う）
+        self._slideshow.frame_shown()
+        if self._show_started:
+            self._metrics.stop("show", self._show_started)
+            self._show_started = 0.0
+
+    @traced("render", "paint")
+    def _render(self, fast: bool = False) -> None:
+        """
+        original_pixmap をズームモードに応じた倍率で表示
+
+        拡大縮小は画像ビューの描画時の変換で行い、拡大した Pixmap は作らない。
+
+        Args:
+            fast: True の場合は補間なしで描画する（ウィンドウのサイズ変更中や
+                ホイールでのズーム中）
+        """
+        if fast:
+            mode = Qt.TransformationMode.FastTransformation
+        else:
+            # 高品質な表示を行うので、予約済みの処理は不要
+            self._fast_render_timer.stop()
+            self._smooth_render_timer.stop()
+            mode = Qt.TransformationMode.SmoothTransformation
+
+        if not self.original_pixmap:
+            return
+        started = self._metrics.start()
+        scale = self._view_scale()
+        size = self._display_size(self._image_size)
+        rendition = None
+        if (
+            mode == Qt.TransformationMode.SmoothTransformation
+            and size.width() < self.original_pixmap.width()
+        ):
+            # 描画時のバイリニア補間では縮小時に画素が間引かれて粗くなるため、
+            # 縮小表示だけは高品質に縮小した画像を用意する（元の画像より小さい）
+            rendition = self._scaled_rendition(size)
+        self.image_view.set_zoom(
+            scale,
+            smooth=mode == Qt.TransformationMode.SmoothTransformation,
+            rendition=rendition,
+        )
+        self._update_tiles()
+        self._metrics.stop("render", started)
+
+    def _update_tiles(self) -> None:
+        """
+        巨大な画像の見えている範囲のタイルを表示（足りないものは読み込む）
+
+        縮小してデコードした画像の解像度で足りる倍率ではタイルを使わない。
+        """
+        if not self._large_image or not self.original_pixmap:
+            self.image_view.set_tiles([])
+            return
+        scale = self._view_scale()
+        if self._image_size.width() * scale <= self.original_pixmap.width():
+            self.image_view.set_tiles([])
+            return
+        self.image_view.set_tiles(
+            self._tile_loader.tiles(self.image_view.visible_image_rect(), scale)
+        )
+
+    def _schedule_interactive_render(self) -> None:
+        """
+        連続する操作中の再描画を予約
+
+        同じイベントループの周回で届いたイベントは1回の高速な描画にまとめ、
+        操作が SMOOTH_RENDER_DELAY_MS 途切れたら高品質な描画を1回だけ行う。
+        """
+        if not self._fast_render_timer.isActive():
+            self._fast_render_timer.start()
+        self._smooth_render_timer.start()
+
+    def _view_scale(self, image_size: Optional[QSize] = None) -> float:
+        """
+        ズームモードに応じた、元の画像に対する表示倍率
+
+        Args:
+            image_size: 元の画像のサイズ（省略時は表示中の画像の _image_size）
+
+        Returns:
+            表示倍率
+        """
+        if image_size is None:
+            image_size = self._image_size
+        if self.zoom_mode == "fit":
+            view_size = self.image_view.size()
+            if view_size.width() <= 0 or view_size.height() <= 0 or image_size.isEmpty():
+                return 1.0
+            return min(
+                view_size.width() / image_size.width(),
+                view_size.height() / image_size.height(),
+            )
+        if self.zoom_mode == "100":
+            return 1.0
+        return self.zoom_factor  # custom
+
+    def _display_size(self, image_size: QSize) -> QSize:
+        """元のサイズが image_size の画像を、今のズームで表示するときのサイズ"""
+        scale = self._view_scale(image_size)
+        return QSize(
+            max(1, round(image_size.width() * scale)),
+            max(1, round(image_size.height() * scale)),
+        )
+
+    @traced("scale", "scale")
+    def _scaled_rendition(
+        self,
+        size: QSize,
+        image: Optional[QImage] = None,
+        cache: Optional[ByteLRUCache[QPixmap]] = None,
+        build_pyramid: bool = True,
+    ) -> Optional[QPixmap]:
+        """
+        表示中の画像をアスペクト比を保って高品質に縮小した Pixmap を返す
+        （キャッシュ付き）
+
+        半分以下に縮小する場合は、ピラミッドのうち size 以上で最も小さい段階
+        から縮小する。元の画像から一度に縮小するより速く、縮小率が小さいので
+        折り返しによるちらつきも出にくい。キーは（縮小元の画像, 目標サイズ）。
+
+        Args:
+            size: 目標サイズ
+            image: 縮小する画像（省略時は表示中の画像。スライドショーで次の
+                画像を準備する場合に指定する）
+            cache: 結果を入れるキャッシュ（省略時は _scaled_cache）
+            build_pyramid: ピラミッドが無ければ作成を開始するか（False なら
+                作成済みのものだけを使う。表示中の画像の作成を取り消さない）
+
+        Returns:
+            縮小された Pixmap（ピラミッドを作成中の場合は None。完了したら
+            _on_pyramid_ready で描画し直す。build_pyramid が False で
+            作成済みでない場合も None）
+        """
+        if image is None:
+            image = self._displayed_image
+        if cache is None:
+            cache = self._scaled_cache
+        source = image
+        if size.width() * 2 <= image.width():
+            if build_pyramid:
+                levels = self._pyramids.pyramid(image)
+            else:
+                levels = self._pyramids.cached(image)
+            if levels is None:
+                return None
+            source = nearest_level(image, levels, size.width())
+
+        key = (source.cacheKey(), size.width(), size.height())
+        scaled = cache.get(key)
+        if scaled is None:
+            started = self._metrics.start()
+            scaled = QPixmap.fromImage(
+                source.scaled(
+                    size,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation,
+                )
+            )
+            cache.put(
+                key, scaled, scaled.width() * scaled.height() * scaled.depth() // 8
+            )
+            self._metrics.stop("scale", started)
         return scaled
 
+    def _on_pyramid_ready(self) -> None:
+        """ピラミッドができたら縮小表示を高品質に描画し直す"""
+        # 操作中であれば、止まったときの描画に任せる
+        if self.original_pixmap and not self._smooth_render_timer.isActive():
+            self._render()
+
+    @traced("resizeEvent", "event")
     def resizeEvent(self, event) -> None:
         """ウィンドウサイズ変更時に画像を再スケーリング"""
         super().resizeEvent(event)
         if self.image_files and 0 <= self.current_index < len(self.image_files):
-            # ズームモードがfitの場合は再スケーリング
-            if self.zoom_mode == "fit" and self.original_pixmap:
-                scaled_pixmap = self._scale_pixmap(self.original_pixmap)
-                self.image_label.setPixmap(scaled_pixmap)
-            elif self.zoom_mode in ["100", "custom"] and self.original_pixmap:
-                # カスタムズームの場合は再適用
-                scaled_pixmap = self._apply_zoom(self.original_pixmap)
-                self.image_label.setPixmap(scaled_pixmap)
-
-    def _on_timer_tick(self) -> None:
-        """タイマーのtick時に次の画像へ進む"""
+            if not self.original_pixmap:
+                return
+            # サイズ変更中は高速に描画し、止まったら高品質に描画し直す
+            self._schedule_interactive_render()
+            # 縮小してデコードした画像では足りなくなった場合はデコードし直す
+            # （それまでは今の画像を引き伸ばして表示しておく）
+            if (
+                self.zoom_mode == "fit"
+                and self._displayed_decode_size is not None
+                and self._displayed_decode_size != self._decode_size()
+            ):
+                self._show_image(self.current_index)
+
+    @traced("slide prepare", "timer")
+    def _on_slide_prepare(self) -> None:
+        """
+        スライドショーの締め切りの前に、次の画像を表示できる状態にしておく
+
+        先読み済みであれば Pixmap への変換と縮小表示用の縮小を済ませておき、
+        締め切りでは切り替えるだけにする。デコードが済んでいなければ何も
+        しない（締め切りに間に合わなければ _on_slide_deadline で扱う）。
+        縮小はピラミッドが作成済みの場合だけ行う（ここで作成を始めると、
+        表示中の画像のピラミッドの作成を取り消してしまうため）。
+        """
         if not self.image_files:
             return
+        started = self._metrics.start()
+        index = next(self._readable_neighbors(forward=True), None)
+        if index is None:
+            return
+        image = self._decoded_image(index)
+        if image is None:
+            return
+        pixmap = QPixmap.fromImage(image)
+        scaled_cache: ByteLRUCache[QPixmap] = ByteLRUCache(self.SCALED_CACHE_BUDGET)
+        size = self._display_size(original_size(image))
+        if size.width() < pixmap.width():
+            self._scaled_rendition(size, image, scaled_cache, build_pyramid=False)
+        self._prepared_slide = (image.cacheKey(), pixmap, scaled_cache)
+        self._metrics.stop("prepare", started)
+
+    @traced("slide deadline", "timer")
+    def _on_slide_deadline(self) -> None:
+        """
+        スライドショーの締め切りに次の画像へ切り替える
 
-        self.current_index = (self.current_index + 1) % len(self.image_files)
-        self._show_image(self.current_index)
+        次の画像のデコードが済んでいなければ、間に合わない画像を飛ばす設定の
+        場合は先読み済みの先の画像へ飛ばす。どれも済んでいなければ（または
+        飛ばさない設定では）デコードの完了を待って表示する。
+        """
+        if not self.image_files:
+            return
+
+        started = self._metrics.start()
+        step = 1
+        if self._slideshow.policy == LatePolicy.SKIP:
+            upcoming = list(
+                islice(self._readable_neighbors(forward=True), self._prefetch_ahead())
+            )
+            if upcoming and self._decoded_image(upcoming[0]) is None:
+                for ahead, index in enumerate(upcoming[1:], start=2):
+                    if self._decoded_image(index):
+                        self._slideshow.record_skipped(ahead - 1)
+                        step = ahead
+                        break
+        self._navigate(1, step)
+        self._metrics.stop("tick", started)
 
     def keyPressEvent(self, event: QKeyEvent) -> None:
         """キーボード操作を処理"""
@@ -458,6 +1646,10 @@ class BeginViewWindow(QMainWindow):
         elif key == Qt.Key.Key_I:
             self._show_image_info()
 
+        # P: パフォーマンス情報の表示をトグル
+        elif key == Qt.Key.Key_P:
+            self._toggle_metrics_overlay()
+
         else:
             super().keyPressEvent(event)
 
@@ -467,26 +1659,28 @@ class BeginViewWindow(QMainWindow):
             return
 
         self.is_playing = not self.is_playing
+        self._last_slide_time = 0.0
         if self.is_playing:
-            self.slide_timer.start()
+            self._slideshow.start()
         else:
-            self.slide_timer.stop()
+            self._slideshow.stop()
+        self._update_prefetch()
 
     def _next_image(self) -> None:
         """次の画像へ進む"""
         if not self.image_files:
             return
 
-        self.current_index = (self.current_index + 1) % len(self.image_files)
-        self._show_image(self.current_index)
+        self._slideshow.restart()
+        self._navigate(1)
 
     def _previous_image(self) -> None:
         """前の画像へ戻る"""
         if not self.image_files:
             return
 
-        self.current_index = (self.current_index - 1) % len(self.image_files)
-        self._show_image(self.current_index)
+        self._slideshow.restart()
+        self._navigate(-1)
 
     def _toggle_fullscreen(self) -> None:
         """フルスクリーンと通常ウィンドウをトグル"""
@@ -495,15 +1689,13 @@ class BeginViewWindow(QMainWindow):
         else:
             self.showFullScreen()
 
-    def _on_image_label_clicked(self, event: QMouseEvent) -> None:
-        """画像ラベルのシングルクリックイベント（再生/一時停止をトグル）"""
-        if event.button() == Qt.MouseButton.LeftButton:
-            self._toggle_play_pause()
+    def _on_image_view_clicked(self) -> None:
+        """画像ビューのシングルクリックイベント（再生/一時停止をトグル）"""
+        self._toggle_play_pause()
 
-    def _on_image_label_double_clicked(self, event: QMouseEvent) -> None:
-        """画像ラベルのダブルクリックイベント（フルスクリーンをトグル）"""
-        if event.button() == Qt.MouseButton.LeftButton:
-            self._toggle_fullscreen()
+    def _on_image_view_double_clicked(self) -> None:
+        """画像ビューのダブルクリックイベント（フルスクリーンをトグル）"""
+        self._toggle_fullscreen()
 
     def _set_interval(self, interval_ms: int) -> None:
         """
@@ -513,7 +1705,8 @@ class BeginViewWindow(QMainWindow):
             interval_ms: 間隔（ミリ秒）
         """
         self.slide_interval = interval_ms
-        self.slide_timer.setInterval(interval_ms)
+        self._slideshow.set_interval(interval_ms)
+        self._update_prefetch()
         
         # メニューのチェック状態を更新
         self.interval_1s_action.setChecked(interval_ms == 1000)
@@ -522,10 +1715,62 @@ class BeginViewWindow(QMainWindow):
         self.interval_5s_action.setChecked(interval_ms == 5000)
         self.interval_10s_action.setChecked(interval_ms == 10000)
 
+    def _set_sort_order(self, sort_order: SortOrder) -> None:
+        """
+        画像の並び順を変更
+
+        スキャン時に取得した列だけで並べ替え、表示中の画像はそのまま選択しておく。
+
+        Args:
+            sort_order: 新しい並び順
+        """
+        self.sort_order = sort_order
+        if self._scan_worker is not None:
+            self._scan_worker.sort_order = sort_order
+
+        current_entry = (
+            self.image_files.entry_id(self.current_index) if self.image_files else None
+        )
+        self.image_files.set_sort_order(sort_order)
+        if current_entry is not None:
+            self.current_index = self.image_files.position_of(current_entry) or 0
+            self._update_prefetch()
+
+        # メニューのチェック状態を更新
+        self.sort_name_action.setChecked(sort_order == SortOrder.NAME)
+        self.sort_directory_action.setChecked(sort_order == SortOrder.DIRECTORY)
+        self.sort_modified_action.setChecked(sort_order == SortOrder.MODIFIED)
+        self.sort_size_action.setChecked(sort_order == SortOrder.SIZE)
+        self.sort_captured_action.setChecked(sort_order == SortOrder.CAPTURED)
+
     def _toggle_include_subfolders(self) -> None:
         """サブフォルダを含める設定をトグル"""
         self.include_subfolders = self.include_subfolders_action.isChecked()
 
+    def _toggle_watch_folder(self) -> None:
+        """フォルダの変更を監視する設定をトグル"""
+        self.watch_folder = self.watch_folder_action.isChecked()
+        if self.watch_folder:
+            self._start_folder_watcher()
+        else:
+            self._stop_folder_watcher()
+
+    def _toggle_shuffle(self) -> None:
+        """シャッフル（ランダムな順の表示）をトグル"""
+        self.shuffle = self.shuffle_action.isChecked()
+        if self.shuffle:
+            self._reset_shuffle()
+        self._prepared_slide = None
+        self._update_prefetch()
+        self._start_preview_warmup()
+
+    def _toggle_skip_late_slides(self) -> None:
+        """締め切りに間に合わない画像を飛ばす設定をトグル"""
+        if self.skip_late_slides_action.isChecked():
+            self._slideshow.policy = LatePolicy.SKIP
+        else:
+            self._slideshow.policy = LatePolicy.HOLD
+
     def _set_custom_interval(self) -> None:
         """カスタム間隔を設定するダイアログを表示"""
         current_seconds = self.slide_interval / 1000.0
@@ -555,99 +1800,101 @@ class BeginViewWindow(QMainWindow):
                 get_text(self.current_language, "dialog_interval_invalid"),
             )
 
-    def _apply_zoom(self, pixmap: QPixmap) -> QPixmap:
-        """
-        ズーム倍率を適用してPixmapをスケーリング
-        
-        Args:
-            pixmap: 元のQPixmap
-        
-        Returns:
-            ズーム適用後のQPixmap
-        """
-        if not pixmap or pixmap.isNull():
-            return pixmap
-        
-        original_size = pixmap.size()
-        new_size = QSize(
-            int(original_size.width() * self.zoom_factor),
-            int(original_size.height() * self.zoom_factor),
-        )
-        
-        scaled = pixmap.scaled(
-            new_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
-        return scaled
-
     def _zoom_fit(self) -> None:
         """ウィンドウに合わせて表示"""
         self.zoom_mode = "fit"
         self.zoom_factor = 1.0
-        if self.original_pixmap:
-            scaled_pixmap = self._scale_pixmap(self.original_pixmap)
-            self.image_label.setPixmap(scaled_pixmap)
+        self._render()
 
     def _zoom_100(self) -> None:
         """100%表示（等倍）"""
         self.zoom_mode = "100"
         self.zoom_factor = 1.0
-        if self.original_pixmap:
-            self.image_label.setPixmap(self.original_pixmap)
+        if self._redecode_full_resolution():
+            return
+        self._render()
+
+    def _redecode_full_resolution(self) -> bool:
+        """
+        表示中の画像が縮小してデコードしたものなら、元の解像度で読み直す
+
+        読み直した画像は _display_image で現在のズームモードに従って表示される。
+
+        Returns:
+            読み直しを開始した場合は True
+        """
+        if self._displayed_decode_size is None:
+            return False
+        self._show_image(self.current_index)
+        return True
 
     def _zoom_in(self) -> None:
         """ズームイン（拡大）"""
-        if not self.original_pixmap:
-            return
-        
-        self.zoom_mode = "custom"
-        self.zoom_factor = min(self.zoom_factor * 1.2, 10.0)  # 最大10倍
-        
-        scaled_pixmap = self._apply_zoom(self.original_pixmap)
-        self.image_label.setPixmap(scaled_pixmap)
+        self._step_zoom(1.2)
 
     def _zoom_out(self) -> None:
         """ズームアウト（縮小）"""
+        self._step_zoom(1 / 1.2)
+
+    def _step_zoom(self, scale: float, interactive: bool = False) -> None:
+        """
+        ズーム倍率を scale 倍に変更（0.1〜10倍の範囲）
+
+        Args:
+            scale: 倍率に掛ける値
+            interactive: ホイールなどの連続した操作中かどうか（True の場合は
+                高速な描画にまとめ、操作が止まってから高品質に描画する）
+        """
         if not self.original_pixmap:
             return
-        
+
         self.zoom_mode = "custom"
-        self.zoom_factor = max(self.zoom_factor / 1.2, 0.1)  # 最小0.1倍
-        
-        scaled_pixmap = self._apply_zoom(self.original_pixmap)
-        self.image_label.setPixmap(scaled_pixmap)
+        self.zoom_factor = min(max(self.zoom_factor * scale, 0.1), 10.0)
+        if self._redecode_full_resolution():
+            return
 
-    def _on_image_label_wheel(self, event: QWheelEvent) -> None:
-        """マウスホイールイベント（ズーム）"""
+        if interactive:
+            self._schedule_interactive_render()
+        else:
+            self._render()
+
+    def _on_image_view_wheel(self, delta: int) -> None:
+        """
+        マウスホイールイベント（ズーム）
+
+        Args:
+            delta: ホイールの回転量
+        """
         if not self.original_pixmap:
             return
-        
-        # ホイールの回転量を取得
-        delta = event.angleDelta().y()
-        
+
         if delta > 0:
             # 上に回転 = ズームイン
-            self._zoom_in()
+            self._step_zoom(1.2, interactive=True)
         else:
             # 下に回転 = ズームアウト
-            self._zoom_out()
+            self._step_zoom(1 / 1.2, interactive=True)
 
     def _show_image_info(self) -> None:
         """画像情報を表示"""
         if not self.image_files or self.current_index < 0 or self.current_index >= len(self.image_files):
             return
         
-        image_path = self.image_files[self.current_index]
+        entry_id = self.image_files.entry_id(self.current_index)
+        image_path = self.image_files.path_of(entry_id)
         
-        # ファイル情報を取得
-        file_size = image_path.stat().st_size
+        # ファイル情報はスキャン時の結果、画像の情報はメタデータインデックスから
+        # 取得する（ファイルにはアクセスしない）
+        file_size = self.image_files.size_of(entry_id)
         file_size_mb = file_size / (1024 * 1024)
+        metadata = self._metadata.get(entry_id)
         
-        # 画像サイズを取得
-        if self.original_pixmap:
-            width = self.original_pixmap.width()
-            height = self.original_pixmap.height()
+        # 画像サイズを取得（メタデータが未読なら表示中の画像から）
+        if metadata is not None and metadata.width > 0:
+            width, height = metadata.width, metadata.height
+        elif self.original_pixmap:
+            width = self._image_size.width()
+            height = self._image_size.height()
         else:
             width = height = 0
         
@@ -656,6 +1903,16 @@ class BeginViewWindow(QMainWindow):
         info_text += f"{get_text(self.current_language, 'info_size')} {file_size_mb:.2f} MB ({file_size:,} bytes)\n"
         if width > 0 and height > 0:
             info_text += f"{get_text(self.current_language, 'info_dimensions')} {width} × {height} px\n"
+        if metadata is not None:
+            if metadata.format:
+                info_text += f"{get_text(self.current_language, 'info_format')} {metadata.format.upper()}\n"
+            if metadata.captured_ns >= 0:
+                captured = datetime.fromtimestamp(metadata.captured_ns / 1e9)
+                info_text += f"{get_text(self.current_language, 'info_captured')} {captured:%Y-%m-%d %H:%M:%S}\n"
+            if metadata.camera:
+                info_text += f"{get_text(self.current_language, 'info_camera')} {metadata.camera}\n"
+            if metadata.orientation != 1:
+                info_text += f"{get_text(self.current_language, 'info_orientation')} {metadata.orientation}\n"
         info_text += f"\n{get_text(self.current_language, 'info_current')} {self.current_index + 1} / {len(self.image_files)}"
         
         QMessageBox.information(
@@ -664,6 +1921,195 @@ class BeginViewWindow(QMainWindow):
             info_text,
         )
 
+    def _toggle_metrics_overlay(self) -> None:
+        """パフォーマンス情報の表示をトグル"""
+        self.show_metrics = not self.show_metrics
+        self.show_metrics_action.setChecked(self.show_metrics)
+        self._update_metrics_enabled()
+        if self.show_metrics:
+            self._update_metrics_overlay(None)
+            self.metrics_overlay.show()
+            self.metrics_overlay.raise_()
+        else:
+            self.metrics_overlay.hide()
+
+    def _toggle_metrics_log(self) -> None:
+        """
+        パフォーマンスログの記録を開始/停止
+
+        開始時は保存先を選ぶ。拡張子が .csv なら CSV、それ以外は JSON Lines で
+        追記し、一定のサイズでローテーションする（MetricsLog）。
+        """
+        if self._metrics_log is not None:
+            self._metrics_log.close()
+            self._metrics_log = None
+        else:
+            path, _ = QFileDialog.getSaveFileName(
+                self,
+                get_text(self.current_language, "dialog_metrics_log"),
+                str(get_cache_dir() / "metrics.csv"),
+                get_text(self.current_language, "filter_metrics_log"),
+                options=QFileDialog.Option.DontConfirmOverwrite,
+            )
+            if path:
+                try:
+                    self._metrics_log = MetricsLog(Path(path))
+                except OSError as e:
+                    print(f"Error opening metrics log: {e}")
+        self.metrics_log_action.setChecked(self._metrics_log is not None)
+        self._update_metrics_enabled()
+
+    def _update_metrics_enabled(self) -> None:
+        """情報の表示中かログの記録中だけ計測する（それ以外は計測箇所で何もしない）"""
+        enabled = self.show_metrics or self._metrics_log is not None
+        if enabled == self._metrics.enabled:
+            return
+        self._metrics.clear()
+        self._metrics.enabled = enabled
+        self._show_started = 0.0
+        self._last_slide_time = 0.0
+        if enabled:
+            cache = self._prefetcher.cache
+            self._cache_counts = (cache.hits, cache.misses)
+            self._metrics_timer.start()
+        else:
+            self._metrics_timer.stop()
+
+    def _sample_metrics(self) -> None:
+        """区間を締めて、ログに1行追記し、表示を更新する"""
+        # デコード済み画像のキャッシュはそれ自体が回数を数えているので、差分を加える
+        cache = self._prefetcher.cache
+        hits, misses = self._cache_counts
+        self._metrics.count("cache_hit", cache.hits - hits)
+        self._metrics.count("cache_miss", cache.misses - misses)
+        self._cache_counts = (cache.hits, cache.misses)
+
+        row = self._metrics_row(self._metrics.rotate())
+        if self._metrics_log is not None:
+            try:
+                self._metrics_log.write(row)
+            except OSError as e:
+                print(f"Error writing metrics log: {e}")
+                self._metrics_log.close()
+                self._metrics_log = None
+                self.metrics_log_action.setChecked(False)
+                self._update_metrics_enabled()
+        if self.show_metrics:
+            self._update_metrics_overlay(row)
+
+    def _metrics_row(self, interval: MetricsInterval) -> Dict[str, object]:
+        """
+        区間の集計と今の状態をログの1行にする
+
+        Args:
+            interval: 締めた区間の集計
+
+        Returns:
+            列名 → 値（列は常に同じ）
+        """
+        prefetch = self._prefetcher.stats()
+        slideshow = self._slideshow.stats()
+        row: Dict[str, object] = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "interval_s": round(interval.duration_s, 3),
+        }
+        row.update(latency_columns(interval, self.METRIC_LATENCIES))
+        for name in ("prefetch_hit", "prefetch_miss", "cache_hit", "cache_miss"):
+            row[name] = interval.counters.get(name, 0)
+        row.update(
+            reading=prefetch.reading,
+            decoding=prefetch.decoding,
+            decoded_bytes=self._prefetcher.cache.total_bytes,
+            buffered_bytes=prefetch.buffered_bytes,
+            rss_bytes=resident_memory(),
+            images=len(self.image_files),
+            playing=int(self.is_playing),
+            slide_interval_ms=self.slide_interval,
+            slides_shown=slideshow.shown,
+            slides_missed=slideshow.missed,
+            slides_skipped=slideshow.skipped,
+            slide_max_late_ms=round(slideshow.max_late_ms, 1),
+        )
+        return row
+
+    def _update_metrics_overlay(self, row: Optional[Dict[str, object]]) -> None:
+        """
+        パフォーマンス情報の表示を更新
+
+        所要時間とヒット率は直近の区間をまとめたもの、それ以外は集計した時点の
+        状態。
+
+        Args:
+            row: 最後に集計した行（まだ無ければ None）
+        """
+        lang = self.current_language
+        lines = [
+            get_text(lang, "metrics_header").format(
+                seconds=self._metrics.WINDOW * self.METRICS_SAMPLE_MS // 1000
+            )
+        ]
+        for name in self.METRIC_LATENCIES:
+            if name == "scan":
+                continue  # 直近の区間ではなく、最後のスキャンを表示する
+            label = get_text(lang, f"metrics_{name}")
+            histogram = self._metrics.recent_latency(name)
+            if not histogram.count:
+                lines.append(get_text(lang, "metrics_no_samples").format(label=label))
+                continue
+            lines.append(
+                get_text(lang, "metrics_latency").format(
+                    label=label,
+                    p50=histogram.percentile(0.5),
+                    p95=histogram.percentile(0.95),
+                    max=histogram.max_ms,
+                    count=histogram.count,
+                )
+            )
+        if self._last_scan is not None:
+            lines.append(
+                get_text(lang, "metrics_last_scan").format(
+                    label=get_text(lang, "metrics_scan"),
+                    ms=self._last_scan[0],
+                    count=self._last_scan[1],
+                )
+            )
+
+        def rate(hit: str, miss: str) -> str:
+            hits = self._metrics.recent_count(hit)
+            total = hits + self._metrics.recent_count(miss)
+            return f"{hits * 100 // total}% ({hits}/{total})" if total else "-"
+
+        lines.append(
+            get_text(lang, "metrics_hit_rate").format(
+                prefetch=rate("prefetch_hit", "prefetch_miss"),
+                cache=rate("cache_hit", "cache_miss"),
+            )
+        )
+        if row is not None:
+            mib = 1024 * 1024
+            lines.append(
+                get_text(lang, "metrics_queue").format(
+                    reading=row["reading"], decoding=row["decoding"]
+                )
+            )
+            lines.append(
+                get_text(lang, "metrics_memory").format(
+                    rss=row["rss_bytes"] // mib,
+                    decoded=row["decoded_bytes"] // mib,
+                    buffered=row["buffered_bytes"] // mib,
+                )
+            )
+            lines.append(
+                get_text(lang, "metrics_slideshow").format(
+                    interval=self.slide_interval,
+                    missed=row["slides_missed"],
+                    skipped=row["slides_skipped"],
+                    max_late=row["slide_max_late_ms"],
+                )
+            )
+        self.metrics_overlay.setText("\n".join(lines))
+        self.metrics_overlay.adjustSize()
+
     def _show_about(self) -> None:
         """Aboutダイアログを表示"""
         about_text = f"{get_text(self.current_language, 'about_title')}\n\n"
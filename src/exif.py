@@ -0,0 +1,263 @@
+"""
+BeginView - EXIF モジュール
+JPEG ファイルのヘッダから、埋め込みのプレビュー画像と向き、撮影情報を読み取る
+"""
+
+import struct
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+# EXIF の向き（1〜8）→（左右反転, 上下反転, その後に時計回りに90度回転）
+ORIENTATION_TRANSFORMS = {
+    1: (False, False, False),
+    2: (True, False, False),
+    3: (True, True, False),
+    4: (False, True, False),
+    5: (False, True, True),
+    6: (False, False, True),
+    7: (True, False, True),
+    8: (True, True, True),
+}
+
+# MP フォーマット（CIPA DC-007）の画像の種類のうち、プレビュー用のもの
+_MPF_PREVIEW_TYPES = (0x010001, 0x010002)  # VGA 相当, フル HD 相当
+
+# ヘッダを読むときのバッファサイズ（APP1 の最大長 64 KiB を1回で読める）
+_READ_BUFFER = 64 * 1024
+
+
+class EmbeddedPreview(NamedTuple):
+    """JPEG ファイルに埋め込まれたプレビュー"""
+
+    data: bytes  # プレビューの JPEG データ
+    width: int  # 元の画像の幅（ファイル上の向き）
+    height: int  # 元の画像の高さ（ファイル上の向き）
+    orientation: int  # EXIF の向き（1〜8。記録がなければ 1）
+
+
+class ExifInfo(NamedTuple):
+    """EXIF に記録された撮影情報"""
+
+    orientation: int  # 向き（1〜8。記録がなければ 1）
+    captured: str  # 撮影日時（"YYYY:MM:DD HH:MM:SS"。記録がなければ空）
+    make: str  # カメラのメーカー（記録がなければ空）
+    model: str  # カメラの機種（記録がなければ空）
+
+
+def read_embedded_preview(path: str) -> Optional[EmbeddedPreview]:
+    """
+    JPEG ファイルに埋め込まれたプレビューを読み取る
+
+    画像データの手前までのマーカーだけを読む。MP フォーマット（APP2）の
+    プレビュー画像があればそれを、なければ EXIF（APP1）のサムネイルを返す。
+    どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+
+    Returns:
+        プレビュー（JPEG でない場合や、埋め込まれていない場合は None）
+
+    Raises:
+        OSError: ファイルを読めない場合
+    """
+    with open(path, "rb", buffering=_READ_BUFFER) as f:
+        headers = _read_headers(f)
+        if headers is None:
+            return None
+        exif, mpf, size = headers
+
+        orientation = 1
+        thumbnail: Optional[bytes] = None
+        if exif is not None:
+            orientation, thumbnail = _parse_exif(exif)
+        data: Optional[bytes] = None
+        if mpf is not None:
+            data = _read_mpf_preview(f, *mpf)
+        if data is None:
+            data = thumbnail
+    if not data:
+        return None
+    return EmbeddedPreview(data, size[0], size[1], orientation)
+
+
+def read_exif_info(path: str) -> Optional[ExifInfo]:
+    """
+    JPEG ファイルの EXIF から撮影情報を読み取る
+
+    画像データの手前までのマーカーだけを読む。どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+
+    Returns:
+        撮影情報（JPEG でない場合や、EXIF がない場合は None）
+
+    Raises:
+        OSError: ファイルを読めない場合
+    """
+    with open(path, "rb", buffering=_READ_BUFFER) as f:
+        headers = _read_headers(f)
+    if headers is None or headers[0] is None:
+        return None
+    return _parse_exif_info(headers[0])
+
+
+def _read_headers(
+    f: BinaryIO,
+) -> Optional[Tuple[Optional[bytes], Optional[Tuple[int, bytes]], Tuple[int, int]]]:
+    """
+    JPEG の画像データの手前までのマーカーを読む
+
+    Returns:
+        （EXIF の TIFF 構造, (MPF の TIFF ヘッダの位置, データ), (幅, 高さ)）。
+        JPEG でない場合や、SOF より前に画像データが始まる場合は None
+    """
+    if f.read(2) != b"\xff\xd8":
+        return None
+    exif: Optional[bytes] = None
+    mpf: Optional[Tuple[int, bytes]] = None  # (TIFF ヘッダの位置, データ)
+    while True:
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        length = struct.unpack(">H", header[2:])[0] - 2
+        if marker == 0xDA or length < 0:  # SOS（画像データの開始）
+            return None
+        if marker == 0xE1 and exif is None:
+            payload = f.read(length)
+            if payload.startswith(b"Exif\x00\x00"):
+                exif = payload[6:]
+        elif marker == 0xE2 and mpf is None:
+            position = f.tell() + 4
+            payload = f.read(length)
+            if payload.startswith(b"MPF\x00"):
+                mpf = (position, payload[4:])
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            # SOFn（高さと幅）。ここまでに APP セグメントは出揃っている
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return exif, mpf, (width, height)
+        else:
+            f.seek(length, 1)
+
+
+def _parse_exif(tiff: bytes) -> Tuple[int, Optional[bytes]]:
+    """EXIF の TIFF 構造から（向き, サムネイルの JPEG データ）を取り出す"""
+    try:
+        endian = _endian(tiff)
+        ifd0 = struct.unpack_from(endian + "I", tiff, 4)[0]
+        orientation = 1
+        for tag, _, _, value in _ifd_entries(tiff, endian, ifd0):
+            if tag == 0x0112:
+                orientation = struct.unpack_from(endian + "H", value)[0]
+        count = struct.unpack_from(endian + "H", tiff, ifd0)[0]
+        ifd1 = struct.unpack_from(endian + "I", tiff, ifd0 + 2 + 12 * count)[0]
+        thumbnail: Optional[bytes] = None
+        if ifd1:
+            offset = length = 0
+            for tag, _, _, value in _ifd_entries(tiff, endian, ifd1):
+                if tag == 0x0201:
+                    offset = struct.unpack_from(endian + "I", value)[0]
+                elif tag == 0x0202:
+                    length = struct.unpack_from(endian + "I", value)[0]
+            if offset and length and offset + length <= len(tiff):
+                thumbnail = tiff[offset : offset + length]
+    except (struct.error, ValueError):
+        return 1, None
+    if orientation not in ORIENTATION_TRANSFORMS:
+        orientation = 1
+    return orientation, thumbnail
+
+
+def _parse_exif_info(tiff: bytes) -> Optional[ExifInfo]:
+    """EXIF の TIFF 構造から撮影情報を取り出す（壊れている場合は None）"""
+    try:
+        endian = _endian(tiff)
+        ifd0 = struct.unpack_from(endian + "I", tiff, 4)[0]
+        orientation = 1
+        make = model = ""
+        exif_ifd = 0
+        for tag, _, count, value in _ifd_entries(tiff, endian, ifd0):
+            if tag == 0x0112:
+                orientation = struct.unpack_from(endian + "H", value)[0]
+            elif tag == 0x010F:
+                make = _ascii(tiff, endian, count, value)
+            elif tag == 0x0110:
+                model = _ascii(tiff, endian, count, value)
+            elif tag == 0x8769:  # Exif IFD へのポインタ
+                exif_ifd = struct.unpack_from(endian + "I", value)[0]
+        original = digitized = ""
+        if exif_ifd:
+            for tag, _, count, value in _ifd_entries(tiff, endian, exif_ifd):
+                if tag == 0x9003:  # DateTimeOriginal
+                    original = _ascii(tiff, endian, count, value)
+                elif tag == 0x9004:  # DateTimeDigitized
+                    digitized = _ascii(tiff, endian, count, value)
+    except (struct.error, ValueError):
+        return None
+    if orientation not in ORIENTATION_TRANSFORMS:
+        orientation = 1
+    return ExifInfo(orientation, original or digitized, make, model)
+
+
+def _ascii(tiff: bytes, endian: str, count: int, value: bytes) -> str:
+    """ASCII 型の値（4バイト以下は値の欄に、それより長ければオフセットの先にある）"""
+    if count <= 4:
+        raw = value[:count]
+    else:
+        offset = struct.unpack_from(endian + "I", value)[0]
+        raw = tiff[offset : offset + count]
+    return raw.split(b"\x00", 1)[0].decode("utf-8", "replace").strip()
+
+
+def _read_mpf_preview(f: BinaryIO, position: int, tiff: bytes) -> Optional[bytes]:
+    """MP フォーマットの最も大きなプレビュー画像を読む（位置は TIFF ヘッダ基準）"""
+    try:
+        endian = _endian(tiff)
+        ifd = struct.unpack_from(endian + "I", tiff, 4)[0]
+        entries: List[Tuple[int, int]] = []  # (サイズ, オフセット)
+        for tag, _, count, value in _ifd_entries(tiff, endian, ifd):
+            if tag != 0xB002:  # MPEntry
+                continue
+            offset = struct.unpack_from(endian + "I", value)[0]
+            for i in range(count // 16):
+                attribute, size, data_offset = struct.unpack_from(
+                    endian + "III", tiff, offset + 16 * i
+                )
+                if attribute & 0xFFFFFF in _MPF_PREVIEW_TYPES and data_offset:
+                    entries.append((size, data_offset))
+    except (struct.error, ValueError):
+        return None
+    if not entries:
+        return None
+    size, offset = max(entries)
+    f.seek(position + offset)
+    data = f.read(size)
+    if len(data) != size or not data.startswith(b"\xff\xd8"):
+        return None
+    return data
+
+
+def _endian(tiff: bytes) -> str:
+    """TIFF ヘッダのバイト順（struct の書式文字）"""
+    if tiff[:4] == b"II*\x00":
+        return "<"
+    if tiff[:4] == b"MM\x00*":
+        return ">"
+    raise ValueError("not a TIFF header")
+
+
+def _ifd_entries(
+    tiff: bytes, endian: str, offset: int
+) -> List[Tuple[int, int, int, bytes]]:
+    """IFD のエントリ（タグ, 型, 個数, 値またはオフセットの4バイト）のリスト"""
+    count = struct.unpack_from(endian + "H", tiff, offset)[0]
+    entries = []
+    for i in range(count):
+        start = offset + 2 + 12 * i
+        tag, kind, number = struct.unpack_from(endian + "HHI", tiff, start)
+        entries.append((tag, kind, number, tiff[start + 8 : start + 12]))
+    return entries
@@ -0,0 +1,224 @@
+"""
+BeginView - フォルダインデックスモジュール
+フォルダの列挙結果をキャッシュディレクトリに保存し、次回以降は変更された
+ディレクトリだけを列挙し直す
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Set
+
+from PySide6.QtCore import QStandardPaths
+
+
+class FileRecord(NamedTuple):
+    """ディレクトリ内の画像ファイル1件分の情報"""
+
+    name: str
+    size: int
+    mtime_ns: int
+
+
+class DirectoryListing(NamedTuple):
+    """1つのディレクトリの列挙結果"""
+
+    path: str  # ディレクトリの絶対パス
+    mtime_ns: int  # 列挙時点のディレクトリの更新日時（-1 は「次回必ず列挙し直す」）
+    files: List[FileRecord]  # 画像ファイル
+    subdirs: List[str]  # サブディレクトリ名
+
+    def image_paths(self) -> List[Path]:
+        """画像ファイルのパスのリストを返す"""
+        base = Path(self.path)
+        return [base / f.name for f in self.files]
+
+
+def get_cache_dir() -> Path:
+    """BeginView のキャッシュディレクトリを返す"""
+    location = QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.CacheLocation
+    )
+    if not location:
+        location = os.path.join(os.path.expanduser("~"), ".cache", "BeginView")
+    return Path(location)
+
+
+class FolderIndex:
+    """
+    フォルダの列挙結果を保持する永続インデックス
+
+    ルートフォルダとサブフォルダを含めるかどうかの組ごとに1ファイルとして
+    保存する。各ディレクトリの更新日時を記録しておき、再度開いたときには
+    ディレクトリの stat だけを行って、更新日時が変わったディレクトリのみを
+    列挙し直す。ファイル数ではなくディレクトリ数に比例する時間で済む。
+
+    ディレクトリの更新日時はファイルの追加・削除・名前変更で変わるが、
+    既存ファイルの上書きでは変わらない点に注意。
+    """
+
+    FORMAT_VERSION = 1
+    # 保存時点からこの時間内に更新されたディレクトリは、更新日時の分解能の
+    # 都合で変更を見逃す可能性があるため、次回は必ず列挙し直す
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(
+        self, root: Path, include_subfolders: bool, extensions: Set[str]
+    ) -> None:
+        """
+        空のインデックスを作成
+
+        Args:
+            root: ルートフォルダ
+            include_subfolders: サブフォルダを含めるかどうか
+            extensions: 対象とする拡張子
+        """
+        self.root = str(root)
+        self.include_subfolders = include_subfolders
+        self.extensions = set(extensions)
+        self.directories: Dict[str, DirectoryListing] = {}
+        self._previous: Dict[str, DirectoryListing] = {}
+        self.reused_count = 0  # キャッシュをそのまま使えたディレクトリ数
+        self.relisted_count = 0  # 列挙し直したディレクトリ数
+
+    def cache_file(self) -> Path:
+        """このインデックスの保存先ファイル"""
+        key = f"{self.root}|{int(self.include_subfolders)}"
+        digest = hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()
+        return get_cache_dir() / "folder_index" / f"{digest}.json"
+
+    def metadata_file(self) -> Path:
+        """このインデックスのファイルのメタデータの保存先ファイル"""
+        return self.cache_file().with_suffix(".metadata.json")
+
+    @classmethod
+    def load(
+        cls, root: Path, include_subfolders: bool, extensions: Set[str]
+    ) -> "FolderIndex":
+        """
+        保存済みのインデックスを読み込む
+
+        保存されていない場合や形式が合わない場合は空のインデックスを返す。
+
+        Args:
+            root: ルートフォルダ
+            include_subfolders: サブフォルダを含めるかどうか
+            extensions: 対象とする拡張子
+
+        Returns:
+            読み込んだインデックス
+        """
+        index = cls(root, include_subfolders, extensions)
+        try:
+            with open(index.cache_file(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+
+        if (
+            data.get("version") != cls.FORMAT_VERSION
+            or data.get("root") != index.root
+            or data.get("include_subfolders") != include_subfolders
+            or set(data.get("extensions", [])) != index.extensions
+        ):
+            return index
+
+        try:
+            for rel, (mtime_ns, files, subdirs) in data["directories"].items():
+                path = index._abs_path(rel)
+                index._previous[path] = DirectoryListing(
+                    path,
+                    mtime_ns,
+                    [FileRecord(*f) for f in files],
+                    subdirs,
+                )
+        except (KeyError, TypeError, ValueError):
+            index._previous = {}
+        return index
+
+    def save(self) -> None:
+        """インデックスをキャッシュディレクトリに保存（一時ファイル経由で置き換える）"""
+        racy_after = time.time_ns() - self.RACY_WINDOW_NS
+        directories = {}
+        for path, listing in self.directories.items():
+            mtime_ns = listing.mtime_ns if listing.mtime_ns < racy_after else -1
+            directories[self._rel_path(path)] = [
+                mtime_ns,
+                [list(f) for f in listing.files],
+                listing.subdirs,
+            ]
+        data = {
+            "version": self.FORMAT_VERSION,
+            "root": self.root,
+            "include_subfolders": self.include_subfolders,
+            "extensions": sorted(self.extensions),
+            "directories": directories,
+        }
+
+        path = self.cache_file()
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # キャッシュの保存に失敗しても動作には影響しない
+            print(f"Error saving folder index {path}: {e}")
+
+    def make_lister(
+        self, list_fn: Callable[[str], DirectoryListing]
+    ) -> Callable[[str], DirectoryListing]:
+        """
+        保存済みの結果を再利用するディレクトリ列挙関数を作成
+
+        返される関数はスレッドプールから並列に呼ばれる。更新日時が保存時と
+        同じディレクトリはキャッシュを返し、それ以外は list_fn で列挙し直す。
+
+        Args:
+            list_fn: 実際にディレクトリを列挙する関数
+
+        Returns:
+            ディレクトリ列挙関数
+        """
+        previous = self._previous
+
+        def lister(path: str) -> DirectoryListing:
+            cached = previous.get(path)
+            if cached is not None and cached.mtime_ns >= 0:
+                if os.stat(path).st_mtime_ns == cached.mtime_ns:
+                    return cached
+            return list_fn(path)
+
+        return lister
+
+    def add(self, listing: DirectoryListing) -> None:
+        """
+        走査で得たディレクトリの列挙結果を登録
+
+        Args:
+            listing: ディレクトリの列挙結果
+        """
+        self.directories[listing.path] = listing
+        if self._previous.get(listing.path) is listing:
+            self.reused_count += 1
+        else:
+            self.relisted_count += 1
+
+    def is_modified(self) -> bool:
+        """前回保存した内容から変化があったかどうか"""
+        return self.relisted_count > 0 or len(self.directories) != len(
+            self._previous
+        )
+
+    def _abs_path(self, rel: str) -> str:
+        """保存用の相対パスを絶対パスに戻す"""
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def _rel_path(self, path: str) -> str:
+        """絶対パスを保存用の相対パスに変換（ルートは空文字列）"""
+        if path == self.root:
+            return ""
+        return path[len(os.path.join(self.root, "")):]
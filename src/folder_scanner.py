@@ -0,0 +1,328 @@
+"""
+BeginView - フォルダスキャンモジュール
+画像ファイルの列挙をバックグラウンドスレッドで行い、結果をバッチ単位で通知する
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Deque, Iterator, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from folder_index import DirectoryListing, FileRecord, FolderIndex
+from playlist import Playlist, SortOrder, natural_sort_key
+from tracing import traced
+
+# 並列に列挙するディレクトリ数の既定値（I/O 待ちが主なので CPU 数より多めにする）
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+@traced("list directory", "scan")
+def list_directory(directory: str, extensions: Set[str]) -> DirectoryListing:
+    """
+    1つのディレクトリを os.scandir で列挙する
+
+    種別の判定には DirEntry が持つ情報を再利用する。サイズと更新日時は
+    画像ファイルについてのみ DirEntry.stat() で取得する（Windows では
+    列挙時に取得済みのため追加の I/O は発生しない）。
+
+    Args:
+        directory: 列挙するディレクトリ
+        extensions: 対象とする拡張子
+
+    Returns:
+        ディレクトリの列挙結果
+    """
+    mtime_ns = os.stat(directory).st_mtime_ns
+    files: List[FileRecord] = []
+    subdirs: List[str] = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    # Path.rglob と同様、シンボリックリンク先のフォルダには入らない
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                elif (
+                    os.path.splitext(entry.name)[1].lower() in extensions
+                    and entry.is_file()
+                ):
+                    st = entry.stat()
+                    files.append(FileRecord(entry.name, st.st_size, st.st_mtime_ns))
+            except OSError:
+                continue
+    return DirectoryListing(directory, mtime_ns, files, subdirs)
+
+
+def walk_directories(
+    folder: Path,
+    include_subfolders: bool,
+    lister: Callable[[str], DirectoryListing],
+    should_stop: Optional[Callable[[], bool]] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[DirectoryListing]:
+    """
+    フォルダを走査し、ディレクトリごとの列挙結果を返す
+
+    サブフォルダはスレッドプールに分散して並列に列挙するため、ネットワーク
+    ドライブのように1回のディレクトリ読み込みの遅延が大きい環境でも、
+    待ち時間が重なって全体の時間を短縮できる。
+
+    Args:
+        folder: 検索するフォルダ
+        include_subfolders: サブフォルダも再帰的に検索するかどうか
+        lister: 1つのディレクトリを列挙する関数（スレッドプールから呼ばれる）
+        should_stop: True を返したら列挙を打ち切る関数
+        max_workers: 並列に列挙するディレクトリ数の上限
+
+    Yields:
+        ディレクトリごとの列挙結果（順序は不定）
+    """
+    # ルートの読み込みに失敗した場合は例外をそのまま呼び出し側へ伝える
+    listing = lister(str(folder))
+    yield listing
+    if not include_subfolders or not listing.subdirs:
+        return
+
+    workers = max_workers or DEFAULT_SCAN_WORKERS
+    queue: Deque[str] = deque(os.path.join(listing.path, d) for d in listing.subdirs)
+    running: Set[Future] = set()
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="beginview-scan"
+    ) as executor:
+        try:
+            while queue or running:
+                if should_stop is not None and should_stop():
+                    return
+
+                # 実行中の件数をワーカー数の数倍に抑え、キューに積みすぎない
+                while queue and len(running) < workers * 2:
+                    running.add(executor.submit(lister, queue.popleft()))
+
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        listing = future.result()
+                    except OSError:
+                        # アクセスできないサブフォルダは Path.rglob と同様に無視する
+                        continue
+                    queue.extend(os.path.join(listing.path, d) for d in listing.subdirs)
+                    yield listing
+        finally:
+            for future in running:
+                future.cancel()
+
+
+def iter_image_batches(
+    folder: Path,
+    include_subfolders: bool,
+    extensions: Set[str],
+    should_stop: Optional[Callable[[], bool]] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[List[Path]]:
+    """
+    フォルダ内の画像ファイルをディレクトリ単位で列挙する
+
+    Args:
+        folder: 検索するフォルダ
+        include_subfolders: サブフォルダも再帰的に検索するかどうか
+        extensions: 対象とする拡張子（小文字、ドット付き）
+        should_stop: True を返したら列挙を打ち切る関数
+        max_workers: 並列に列挙するディレクトリ数の上限
+
+    Yields:
+        ディレクトリごとの画像ファイルのリスト（ディレクトリの順序は不定。
+        決定的な順序が必要な場合は呼び出し側でソートする）
+    """
+    extensions = set(extensions)
+    for listing in walk_directories(
+        folder,
+        include_subfolders,
+        lambda d: list_directory(d, extensions),
+        should_stop=should_stop,
+        max_workers=max_workers,
+    ):
+        if listing.files:
+            yield listing.image_paths()
+
+
+def scan_image_files(
+    folder: Path,
+    include_subfolders: bool,
+    extensions: Set[str],
+    max_workers: Optional[int] = None,
+) -> List[Path]:
+    """
+    フォルダ内の画像ファイルをすべて列挙し、決定的な順序で返す
+
+    Args:
+        folder: 検索するフォルダ
+        include_subfolders: サブフォルダも再帰的に検索するかどうか
+        extensions: 対象とする拡張子
+        max_workers: 並列に列挙するディレクトリ数の上限
+
+    Returns:
+        image_sort_key 順に並んだ画像ファイルのリスト
+    """
+    files: List[Path] = []
+    for batch in iter_image_batches(
+        folder, include_subfolders, extensions, max_workers=max_workers
+    ):
+        files.extend(batch)
+    files.sort(key=image_sort_key)
+    return files
+
+
+def image_sort_key(path: Path) -> Tuple[bytes, str]:
+    """
+    画像リストのソートキー（Playlist の表示順と同じ）
+
+    ファイル名の自然順で並べ、同名のファイルはディレクトリの順で順序を
+    確定させる。
+
+    Args:
+        path: 画像ファイルのパス
+
+    Returns:
+        ソートキー
+    """
+    return natural_sort_key(path.name), str(path.parent)
+
+
+class FolderScanWorker(QObject):
+    """
+    画像ファイルの列挙を行うワーカー
+
+    QThread に moveToThread して run() を呼び出す。保存済みのフォルダ
+    インデックスがあれば、更新されたディレクトリだけを列挙し直す。
+    見つかった画像はこのスレッドで Playlist にソートしながら追加し、その
+    複製を playlist_ready で少しずつ通知する。ウィンドウは最初の画像が
+    見つかった時点で表示を開始でき、受け取った Playlist に差し替えるだけで
+    済む（GUI スレッドでソートしない）。各シグナルには scan_id を付けて
+    送るので、受信側は古いスキャンの結果を無視できる。
+
+    フォルダを読めずにスキャンが失敗した場合は failed でエラーを通知し、
+    finished には False を送る（フォルダインデックスは保存しない）。
+    """
+
+    # 最初のバッチ以降、最低この件数が溜まるまでは送らない
+    MIN_BATCH_SIZE = 256
+    # 件数が溜まらなくても、この秒数が経過したら送る
+    MAX_BATCH_DELAY = 0.25
+
+    playlist_ready = Signal(int, object)  # scan_id, それまでに見つかった Playlist
+    progress = Signal(int, int)  # scan_id, 見つかった画像数
+    finished = Signal(int, bool)  # scan_id, 最後まで完了したか（中止・失敗時は False）
+    failed = Signal(int, str)  # scan_id, エラーメッセージ
+    index_ready = Signal(int, object)  # scan_id, 完了したスキャンの FolderIndex
+
+    def __init__(
+        self,
+        scan_id: int,
+        folder: Path,
+        include_subfolders: bool,
+        extensions: Set[str],
+        sort_order: SortOrder = SortOrder.NAME,
+    ) -> None:
+        """
+        ワーカーを初期化
+
+        Args:
+            scan_id: このスキャンの識別番号
+            folder: 検索するフォルダ
+            include_subfolders: サブフォルダも再帰的に検索するかどうか
+            extensions: 対象とする拡張子
+            sort_order: Playlist の並び順（スキャン中に変更してもよく、次の
+                通知から反映される）
+        """
+        super().__init__()
+        self.scan_id = scan_id
+        self.folder = folder
+        self.include_subfolders = include_subfolders
+        self.extensions = set(extensions)
+        self.sort_order = sort_order
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """スキャンの中止を要求（どのスレッドから呼んでもよい）"""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        """中止が要求されているかどうか"""
+        return self._cancel_event.is_set()
+
+    @Slot()
+    @traced("folder scan", "scan")
+    def run(self) -> None:
+        """スキャンを実行し、見つかったファイルをバッチ単位で通知する"""
+        playlist = Playlist(self.sort_order)
+        pending: List[DirectoryListing] = []
+        pending_count = 0
+        total = 0
+        last_emit = time.monotonic()
+        error: Optional[str] = None
+
+        try:
+            index = FolderIndex.load(
+                self.folder, self.include_subfolders, self.extensions
+            )
+            lister = index.make_lister(
+                lambda d: list_directory(d, self.extensions)
+            )
+            for listing in walk_directories(
+                self.folder,
+                self.include_subfolders,
+                lister,
+                should_stop=self.is_cancelled,
+            ):
+                if self.is_cancelled():
+                    break
+
+                index.add(listing)
+                if not listing.files:
+                    continue
+                pending.append(listing)
+                pending_count += len(listing.files)
+
+                # 最初のバッチはすぐに送り、以降はバッチサイズを送信済み件数に応じて
+                # 大きくしていく（ソート/マージと複製の回数を対数に抑えるため）
+                now = time.monotonic()
+                batch_size = max(self.MIN_BATCH_SIZE, total)
+                if (
+                    total == 0
+                    or pending_count >= batch_size
+                    or now - last_emit >= self.MAX_BATCH_DELAY
+                ):
+                    total += pending_count
+                    playlist.set_sort_order(self.sort_order)
+                    playlist.add_listings(pending)
+                    self.playlist_ready.emit(self.scan_id, playlist.copy())
+                    self.progress.emit(self.scan_id, total)
+                    pending = []
+                    pending_count = 0
+                    last_emit = now
+
+            # 途中でキャンセルされた不完全な結果は保存しない
+            if not self.is_cancelled():
+                if index.is_modified():
+                    index.save()
+                self.index_ready.emit(self.scan_id, index)
+        except OSError as e:
+            # アクセスできないフォルダなど（本番ではロガーを使う）
+            print(f"Error scanning folder {self.folder}: {e}")
+            error = str(e)
+            self.failed.emit(self.scan_id, error)
+
+        if pending and not self.is_cancelled():
+            total += pending_count
+            playlist.set_sort_order(self.sort_order)
+            playlist.add_listings(pending)
+            self.playlist_ready.emit(self.scan_id, playlist)
+            self.progress.emit(self.scan_id, total)
+
+        self.finished.emit(self.scan_id, error is None and not self.is_cancelled())
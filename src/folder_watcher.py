@@ -0,0 +1,227 @@
+"""
+BeginView - フォルダ監視モジュール
+QFileSystemWatcher でディレクトリの変更を監視し、画像の追加・削除を差分として通知する
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from folder_index import DirectoryListing, FolderIndex
+from folder_scanner import list_directory, walk_directories
+from tracing import traced
+
+
+class FolderWatcher(QObject):
+    """
+    フォルダインデックスに含まれるディレクトリを監視する
+
+    変更通知を受けたディレクトリだけを列挙し直し、インデックスと比較して
+    追加・削除された画像を changes_ready で通知する（全体の再スキャンは行わない）。
+    大量コピーなどで通知が連続した場合は、DEBOUNCE_MS の間隔でまとめて
+    処理する。ただし最初の通知から MAX_DELAY_MS 以上は待たせない。
+
+    インデックスは監視中はこのクラスが所有し、列挙用のワーカースレッド
+    からのみ更新する。監視を開始した時点では、インデックス作成後（または
+    前回の監視停止後）の変更を拾うため、全ディレクトリの更新日時を確認して
+    変わったものだけを列挙し直す。
+    """
+
+    DEBOUNCE_MS = 300
+    MAX_DELAY_MS = 2000
+
+    # 追加された画像（ディレクトリごとの DirectoryListing。files は追加分のみ）,
+    # 削除された画像（List[Path]）
+    changes_ready = Signal(list, list)
+
+    # ワーカースレッドからの結果受け渡し用
+    _relist_done = Signal(object)
+
+    def __init__(self, index: FolderIndex, parent: Optional[QObject] = None) -> None:
+        """
+        監視を開始
+
+        Args:
+            index: 監視対象のフォルダインデックス（完了したスキャンのもの）
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self._index = index
+        self._dirty: Set[str] = set()
+        self._first_dirty_time: Optional[float] = None
+        self._busy = True  # 開始時の確認が終わるまでは変更を溜めておく
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="beginview-watch"
+        )
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._relist_done.connect(self._on_relist_done)
+        self._add_watches(list(index.directories))
+        self._executor.submit(self._revalidate)
+
+    def stop(self) -> None:
+        """監視を停止"""
+        self._stopped = True
+        self._flush_timer.stop()
+        directories = self._watcher.directories()
+        if directories:
+            self._watcher.removePaths(directories)
+        # インデックスを再利用できるよう、実行中の処理の完了を待つ
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _add_watches(self, directories: List[str]) -> None:
+        """ディレクトリを監視対象に追加"""
+        if not directories:
+            return
+        failed = self._watcher.addPaths(directories)
+        if failed:
+            # inotify の監視数上限などで登録できなかったもの（本番ではロガーを使う）
+            print(f"Failed to watch {len(failed)} directories")
+
+    def _on_directory_changed(self, path: str) -> None:
+        """
+        ディレクトリの変更通知を受け取り、まとめて処理するよう予約する
+
+        Args:
+            path: 変更されたディレクトリ
+        """
+        self._dirty.add(path)
+        now = time.monotonic()
+        if self._first_dirty_time is None:
+            self._first_dirty_time = now
+        elapsed_ms = (now - self._first_dirty_time) * 1000
+        delay_ms = max(0, min(self.DEBOUNCE_MS, self.MAX_DELAY_MS - elapsed_ms))
+        self._flush_timer.start(int(delay_ms))
+
+    def _flush(self) -> None:
+        """溜まった変更をワーカースレッドで処理"""
+        if self._busy or not self._dirty:
+            return  # 処理中の場合は完了後に改めて処理する
+        dirty = self._dirty
+        self._dirty = set()
+        self._first_dirty_time = None
+        self._busy = True
+        self._executor.submit(self._relist, dirty)
+
+    def _revalidate(self) -> None:
+        """更新日時が変わったディレクトリを列挙し直す（ワーカースレッド）"""
+        dirty = set()
+        for path, listing in list(self._index.directories.items()):
+            if self._stopped:
+                return
+            try:
+                if os.stat(path).st_mtime_ns != listing.mtime_ns:
+                    dirty.add(path)
+            except OSError:
+                dirty.add(path)
+        self._relist(dirty)
+
+    @traced("rescan", "scan")
+    def _relist(self, dirty: Set[str]) -> None:
+        """
+        変更されたディレクトリを列挙し直して差分を求める（ワーカースレッド）
+
+        Args:
+            dirty: 変更されたディレクトリ
+        """
+        added: List[DirectoryListing] = []
+        removed: List[Path] = []
+        new_dirs: List[str] = []
+        gone_dirs: List[str] = []
+        index = self._index
+
+        for path in sorted(dirty):
+            if self._stopped:
+                return
+            old = index.directories.get(path)
+            if old is None:
+                continue  # 削除済みのサブツリーに含まれていた
+
+            try:
+                listing = list_directory(path, index.extensions)
+            except OSError:
+                # ディレクトリ自体が削除された
+                self._remove_tree(path, removed, gone_dirs)
+                continue
+
+            index.directories[path] = listing
+            old_names = {f.name for f in old.files}
+            new_names = {f.name for f in listing.files}
+            removed.extend(Path(path, name) for name in old_names - new_names)
+            added_files = [f for f in listing.files if f.name not in old_names]
+            if added_files:
+                added.append(listing._replace(files=added_files))
+
+            if not index.include_subfolders:
+                continue
+            old_subdirs = set(old.subdirs)
+            new_subdirs = set(listing.subdirs)
+            for name in old_subdirs - new_subdirs:
+                self._remove_tree(os.path.join(path, name), removed, gone_dirs)
+            for name in new_subdirs - old_subdirs:
+                try:
+                    for sub in walk_directories(
+                        Path(path, name),
+                        True,
+                        lambda d: list_directory(d, index.extensions),
+                    ):
+                        index.directories[sub.path] = sub
+                        added.append(sub)
+                        new_dirs.append(sub.path)
+                except OSError:
+                    continue  # 作成直後に削除された
+
+        if not self._stopped:
+            self._relist_done.emit((added, removed, new_dirs, gone_dirs))
+
+    def _remove_tree(
+        self, path: str, removed: List[Path], gone_dirs: List[str]
+    ) -> None:
+        """
+        ディレクトリとその配下をインデックスから取り除く（ワーカースレッド）
+
+        Args:
+            path: 削除されたディレクトリ
+            removed: 削除された画像の追加先
+            gone_dirs: 削除されたディレクトリの追加先
+        """
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            listing = self._index.directories.pop(current, None)
+            if listing is None:
+                continue
+            removed.extend(listing.image_paths())
+            gone_dirs.append(current)
+            stack.extend(os.path.join(current, d) for d in listing.subdirs)
+
+    def _on_relist_done(
+        self,
+        result: Tuple[List[DirectoryListing], List[Path], List[str], List[str]],
+    ) -> None:
+        """ワーカースレッドの処理結果を反映して通知"""
+        added, removed, new_dirs, gone_dirs = result
+        self._busy = False
+
+        self._add_watches(new_dirs)
+        watched = set(self._watcher.directories())
+        stale = [d for d in gone_dirs if d in watched]
+        if stale:
+            self._watcher.removePaths(stale)
+
+        if added or removed:
+            self.changes_ready.emit(added, removed)
+
+        # 処理中に届いた変更があれば続けて処理する
+        if self._dirty and not self._flush_timer.isActive():
+            self._flush_timer.start(self.DEBOUNCE_MS)
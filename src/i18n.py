@@ -18,6 +18,8 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "msg_no_images_body": "このフォルダには画像ファイルがありません。",
         "msg_error_loading_title": "エラー",
         "msg_error_loading_body": "画像の読み込み中にエラーが発生しました: {filename}",
+        "msg_scan_failed_title": "エラー",
+        "msg_scan_failed_body": "フォルダを読み込めませんでした: {error}",
         "menu_settings": "設定(&S)",
         "menu_interval": "スライドショー間隔(&I)",
         "menu_interval_1s": "1秒",
@@ -40,6 +42,10 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "info_filename": "ファイル名:",
         "info_size": "サイズ:",
         "info_dimensions": "解像度:",
+        "info_format": "形式:",
+        "info_captured": "撮影日時:",
+        "info_camera": "カメラ:",
+        "info_orientation": "EXIF の向き:",
         "info_current": "現在:",
         "info_total": "合計:",
         "menu_about": "BeginViewについて(&A)",
@@ -48,6 +54,43 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "about_copyright": "© 2025 tensarestudio",
         "about_built_with": "Built with Python + PySide6",
         "about_language": "日本語/英語対応",
+        "menu_cancel_scan": "スキャンを中止(&C)",
+        "status_scanning": "スキャン中... {count:,} 枚",
+        "status_scan_done": "{count:,} 枚の画像を読み込みました",
+        "status_scan_cancelled": "スキャンを中止しました（{count:,} 枚）",
+        "status_scan_failed": "スキャン中にエラーが発生しました（{count:,} 枚）",
+        "status_no_readable_images": "読み込める画像がありません",
+        "button_cancel": "キャンセル",
+        "menu_watch_folder": "フォルダの変更を監視(&W)",
+        "menu_skip_late_slides": "間に合わない画像は飛ばす(&K)",
+        "menu_sort": "並び順(&S)",
+        "menu_sort_name": "ファイル名(&N)",
+        "menu_sort_directory": "フォルダ→ファイル名(&D)",
+        "menu_sort_modified": "更新日時(&M)",
+        "menu_sort_size": "ファイルサイズ(&Z)",
+        "menu_sort_captured": "撮影日時(&C)",
+        "menu_shuffle": "シャッフル(&R)",
+        "menu_show_metrics": "パフォーマンス情報を表示(&P)",
+        "menu_metrics_log": "パフォーマンスログを記録(&G)...",
+        "dialog_metrics_log": "パフォーマンスログの保存先",
+        "filter_metrics_log": "CSV (*.csv);;JSON Lines (*.jsonl)",
+        "metrics_header": "直近 {seconds} 秒",
+        "metrics_show": "切り替え",
+        "metrics_read": "読み込み",
+        "metrics_decode": "デコード",
+        "metrics_scale": "縮小",
+        "metrics_render": "描画",
+        "metrics_prepare": "スライド準備",
+        "metrics_tick": "締め切り処理",
+        "metrics_slide": "スライド間隔",
+        "metrics_scan": "スキャン",
+        "metrics_latency": "{label}: p50 {p50:.1f} ms / p95 {p95:.1f} ms / 最大 {max:.1f} ms（{count} 回）",
+        "metrics_no_samples": "{label}: -",
+        "metrics_last_scan": "{label}: {ms:,.0f} ms（{count:,} 枚）",
+        "metrics_hit_rate": "先読みヒット率: {prefetch} / キャッシュヒット率: {cache}",
+        "metrics_queue": "キュー: 読み込み {reading} / デコード {decoding}",
+        "metrics_memory": "メモリ: {rss:,} MB（デコード済み {decoded:,} MB / 読み込み済み {buffered:,} MB）",
+        "metrics_slideshow": "設定間隔 {interval} ms / 遅れ {missed} 回（最大 {max_late:.0f} ms）/ 飛ばし {skipped} 枚",
     },
     "en": {
         "app_title": "BeginView",
@@ -61,6 +104,8 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "msg_no_images_body": "No image files were found in this folder.",
         "msg_error_loading_title": "Error",
         "msg_error_loading_body": "An error occurred while loading the image: {filename}",
+        "msg_scan_failed_title": "Error",
+        "msg_scan_failed_body": "Could not read the folder: {error}",
         "menu_settings": "Settings(&S)",
         "menu_interval": "Slide Show Interval(&I)",
         "menu_interval_1s": "1 second",
@@ -83,6 +128,10 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "info_filename": "Filename:",
         "info_size": "Size:",
         "info_dimensions": "Dimensions:",
+        "info_format": "Format:",
+        "info_captured": "Captured:",
+        "info_camera": "Camera:",
+        "info_orientation": "EXIF Orientation:",
         "info_current": "Current:",
         "info_total": "Total:",
         "menu_about": "About BeginView(&A)",
@@ -91,6 +140,43 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "about_copyright": "© 2025 tensarestudio",
         "about_built_with": "Built with Python + PySide6",
         "about_language": "Japanese/English support",
+        "menu_cancel_scan": "Cancel Scan(&C)",
+        "status_scanning": "Scanning... {count:,} images",
+        "status_scan_done": "Loaded {count:,} images",
+        "status_scan_cancelled": "Scan cancelled ({count:,} images)",
+        "status_scan_failed": "Scan stopped by an error ({count:,} images)",
+        "status_no_readable_images": "No readable images",
+        "button_cancel": "Cancel",
+        "menu_watch_folder": "Watch Folder for Changes(&W)",
+        "menu_skip_late_slides": "Skip Slides That Aren't Ready(&K)",
+        "menu_sort": "Sort By(&S)",
+        "menu_sort_name": "File Name(&N)",
+        "menu_sort_directory": "Folder, then File Name(&D)",
+        "menu_sort_modified": "Date Modified(&M)",
+        "menu_sort_size": "File Size(&Z)",
+        "menu_sort_captured": "Date Taken(&C)",
+        "menu_shuffle": "Shuffle(&R)",
+        "menu_show_metrics": "Show Performance Info(&P)",
+        "menu_metrics_log": "Record Performance Log(&G)...",
+        "dialog_metrics_log": "Save Performance Log As",
+        "filter_metrics_log": "CSV (*.csv);;JSON Lines (*.jsonl)",
+        "metrics_header": "Last {seconds} s",
+        "metrics_show": "Switch",
+        "metrics_read": "Read",
+        "metrics_decode": "Decode",
+        "metrics_scale": "Scale",
+        "metrics_render": "Render",
+        "metrics_prepare": "Slide prepare",
+        "metrics_tick": "Deadline tick",
+        "metrics_slide": "Slide interval",
+        "metrics_scan": "Scan",
+        "metrics_latency": "{label}: p50 {p50:.1f} ms / p95 {p95:.1f} ms / max {max:.1f} ms ({count}x)",
+        "metrics_no_samples": "{label}: -",
+        "metrics_last_scan": "{label}: {ms:,.0f} ms ({count:,} images)",
+        "metrics_hit_rate": "Prefetch hit rate: {prefetch} / Cache hit rate: {cache}",
+        "metrics_queue": "Queue: read {reading} / decode {decoding}",
+        "metrics_memory": "Memory: {rss:,} MB (decoded {decoded:,} MB / read {buffered:,} MB)",
+        "metrics_slideshow": "Interval {interval} ms / late {missed}x (max {max_late:.0f} ms) / skipped {skipped}",
     },
 }
 
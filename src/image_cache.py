@@ -0,0 +1,122 @@
+"""
+BeginView - 画像キャッシュモジュール
+メモリ使用量（バイト数）の上限付きで、最近使われた画像を保持する
+"""
+
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class ByteLRUCache(Generic[V]):
+    """
+    バイト数の上限を持つ LRU キャッシュ
+
+    件数ではなく各要素のバイト数の合計で上限を管理するため、画像の大きさが
+    まちまちでもメモリ使用量が一定に保たれる。上限を超えた場合は最も長く
+    使われていないものから追い出す。ただし追加した直後の要素は、それ単体で
+    上限を超えていても保持する（表示中の画像を失わないため）。
+
+    ヒット・ミス・追い出しの回数を記録する。スレッドセーフではないので、
+    GUI スレッドからのみ使う。
+    """
+
+    def __init__(self, budget_bytes: int) -> None:
+        """
+        空のキャッシュを作成
+
+        Args:
+            budget_bytes: 保持するバイト数の上限
+        """
+        self._items: "OrderedDict[Hashable, Tuple[V, int]]" = OrderedDict()
+        self._budget_bytes = budget_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def budget_bytes(self) -> int:
+        """保持するバイト数の上限"""
+        return self._budget_bytes
+
+    @budget_bytes.setter
+    def budget_bytes(self, value: int) -> None:
+        self._budget_bytes = value
+        self._evict()
+
+    def __len__(self) -> int:
+        """保持している要素数"""
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """キーが含まれているかどうか（使用順は更新しない）"""
+        return key in self._items
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        値を取り出し、最近使われたものとして扱う
+
+        Args:
+            key: キー
+
+        Returns:
+            値（含まれていない場合は None）
+        """
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key: Hashable, value: V, nbytes: int) -> None:
+        """
+        値を追加（同じキーがあれば置き換える）し、上限を超えた分を追い出す
+
+        Args:
+            key: キー
+            value: 値
+            nbytes: 値のバイト数
+        """
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        self._items[key] = (value, nbytes)
+        self.total_bytes += nbytes
+        self._evict()
+
+    def touch(self, key: Hashable) -> None:
+        """
+        ヒット数を変えずに、最近使われたものとして扱う
+
+        Args:
+            key: キー（含まれていない場合は何もしない）
+        """
+        if key in self._items:
+            self._items.move_to_end(key)
+
+    def discard(self, key: Hashable) -> None:
+        """
+        値を取り除く
+
+        Args:
+            key: キー（含まれていない場合は何もしない）
+        """
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.total_bytes -= item[1]
+
+    def clear(self) -> None:
+        """すべての値を取り除く（統計は残す）"""
+        self._items.clear()
+        self.total_bytes = 0
+
+    def _evict(self) -> None:
+        """上限を超えた分を古いものから追い出す（最新の1件は残す）"""
+        while self.total_bytes > self._budget_bytes and len(self._items) > 1:
+            _, (_, nbytes) = self._items.popitem(last=False)
+            self.total_bytes -= nbytes
+            self.evictions += 1
@@ -0,0 +1,937 @@
+"""
+BeginView - 画像読み込みモジュール
+画像のデコードをスレッドプールで先読みし、GUI スレッドでは表示用の変換だけを行う
+"""
+
+import os
+import time
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from PySide6.QtCore import (
+    QBuffer,
+    QByteArray,
+    QIODevice,
+    QObject,
+    QRect,
+    QRunnable,
+    QSize,
+    Qt,
+    QThread,
+    QThreadPool,
+    Signal,
+    SignalInstance,
+)
+from PySide6.QtGui import QImage, QImageIOHandler, QImageReader, QTransform
+
+from bad_files import BadFileRegistry
+from exif import ORIENTATION_TRANSFORMS, read_embedded_preview
+from image_cache import ByteLRUCache
+from metrics import PerformanceMetrics
+from preview_cache import PreviewCache
+from tracing import traced
+
+if TYPE_CHECKING:
+    from process_decoder import ProcessDecodeJob, ProcessDecoder
+
+# 画像のキャッシュキー（パス, 更新日時 ns, 最大幅, 最大高さ）。更新日時が
+# 変わったファイルは別物として扱う。最大サイズが 0 の場合は元の解像度
+ImageKey = Tuple[str, int, int, int]
+
+# 縮小してデコードした画像に、元のサイズ（"幅x高さ"）を記録するテキストキー
+_ORIGINAL_SIZE_TEXT = "BeginView.OriginalSize"
+
+# これより画素数の多い画像は元の解像度ではデコードしない（RGB32 で 256 MiB。
+# QImageReader の既定の割り当て上限と同じで、これを超えると読み込めない）
+LARGE_IMAGE_PIXELS = 64 * 1024 * 1024
+# 巨大な画像を元の解像度の代わりにデコードする最大サイズ（縦横とも）
+LARGE_PREVIEW_SIZE = 4096
+
+
+class ImageFormatError(ValueError):
+    """
+    ファイルは読めたが、画像として解釈できない（形式が未対応、データが壊れて
+    いるなど）
+
+    ファイルを開けない・読めない失敗（ネットワークの切断やアクセス権の変更
+    など）は一時的なこともあるので、これとは区別する。
+    """
+
+
+class PrefetchStats(NamedTuple):
+    """ImagePrefetcher の各段階の状況"""
+
+    reading: int  # 読み込み待ちまたは読み込み中のファイル数
+    decoding: int  # デコード待ちまたはデコード中の画像数
+    buffered_files: int  # 読み込み済みでメモリに保持しているファイル数
+    buffered_bytes: int  # 読み込み済みのファイルの合計バイト数
+    bytes_read: int  # これまでに読み込んだ合計バイト数
+
+
+@traced("read", "io")
+def read_file(path: str) -> QByteArray:
+    """
+    ファイル全体をメモリに読み込む
+
+    ファイルサイズ分の領域に1回の大きな読み込みで読む（バッファリングしない）。
+    ネットワーク上のファイルでも往復の回数が少なくて済む。どのスレッドから
+    呼んでもよい。
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        ファイルの内容
+
+    Raises:
+        OSError: 読み込みに失敗した場合
+    """
+    with open(path, "rb", buffering=0) as f:
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        view = memoryview(data)
+        filled = 0
+        while filled < len(data):
+            count = f.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+        view.release()
+    del data[filled:]
+    return QByteArray(data)
+
+
+@traced("decode")
+def decode_image(
+    path: str, max_size: Optional[QSize] = None, data: Optional[QByteArray] = None
+) -> QImage:
+    """
+    画像ファイルをデコードし、表示用の形式に変換する
+
+    max_size を指定した場合、それより大きな画像は QImageReader.setScaledSize
+    で縮小しながらデコードする。JPEG では libjpeg の DCT 領域での縮小が
+    使われるため、元の解像度でデコードしてから縮小するより速く、メモリも
+    少なくて済む。
+
+    画素数が LARGE_IMAGE_PIXELS を超える画像は、max_size を省略しても
+    LARGE_PREVIEW_SIZE までに縮小する。拡大表示に必要な部分は decode_region
+    で読む。
+
+    EXIF の向きは縮小した後の画像に適用する。max_size や元のサイズは向きを
+    適用した後の縦横で扱う。
+
+    data を指定した場合はファイルを開かずに、読み込み済みの内容からデコード
+    する（path はエラーメッセージにのみ使う）。
+
+    QPixmap.fromImage がピクセル形式の変換をせずに済むよう、不透明な画像は
+    RGB32、透過のある画像は ARGB32_Premultiplied に変換しておく。
+    どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+        max_size: デコード後の最大サイズ（省略時は元の解像度。ただし巨大な
+            画像は LARGE_PREVIEW_SIZE）
+        data: read_file で読み込んだファイルの内容（省略時は path から読む）
+
+    Returns:
+        デコードした画像（縮小した場合は is_reduced が True を返す）
+
+    Raises:
+        ImageFormatError: 画像として解釈できない場合
+        ValueError: ファイルを読めない場合
+    """
+    buffer = None
+    if data is not None:
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader, size = _open_reader(path if buffer is None else buffer)
+    original_size = QSize()
+    if max_size is None and is_large(size):
+        max_size = QSize(LARGE_PREVIEW_SIZE, LARGE_PREVIEW_SIZE)
+    if max_size is not None:
+        if size.isValid() and (
+            size.width() > max_size.width() or size.height() > max_size.height()
+        ):
+            original_size = size
+            scaled = size.scaled(max_size, Qt.AspectRatioMode.KeepAspectRatio)
+            # setScaledSize は向きを適用する前の縦横で指定する
+            if _rotates(reader.transformation()):
+                scaled = scaled.transposed()
+            reader.setScaledSize(scaled)
+    image = reader.read()
+    if image.isNull():
+        raise _load_error(path, reader)
+
+    image = _to_display_format(image)
+    if original_size.isValid():
+        _set_original_size(image, original_size)
+    return image
+
+
+@traced("decode preview")
+def decode_preview(
+    path: str,
+    max_size: QSize,
+    disk_cache: Optional[PreviewCache],
+    data: Optional[QByteArray] = None,
+) -> QImage:
+    """
+    縮小した画像を、ディスクキャッシュにあればそこから、なければ元のファイル
+    からデコードする
+
+    元のファイルからデコードして縮小した場合は、ディスクキャッシュに保存する
+    （元の画像が max_size に収まる場合は保存しない）。どのスレッドから呼んでも
+    よい。
+
+    Args:
+        path: 画像ファイルのパス
+        max_size: デコード後の最大サイズ
+        disk_cache: プレビューのディスクキャッシュ（None の場合は使わない）
+        data: read_file で読み込んだファイルの内容（省略時は path から読む）
+
+    Returns:
+        デコードした画像
+
+    Raises:
+        ValueError: 読み込みに失敗した場合
+    """
+    if disk_cache is not None:
+        cached = disk_cache.get(path, max_size)
+        if cached is not None:
+            image, size = cached
+            image = _to_display_format(image)
+            _set_original_size(image, size)
+            return image
+
+    image = decode_image(path, max_size, data)
+    if disk_cache is not None and is_reduced(image):
+        disk_cache.put(path, max_size, image, original_size(image))
+    return image
+
+
+def _read_ahead(
+    path: str, max_size: Optional[QSize], disk_cache: Optional[PreviewCache]
+) -> QByteArray:
+    """
+    デコードに使うファイルの内容を読み込む
+
+    縮小した画像がディスクキャッシュにある場合は元のファイルを読まずに、
+    空のデータを返す（デコードの段階でディスクキャッシュから読む）。
+    """
+    if (
+        max_size is not None
+        and disk_cache is not None
+        and disk_cache.contains(path, max_size)
+    ):
+        return QByteArray()
+    return read_file(path)
+
+
+@traced("embedded preview")
+def decode_embedded_preview(path: str) -> QImage:
+    """
+    JPEG ファイルに埋め込まれたプレビューをデコードする
+
+    本体のデコードを待つ間に表示するためのもの。ヘッダだけを読むので速い。
+    EXIF の向きを適用し、元のサイズ（向きを適用した後）を記録するので、
+    is_reduced は True を返す。どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+
+    Returns:
+        プレビューの画像
+
+    Raises:
+        ValueError: プレビューが埋め込まれていない場合や、読み込みに失敗した場合
+    """
+    try:
+        preview = read_embedded_preview(path)
+    except OSError as e:
+        raise ValueError(f"Failed to read {path}: {e}") from e
+    if preview is None:
+        raise ValueError(f"No embedded preview: {path}")
+    image = QImage.fromData(preview.data)
+    if image.isNull():
+        raise ValueError(f"Failed to load embedded preview: {path}")
+
+    mirror, flip, rotate = ORIENTATION_TRANSFORMS[preview.orientation]
+    if mirror or flip:
+        image = image.mirrored(mirror, flip)
+    if rotate:
+        image = image.transformed(QTransform().rotate(90))
+    size = QSize(preview.width, preview.height)
+    image = _to_display_format(image)
+    _set_original_size(image, size.transposed() if rotate else size)
+    return image
+
+
+@traced("thumbnail")
+def decode_thumbnail(path: str, disk_cache: Optional[PreviewCache]) -> QImage:
+    """
+    本体のデコードを待つ間に表示する小さな画像をデコードする
+
+    ディスクキャッシュにサムネイルがあればそれを、なければ JPEG ファイルに
+    埋め込まれたプレビューを読む。どちらも元のサイズを記録するので、
+    is_reduced は True を返す。どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+        disk_cache: プレビューのディスクキャッシュ（None の場合は使わない）
+
+    Returns:
+        サムネイルかプレビューの画像
+
+    Raises:
+        ValueError: どちらも無い場合や、読み込みに失敗した場合
+    """
+    if disk_cache is not None:
+        cached = disk_cache.thumbnail(path)
+        if cached is not None:
+            image, size = cached
+            image = _to_display_format(image)
+            _set_original_size(image, size)
+            return image
+    return decode_embedded_preview(path)
+
+
+def _open_reader(source: Union[str, QIODevice]) -> Tuple[QImageReader, QSize]:
+    """
+    EXIF の向きを適用して読み込む QImageReader を作る
+
+    Args:
+        source: ファイルのパス、または内容を読み出せるデバイス
+
+    Returns:
+        （QImageReader, 向きを適用した後の元の画像のサイズ）。サイズは
+        ヘッダのみから読む（読めない場合は無効なサイズ）
+    """
+    reader = QImageReader(source)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and _rotates(reader.transformation()):
+        size = size.transposed()
+    return reader, size
+
+
+def _load_error(path: str, reader: QImageReader) -> ValueError:
+    """QImageReader.read() の失敗を、画像として解釈できないかどうかで分けた例外"""
+    message = f"Failed to load image: {path} ({reader.errorString()})"
+    if reader.error() in (
+        QImageReader.ImageReaderError.UnsupportedFormatError,
+        QImageReader.ImageReaderError.InvalidDataError,
+    ):
+        return ImageFormatError(message)
+    return ValueError(message)
+
+
+def _rotates(transformation: QImageIOHandler.Transformation) -> bool:
+    """向きの適用で縦横が入れ替わるかどうか"""
+    return bool(transformation & QImageIOHandler.Transformation.TransformationRotate90)
+
+
+def _set_original_size(image: QImage, size: QSize) -> None:
+    """縮小してデコードした画像に元のサイズを記録する"""
+    image.setText(_ORIGINAL_SIZE_TEXT, f"{size.width()}x{size.height()}")
+
+
+@traced("warm preview")
+def warm_preview(path: str, max_size: QSize, disk_cache: PreviewCache) -> QImage:
+    """
+    プレビューがディスクキャッシュになければ作って保存する
+
+    元の画像が max_size に収まる場合は縮小しないので何もしない。作った画像は
+    使わないので空の画像を返す。
+    """
+    _, size = _open_reader(path)
+    if size.isValid() and (
+        size.width() <= max_size.width() and size.height() <= max_size.height()
+    ):
+        return QImage()
+    if not disk_cache.contains(path, max_size):
+        image = decode_image(path, max_size)
+        if is_reduced(image):
+            disk_cache.put(path, max_size, image, original_size(image))
+    return QImage()
+
+
+@traced("decode tile")
+def decode_region(path: str, rect: QRect, size: QSize) -> QImage:
+    """
+    画像ファイルの一部分だけをデコードする
+
+    QImageReader.setClipRect と setScaledSize を使い、rect の範囲を size に
+    縮小しながら読む。JPEG では範囲外の列や縮小で捨てる画素を展開しない
+    ため、巨大な画像でも読み込むサイズに応じたメモリしか使わない。
+    どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+        rect: 読み込む範囲（EXIF の向きを適用した元の解像度での座標）
+        size: デコード後のサイズ
+
+    Returns:
+        デコードした画像
+
+    Raises:
+        ValueError: 読み込みに失敗した場合
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    # setClipRect と setScaledSize は向きを適用する前の座標で指定する
+    transformation = reader.transformation()
+    if transformation != QImageIOHandler.Transformation.TransformationNone:
+        rect = _file_rect(rect, transformation, reader.size())
+        if _rotates(transformation):
+            size = size.transposed()
+    reader.setClipRect(rect)
+    reader.setScaledSize(size)
+    image = reader.read()
+    if image.isNull():
+        raise _load_error(path, reader)
+    return _to_display_format(image)
+
+
+def _file_rect(
+    rect: QRect, transformation: QImageIOHandler.Transformation, file_size: QSize
+) -> QRect:
+    """
+    向きを適用した後の画像上の範囲を、ファイル上の範囲に変換する
+
+    Qt は左右・上下の反転の後に時計回りに90度回転する。その逆をたどる。
+    """
+    x, y, width, height = rect.x(), rect.y(), rect.width(), rect.height()
+    if _rotates(transformation):
+        x, y, width, height = y, file_size.height() - x - width, height, width
+    if transformation & QImageIOHandler.Transformation.TransformationMirror:
+        x = file_size.width() - x - width
+    if transformation & QImageIOHandler.Transformation.TransformationFlip:
+        y = file_size.height() - y - height
+    return QRect(x, y, width, height)
+
+
+def _to_display_format(image: QImage) -> QImage:
+    """QPixmap への変換や描画で形式の変換が要らないピクセル形式にする"""
+    if image.hasAlphaChannel():
+        display_format = QImage.Format.Format_ARGB32_Premultiplied
+    else:
+        display_format = QImage.Format.Format_RGB32
+    if image.format() != display_format:
+        image = image.convertToFormat(display_format)
+    return image
+
+
+def is_large(size: QSize) -> bool:
+    """
+    元の解像度ではデコードしない巨大な画像かどうか
+
+    Args:
+        size: 元の画像のサイズ
+
+    Returns:
+        画素数が LARGE_IMAGE_PIXELS を超える場合は True
+    """
+    return size.isValid() and size.width() * size.height() > LARGE_IMAGE_PIXELS
+
+
+def is_reduced(image: QImage) -> bool:
+    """
+    元の解像度より縮小してデコードされた画像かどうか
+
+    Args:
+        image: decode_image でデコードした画像
+
+    Returns:
+        縮小されている場合は True
+    """
+    return bool(image.text(_ORIGINAL_SIZE_TEXT))
+
+
+def original_size(image: QImage) -> QSize:
+    """
+    デコードした画像の元のサイズ
+
+    Args:
+        image: decode_image でデコードした画像
+
+    Returns:
+        縮小してデコードした場合は元のファイルのサイズ、そうでなければ
+        画像のサイズ
+    """
+    text = image.text(_ORIGINAL_SIZE_TEXT)
+    if not text:
+        return image.size()
+    width, height = text.split("x")
+    return QSize(int(width), int(height))
+
+
+def decode_thread_count() -> int:
+    """デコードに使う既定のスレッド数（GUI スレッドの分を1つ空けておく）"""
+    return max(1, min(4, QThread.idealThreadCount() - 1))
+
+
+class DecodeTask(QRunnable):
+    """
+    1つのデコード（またはファイルの読み込み）を行うタスク（スレッドプールで実行）
+
+    完了したら finished に（タスク, 結果, エラーメッセージ）を送る。失敗した
+    場合の結果は空の QImage。受け手は GUI スレッドのオブジェクトなので、
+    キュー経由で届く。処理にかかった時間は elapsed_ms に、失敗が
+    ImageFormatError（画像として解釈できない）だったかどうかは format_error
+    に記録する。
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        decode: Callable[[], object],
+        finished: SignalInstance,
+        priority: int = 0,
+    ) -> None:
+        """
+        タスクを作成
+
+        Args:
+            key: 結果を識別するキー
+            decode: 処理を行う関数（失敗したら例外を送出する）
+            finished: 結果を送るシグナル
+            priority: スレッドプールでの優先度（次の段階に引き継ぐために記録する）
+        """
+        super().__init__()
+        self.key = key
+        self.priority = priority
+        self.cancelled = False
+        self.elapsed_ms = 0.0
+        self.format_error = False
+        self._decode = decode
+        self._finished = finished
+
+    def run(self) -> None:
+        # 待機中に取り消されたもの（QThreadPool.tryTake は実行済みで削除された
+        # タスクに対して安全に呼べないため、フラグで取り消す）
+        if self.cancelled:
+            return
+        started = time.perf_counter()
+        try:
+            image = self._decode()
+            error = ""
+        except Exception as e:
+            image = QImage()
+            error = str(e)
+            self.format_error = isinstance(e, ImageFormatError)
+        self.elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self._finished.emit(self, image, error)
+
+
+class ImagePrefetcher(QObject):
+    """
+    表示中の画像の前後をスレッドプールでデコードしておく
+
+    request() に表示順の近い順（優先度の高い順）の画像を渡すと、まだ
+    デコードしていないものをスレッドプールに投入する。先頭ほど優先度が高い。
+    リストから外れた画像は待機中のタスクを取り消す（実行中のタスクは止め
+    られないため、完了後に結果を捨てる）。ユーザーが離れた位置へ移動した
+    場合も、古い範囲のデコードを待たずに済む。
+
+    ファイルの読み込みとデコードは別のスレッドプールで行う（2段階）。
+    読み込みの段階はファイル全体を1回の大きな読み込みでメモリに読み、
+    buffers（バイト数上限付きの LRU）に置く。デコードの段階はメモリ上の
+    内容からデコードする。ネットワーク上のファイルでも、読み込みを待つ間に
+    別の画像のデコードを進められる。各段階の状況は stats() で取得できる。
+
+    最大サイズを指定した場合は縮小しながらデコードする（ウィンドウに合わせて
+    表示する場合）。元の解像度の画像がキャッシュにあればそれを使う。
+
+    表示しようとしている画像（リストの先頭）のデコードが済んでいなければ、
+    ディスクキャッシュのサムネイルか JPEG に埋め込まれたプレビューを最優先で
+    読み、preview_ready で通知する。本体のデコードが完了するまでの間の表示に
+    使える。
+
+    process_decoder を渡した場合は、デコードを別プロセスで行う（スレッド
+    プールはサムネイルとプレビューにだけ使う）。ファイルの読み込みも各プロセスが
+    行うので、読み込みの段階は使わない。
+
+    縮小してデコードする画像は、disk_cache（プレビューのディスクキャッシュ）
+    があればそこから読み、なければデコードしてから保存する。warm_up() で
+    表示する予定の画像のプレビューを、先読みより低い優先度で作っておける。
+
+    bad_files（読み込めない画像の記録）を渡した場合は、デコードやプレビューの
+    作成で画像として解釈できなかった（ImageFormatError）画像を記録し、
+    デコードできたら記録から取り除く。ファイルを開けない・読めない失敗は
+    一時的なもの（ネットワークの切断など）もあるので記録しない。記録した
+    画像を飛ばすのは呼び出し側の役割。
+
+    metrics（パフォーマンスの計測）を渡した場合は、表示のための読み込みと
+    デコードにかかった時間を "read"・"decode" として記録する。
+
+    デコード済みの画像は、範囲から外れても cache（バイト数上限付きの LRU）
+    に残るため、直前に見た画像へ戻る場合はデコードし直さずに済む。
+    request() のたびに範囲内の画像を遠い順に使用済みとして扱うので、
+    上限に達した場合は範囲外の古いもの、範囲内の遠いものから追い出される。
+
+    GUI スレッドから使う。デコードが完了した画像は image_ready、失敗した
+    画像は image_failed で通知し、get() で取り出せる。
+    """
+
+    # デコード済みの画像のキャッシュの既定の上限（バイト数）
+    DEFAULT_CACHE_BUDGET = 512 * 1024 * 1024
+    # 読み込み済みのファイルの内容を保持する既定の上限（バイト数）
+    DEFAULT_READ_BUDGET = 128 * 1024 * 1024
+    # ファイルの読み込みに使う既定のスレッド数
+    DEFAULT_IO_THREADS = 2
+
+    image_ready = Signal(str, QImage)  # パス, デコードした画像
+    image_failed = Signal(str, str)  # パス, エラーメッセージ
+    preview_ready = Signal(str, QImage)  # パス, サムネイルかプレビュー
+
+    # ワーカースレッドからの結果受け渡し用（タスク, 画像, エラーメッセージ）
+    _decoded = Signal(object, QImage, str)
+    _read = Signal(object, object, str)  # 結果はファイルの内容（QByteArray）
+    _warmed = Signal(object, QImage, str)
+    _previewed = Signal(object, QImage, str)
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        cache_budget: int = DEFAULT_CACHE_BUDGET,
+        disk_cache: Optional[PreviewCache] = None,
+        io_threads: int = DEFAULT_IO_THREADS,
+        read_budget: int = DEFAULT_READ_BUDGET,
+        process_decoder: Optional["ProcessDecoder"] = None,
+        bad_files: Optional[BadFileRegistry] = None,
+        metrics: Optional[PerformanceMetrics] = None,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """
+        先読みを初期化
+
+        Args:
+            max_threads: デコードに使うスレッド数（省略時は CPU 数に応じて決める）
+            cache_budget: デコード済みの画像のキャッシュの上限（バイト数）
+            disk_cache: プレビューのディスクキャッシュ（省略時は使わない）
+            io_threads: ファイルの読み込みに使うスレッド数
+            read_budget: 読み込み済みのファイルの内容を保持する上限（バイト数）
+            process_decoder: デコードに使うプロセス（省略時はスレッドプールで
+                デコードする）。shutdown() で一緒に終了する
+            bad_files: 読み込めない画像の記録（省略時は記録しない）
+            metrics: パフォーマンスの計測（省略時は計測しない）
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        # スレッドの名前はタイムラインの記録（tracing）に使われる
+        self._pool = QThreadPool(self)
+        self._pool.setObjectName("beginview-decode")
+        self._pool.setMaxThreadCount(max_threads or decode_thread_count())
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setObjectName("beginview-read")
+        self._io_pool.setMaxThreadCount(max(1, io_threads))
+
+        self.cache: ByteLRUCache[QImage] = ByteLRUCache(cache_budget)
+        self.buffers: ByteLRUCache[QByteArray] = ByteLRUCache(read_budget)
+        self.disk_cache = disk_cache
+        self.bad_files = bad_files
+        self.metrics = metrics
+        self.bytes_read = 0
+        self._process_decoder = process_decoder
+        # 待機中または実行中
+        self._pending: Dict[ImageKey, Union[DecodeTask, "ProcessDecodeJob"]] = {}
+        self._reading: Set[ImageKey] = set()  # _pending のうち読み込みの段階のもの
+        self._warmup: Optional[Iterator[Tuple[Path, int]]] = None
+        self._warmup_size = QSize()
+        # 実行中のプレビューの作成 → 画像の更新日時 ns
+        self._warmup_tasks: Dict[Union[DecodeTask, "ProcessDecodeJob"], int] = {}
+        # 表示しようとしている画像のサムネイルかプレビューを読むタスク（完了後も
+        # 同じ画像について読み直さないよう残しておく）
+        self._preview_task: Optional[DecodeTask] = None
+        self._stopped = False
+        self._decoded.connect(self._on_decoded)
+        self._read.connect(self._on_read)
+        self._warmed.connect(self._on_warmed)
+        self._previewed.connect(self._on_previewed)
+
+    def request(
+        self, images: List[Tuple[Path, int]], max_size: Optional[QSize] = None
+    ) -> None:
+        """
+        デコードしておく画像を指定
+
+        Args:
+            images: （パス, 更新日時 ns）のリスト（優先度の高い順。先頭は
+                表示しようとしている画像）
+            max_size: デコード後の最大サイズ（省略時は元の解像度）
+        """
+        if self._stopped:
+            return
+        wanted: Dict[ImageKey, int] = {}
+        for i, (path, mtime_ns) in enumerate(images):
+            wanted.setdefault(self._key(path, mtime_ns, max_size), len(images) - i)
+
+        for key in list(self._pending):
+            if key not in wanted:
+                self._pending.pop(key).cancelled = True
+                self._reading.discard(key)
+
+        # 空いているスレッドがあれば投入した順に実行されるので、プレビューを先に
+        if images:
+            path, mtime_ns = images[0]
+            self._request_embedded_preview(
+                str(path), self._key(path, mtime_ns, max_size), len(images) + 1
+            )
+
+        # 遠いものから順に使用済みにして、近いものほど追い出されにくくする
+        for key in reversed(list(wanted)):
+            self.cache.touch(key)
+            self.cache.touch(self._full_key(key))
+            self.buffers.touch(key[:2])
+
+        for key, priority in wanted.items():
+            if (
+                key in self.cache
+                or self._full_key(key) in self.cache
+                or key in self._pending
+            ):
+                continue
+            if self._process_decoder is not None:
+                self._start_decode(key, priority, None)
+                continue
+            data = self.buffers.get(key[:2])
+            if data is not None:
+                self._start_decode(key, priority, data)
+                continue
+            path, _, width, height = key
+            task = DecodeTask(
+                key,
+                partial(
+                    _read_ahead,
+                    path,
+                    QSize(width, height) if width else None,
+                    self.disk_cache,
+                ),
+                self._read,
+                priority,
+            )
+            self._pending[key] = task
+            self._reading.add(key)
+            self._io_pool.start(task, priority)
+
+    def _start_decode(
+        self, key: ImageKey, priority: int, data: Optional[QByteArray]
+    ) -> None:
+        """
+        デコードの段階のタスクを投入
+
+        Args:
+            key: キャッシュキー
+            priority: 優先度
+            data: 読み込み済みのファイルの内容（None の場合はファイルから、
+                縮小する場合はディスクキャッシュから読む）
+        """
+        if self._process_decoder is not None:
+            self._pending[key] = self._process_decoder.decode(
+                key, self._decoded, priority
+            )
+            return
+        path, _, width, height = key
+        if width:
+            decode = partial(
+                decode_preview, path, QSize(width, height), self.disk_cache, data
+            )
+        else:
+            decode = partial(decode_image, path, None, data)
+        task = DecodeTask(key, decode, self._decoded, priority)
+        self._pending[key] = task
+        self._pool.start(task, priority)
+
+    def _request_embedded_preview(
+        self, path: str, key: ImageKey, priority: int
+    ) -> None:
+        """デコードが済んでいなければ、サムネイルかプレビューを先に読む"""
+        if self._preview_task is not None:
+            if self._preview_task.key == path:
+                return
+            self._preview_task.cancelled = True
+            self._preview_task = None
+        if key in self.cache or self._full_key(key) in self.cache:
+            return
+        task = DecodeTask(
+            path, partial(decode_thumbnail, path, self.disk_cache), self._previewed
+        )
+        self._preview_task = task
+        self._pool.start(task, priority)
+
+    def get(
+        self, path: Path, mtime_ns: int, max_size: Optional[QSize] = None
+    ) -> Optional[QImage]:
+        """
+        デコード済みの画像を返す
+
+        Args:
+            path: 画像のパス
+            mtime_ns: 画像の更新日時
+            max_size: request で指定した最大サイズ
+
+        Returns:
+            デコード済みの画像（まだ完了していない場合は None）。max_size を
+            指定した場合でも、元の解像度の画像があればそれを返す
+        """
+        key = self._key(path, mtime_ns, max_size)
+        full_key = self._full_key(key)
+        if full_key != key and full_key in self.cache:
+            return self.cache.get(full_key)
+        return self.cache.get(key)
+
+    @staticmethod
+    def _key(path: Path, mtime_ns: int, max_size: Optional[QSize]) -> ImageKey:
+        """キャッシュキーを作成"""
+        if max_size is None:
+            return str(path), mtime_ns, 0, 0
+        return str(path), mtime_ns, max_size.width(), max_size.height()
+
+    @staticmethod
+    def _full_key(key: ImageKey) -> ImageKey:
+        """同じ画像の元の解像度のキャッシュキー"""
+        return key[0], key[1], 0, 0
+
+    def warm_up(self, images: Iterable[Tuple[Path, int]], max_size: QSize) -> None:
+        """
+        ディスクキャッシュにまだないプレビューを作っておく
+
+        先読みより低い優先度で、スレッド数と同じ数ずつ順に投入する。前回の
+        warm_up で残っている分は取り消す。
+
+        Args:
+            images: （パス, 更新日時 ns）を順に返すもの（遅延評価でよい）
+            max_size: プレビューの最大サイズ
+        """
+        for task in self._warmup_tasks:
+            task.cancelled = True
+        self._warmup_tasks.clear()
+        if self._stopped or self.disk_cache is None:
+            self._warmup = None
+            return
+        self._warmup = iter(images)
+        self._warmup_size = QSize(max_size)
+        self._fill_warmup()
+
+    def stats(self) -> PrefetchStats:
+        """読み込みとデコードの各段階の状況"""
+        return PrefetchStats(
+            reading=len(self._reading),
+            decoding=len(self._pending) - len(self._reading),
+            buffered_files=len(self.buffers),
+            buffered_bytes=self.buffers.total_bytes,
+            bytes_read=self.bytes_read,
+        )
+
+    def shutdown(self) -> None:
+        """待機中のタスクを取り消し、実行中のタスクの完了を待つ"""
+        self._stopped = True
+        self._warmup = None
+        self._io_pool.clear()
+        self._pool.clear()
+        self._io_pool.waitForDone()
+        self._pool.waitForDone()
+        if self._process_decoder is not None:
+            self._process_decoder.shutdown()
+        self._pending.clear()
+        self._reading.clear()
+        self._warmup_tasks.clear()
+        self.cache.clear()
+        self.buffers.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def _fill_warmup(self) -> None:
+        """プレビューの作成をスレッド数（プロセス数）まで投入する"""
+        if self._process_decoder is not None:
+            limit = self._process_decoder.process_count
+        else:
+            limit = self._pool.maxThreadCount()
+        while self._warmup is not None and len(self._warmup_tasks) < limit:
+            try:
+                path, mtime_ns = next(self._warmup)
+            except StopIteration:
+                self._warmup = None
+                return
+            # 先読みのタスクを先に実行する（優先度 -1）
+            if self._process_decoder is not None:
+                job = self._process_decoder.warm(
+                    str(path), self._warmup_size, self._warmed
+                )
+                self._warmup_tasks[job] = mtime_ns
+                continue
+            task = DecodeTask(
+                str(path),
+                partial(warm_preview, str(path), self._warmup_size, self.disk_cache),
+                self._warmed,
+            )
+            self._warmup_tasks[task] = mtime_ns
+            self._pool.start(task, -1)
+
+    def _on_read(self, task: DecodeTask, data: object, error: str) -> None:
+        """ワーカースレッドで読み込んだファイルの内容を受け取り、デコードへ回す"""
+        key = task.key
+        if not error and data.size():
+            self.bytes_read += data.size()
+            self.buffers.put(key[:2], data, data.size())
+        if self._stopped or self._pending.get(key) is not task:
+            return  # 実行中に取り消された（先読みの範囲から外れた）
+        self._reading.discard(key)
+        if self.metrics is not None:
+            self.metrics.record("read", task.elapsed_ms)
+        if error:
+            del self._pending[key]
+            self.image_failed.emit(key[0], error)
+            return
+        self._start_decode(key, task.priority, data if data.size() else None)
+
+    def _on_previewed(self, task: DecodeTask, image: QImage, error: str) -> None:
+        """サムネイルかプレビューを受け取る（無かった場合は何もしない）"""
+        if self._stopped or task is not self._preview_task or error:
+            return
+        self.preview_ready.emit(task.key, image)
+
+    def _on_warmed(self, task: DecodeTask, image: QImage, error: str) -> None:
+        """
+        プレビューを1枚作り終えたら次を投入する
+
+        画像として解釈できなかった画像は読み込めない画像として記録し、表示の
+        順番が来てもデコードせずに飛ばせるようにする。
+        """
+        mtime_ns = self._warmup_tasks.pop(task, None)
+        if mtime_ns is None:
+            return  # 取り消された
+        if task.format_error and self.bad_files is not None:
+            self.bad_files.add(task.key, mtime_ns, error)
+        self._fill_warmup()
+
+    def _on_decoded(self, task: DecodeTask, image: QImage, error: str) -> None:
+        """ワーカースレッドのデコード結果を受け取る"""
+        key = task.key
+        if self._stopped or self._pending.get(key) is not task:
+            return  # 実行中に取り消された（先読みの範囲から外れた）
+        del self._pending[key]
+        if self.metrics is not None:
+            self.metrics.record("decode", task.elapsed_ms)
+        if error:
+            if task.format_error and self.bad_files is not None:
+                self.bad_files.add(key[0], key[1], error)
+            self.image_failed.emit(key[0], error)
+            return
+        if self.bad_files is not None:
+            self.bad_files.discard(key[0])
+        self.cache.put(key, image, image.sizeInBytes())
+        self.image_ready.emit(key[0], image)
@@ -0,0 +1,310 @@
+"""
+BeginView - 画像表示ウィジェットモジュール
+拡大縮小した画像を作らずに、描画時の変換で表示倍率と位置を反映する
+"""
+
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QPoint, QPointF, QRect, QRectF, QSize, Qt, Signal
+from PySide6.QtGui import (
+    QImage,
+    QMouseEvent,
+    QPainter,
+    QPaintEvent,
+    QPixmap,
+    QWheelEvent,
+)
+from PySide6.QtWidgets import QWidget
+
+from tracing import traced
+
+
+class ImageView(QWidget):
+    """
+    画像を任意の倍率で表示するウィジェット
+
+    元の Pixmap を倍率と表示位置の変換を掛けて描画し、ウィジェットに見えて
+    いる範囲だけを転送する。拡大しても拡大後の大きさの Pixmap を作らない
+    ため、倍率によらずメモリ使用量と描画時間は一定。
+
+    縮小表示では、補間なしの描画はちらつきが目立つため、呼び出し側で高品質に
+    縮小した Pixmap（rendition）を渡せる。渡された場合はそれを等倍で描画する。
+
+    倍率と表示位置は元の画像のサイズ（image_size）を基準にする。縮小して
+    デコードした Pixmap はそのサイズに引き伸ばして描画し、その上に元の画像の
+    一部分を高い解像度でデコードしたタイルを重ねて描画できる（巨大な画像）。
+
+    画像がウィジェットより大きい場合は左ドラッグで表示位置を移動できる。
+    ドラッグせずに離した場合は clicked を通知する。
+    """
+
+    clicked = Signal()  # 左クリック（ドラッグしなかった場合）
+    double_clicked = Signal()  # 左ダブルクリック
+    wheel_scrolled = Signal(int)  # ホイールの回転量（angleDelta().y()）
+    panned = Signal()  # ドラッグで表示位置が変わった
+
+    # この距離（ピクセル）以上動かしたらクリックではなくドラッグとみなす
+    DRAG_THRESHOLD = 4
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        """
+        空のビューを作成
+
+        Args:
+            parent: 親ウィジェット
+        """
+        super().__init__(parent)
+        self._pixmap: Optional[QPixmap] = None
+        self._rendition: Optional[QPixmap] = None
+        self._image_size = QSize()  # 元の画像のサイズ
+        self._tiles: List[Tuple[QRect, QImage]] = []
+        self._scale = 1.0
+        self._smooth = True
+        # ウィジェットの中心に表示する画像上の位置（画像の幅・高さに対する割合）
+        self._center = QPointF(0.5, 0.5)
+        self._text = ""
+        self._press_pos: Optional[QPoint] = None
+        self._dragging = False
+
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setMinimumSize(1, 1)
+
+    def pixmap(self) -> Optional[QPixmap]:
+        """表示中の画像"""
+        return self._pixmap
+
+    @traced("setPixmap", "paint")
+    def set_pixmap(
+        self,
+        pixmap: QPixmap,
+        keep_position: bool = False,
+        image_size: Optional[QSize] = None,
+    ) -> None:
+        """
+        表示する画像を設定
+
+        Args:
+            pixmap: 画像
+            keep_position: 表示位置を保つかどうか（同じ画像を別の解像度で
+                読み直した場合）。False の場合は画像の中央を表示する
+            image_size: 元の画像のサイズ（縮小してデコードした場合。省略時は
+                pixmap のサイズ）
+        """
+        self._pixmap = pixmap
+        self._image_size = QSize(image_size) if image_size else pixmap.size()
+        self._rendition = None
+        self._tiles = []
+        if not keep_position:
+            self._center = QPointF(0.5, 0.5)
+        self._clamp_center()
+        self._update_cursor()
+        self.update()
+
+    def set_zoom(
+        self, scale: float, smooth: bool = True, rendition: Optional[QPixmap] = None
+    ) -> None:
+        """
+        表示倍率を設定
+
+        Args:
+            scale: 元の画像（image_size）に対する表示倍率
+            smooth: 描画時にバイリニア補間を使うかどうか
+            rendition: scale 倍に縮小済みの画像（あればそれを等倍で描画する）
+        """
+        self._scale = scale
+        self._smooth = smooth
+        self._rendition = rendition
+        self._clamp_center()
+        self._update_cursor()
+        self.update()
+
+    def set_tiles(self, tiles: List[Tuple[QRect, QImage]]) -> None:
+        """
+        画像の上に重ねて描画するタイルを設定
+
+        Args:
+            tiles: （範囲（元の画像の座標）, 画像）のリスト。画像は範囲に
+                合わせて拡大縮小して描画する
+        """
+        if not tiles and not self._tiles:
+            return
+        self._tiles = tiles
+        self.update()
+
+    def visible_image_rect(self) -> QRectF:
+        """ウィジェットに見えている範囲（元の画像の座標）"""
+        if self._pixmap is None or self._pixmap.isNull() or self._scale <= 0:
+            return QRectF()
+        dx, dy = self._offset()
+        visible = QRectF(
+            -dx / self._scale,
+            -dy / self._scale,
+            self.width() / self._scale,
+            self.height() / self._scale,
+        )
+        return visible.intersected(
+            QRectF(0, 0, self._image_size.width(), self._image_size.height())
+        )
+
+    def clear(self) -> None:
+        """画像とテキストを消去"""
+        self._pixmap = None
+        self._rendition = None
+        self._tiles = []
+        self._text = ""
+        self._update_cursor()
+        self.update()
+
+    def setText(self, text: str) -> None:
+        """
+        画像が無いときに表示するテキストを設定
+
+        Args:
+            text: テキスト
+        """
+        self._text = text
+        self.update()
+
+    @traced("paintEvent", "paint")
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """見えている範囲の画像を変換を掛けて描画"""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+
+        if self._pixmap is None or self._pixmap.isNull():
+            if self._text:
+                painter.setPen(Qt.GlobalColor.lightGray)
+                painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self._text)
+            return
+
+        # 元の画像上の点 (x, y) → ウィジェット上の点 (x * scale + dx, y * scale + dy)
+        dx, dy = self._offset()
+        shown = QRectF(
+            dx,
+            dy,
+            self._image_size.width() * self._scale,
+            self._image_size.height() * self._scale,
+        )
+        target = shown.intersected(QRectF(event.rect()))
+        if target.isEmpty():
+            return
+
+        # 見えている範囲だけを Pixmap から切り出して転送する
+        source = self._rendition if self._rendition is not None else self._pixmap
+        scale_x = shown.width() / source.width()
+        scale_y = shown.height() / source.height()
+        source_rect = QRectF(
+            (target.x() - dx) / scale_x,
+            (target.y() - dy) / scale_y,
+            target.width() / scale_x,
+            target.height() / scale_y,
+        )
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self._smooth)
+        painter.drawPixmap(target, source, source_rect)
+
+        for rect, tile in self._tiles:
+            tile_target = QRectF(
+                dx + rect.x() * self._scale,
+                dy + rect.y() * self._scale,
+                rect.width() * self._scale,
+                rect.height() * self._scale,
+            )
+            if tile_target.intersects(target):
+                painter.drawImage(tile_target, tile, QRectF(tile.rect()))
+
+    def resizeEvent(self, event) -> None:
+        """サイズ変更後も表示位置が画像の外に出ないようにする"""
+        super().resizeEvent(event)
+        self._clamp_center()
+        self._update_cursor()
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:
+        """ドラッグまたはクリックの開始"""
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._press_pos = event.position().toPoint()
+            self._dragging = False
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        """ドラッグ中は表示位置を移動"""
+        if self._press_pos is None or not self._can_pan():
+            return
+        pos = event.position().toPoint()
+        delta = pos - self._press_pos
+        if not self._dragging:
+            if delta.manhattanLength() < self.DRAG_THRESHOLD:
+                return
+            self._dragging = True
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+        width = self._image_size.width() * self._scale
+        height = self._image_size.height() * self._scale
+        self._center = QPointF(
+            self._center.x() - delta.x() / width,
+            self._center.y() - delta.y() / height,
+        )
+        self._press_pos = pos
+        self._clamp_center()
+        self.update()
+        self.panned.emit()
+
+    def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+        """ドラッグしなかった場合はクリックとして通知"""
+        if event.button() == Qt.MouseButton.LeftButton and self._press_pos is not None:
+            was_dragging = self._dragging
+            self._press_pos = None
+            self._dragging = False
+            self._update_cursor()
+            if not was_dragging:
+                self.clicked.emit()
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event: QMouseEvent) -> None:
+        """ダブルクリックを通知"""
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.double_clicked.emit()
+
+    def wheelEvent(self, event: QWheelEvent) -> None:
+        """ホイールの回転量を通知"""
+        self.wheel_scrolled.emit(event.angleDelta().y())
+
+    def _offset(self) -> Tuple[float, float]:
+        """元の画像の左上の、ウィジェット上の位置"""
+        return (
+            self.width() / 2 - self._center.x() * self._image_size.width() * self._scale,
+            self.height() / 2
+            - self._center.y() * self._image_size.height() * self._scale,
+        )
+
+    def _can_pan(self) -> bool:
+        """画像がウィジェットからはみ出していて、表示位置を動かせるかどうか"""
+        if self._pixmap is None or self._pixmap.isNull():
+            return False
+        return (
+            self._image_size.width() * self._scale > self.width()
+            or self._image_size.height() * self._scale > self.height()
+        )
+
+    def _clamp_center(self) -> None:
+        """画像の外側が見えないよう表示位置を制限（はみ出さない方向は中央）"""
+        if self._pixmap is None or self._pixmap.isNull():
+            return
+        self._center = QPointF(
+            self._clamp_axis(self._center.x(), self._image_size.width(), self.width()),
+            self._clamp_axis(self._center.y(), self._image_size.height(), self.height()),
+        )
+
+    def _clamp_axis(self, center: float, image_length: int, view_length: int) -> float:
+        """1つの軸について表示位置を制限"""
+        shown = image_length * self._scale
+        if shown <= view_length:
+            return 0.5
+        half = view_length / 2 / shown
+        return min(max(center, half), 1.0 - half)
+
+    def _update_cursor(self) -> None:
+        """ドラッグで移動できる場合は手のカーソルにする"""
+        if self._can_pan():
+            self.setCursor(Qt.CursorShape.OpenHandCursor)
+        else:
+            self.unsetCursor()
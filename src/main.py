@@ -5,10 +5,14 @@ BeginView - シンプルな画像スライドショービューア
 
 import sys
 import os
+import argparse
+import multiprocessing
 from pathlib import Path
+from typing import List, Tuple
 from PySide6.QtWidgets import QApplication
 
 # 同じディレクトリからのインポート
+import tracing
 from beginview_window import BeginViewWindow
 
 # PyInstallerでビルドされた場合のパス解決
@@ -20,17 +24,60 @@ else:
     base_path = Path(__file__).parent
 
 
+def parse_args(argv: List[str]) -> Tuple[argparse.Namespace, List[str]]:
+    """
+    コマンドライン引数を解析
+
+    Args:
+        argv: sys.argv
+
+    Returns:
+        （BeginView の引数, Qt に渡す残りの引数）
+    """
+    parser = argparse.ArgumentParser(prog="BeginView")
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="OUT.json",
+        help="record a timeline of the image pipeline and write it on exit"
+        " (Chrome trace-event format for Perfetto or chrome://tracing)",
+    )
+    parser.add_argument(
+        "--trace-buffer",
+        type=int,
+        default=tracing.TraceRecorder.DEFAULT_CAPACITY,
+        metavar="SPANS",
+        help="number of most recent spans to keep (default: %(default)s)",
+    )
+    args, qt_args = parser.parse_known_args(argv[1:])
+    return args, argv[:1] + qt_args
+
+
 def main() -> None:
     """アプリケーションのメインエントリポイント"""
-    app = QApplication(sys.argv)
+    args, qt_argv = parse_args(sys.argv)
+    if args.trace is not None:
+        tracing.start(args.trace_buffer)
+
+    app = QApplication(qt_argv)
+    # キャッシュの保存先（QStandardPaths）に使われる
+    app.setApplicationName("BeginView")
     
     # メインウィンドウを作成して表示
     window = BeginViewWindow()
     window.show()
     
-    sys.exit(app.exec())
+    status = app.exec()
+    if args.trace is not None:
+        try:
+            tracing.recorder().save(args.trace)
+        except OSError as e:
+            print(f"Error writing trace {args.trace}: {e}")
+    sys.exit(status)
 
 
 if __name__ == "__main__":
+    # デコード用のプロセス（spawn）を exe から起動できるようにする
+    multiprocessing.freeze_support()
     main()
 
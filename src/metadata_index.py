@@ -0,0 +1,422 @@
+"""
+BeginView - メタデータインデックスモジュール
+画像のヘッダだけを読んでサイズ・形式・撮影情報を集め、列ごとの配列で保持する
+"""
+
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtGui import QImageReader
+
+from exif import ORIENTATION_TRANSFORMS, read_exif_info
+from playlist import Playlist
+from tracing import traced
+
+# 保存するファイルの形式の版（変えたら古いファイルは読み捨てる）
+METADATA_FORMAT_VERSION = 1
+# 保存するファイルの列（形式とカメラは strings の番号）
+_STORED_COLUMNS = (
+    "paths",
+    "sizes",
+    "mtimes",
+    "widths",
+    "heights",
+    "formats",
+    "captured",
+    "cameras",
+    "orientations",
+)
+
+
+class ImageMetadata(NamedTuple):
+    """画像のヘッダから読み取った情報"""
+
+    width: int  # 幅（EXIF の向きを適用した表示上の向き。読めなければ 0）
+    height: int  # 高さ（同上）
+    format: str  # 画像の形式（"jpeg", "png" など。読めなければ空）
+    captured_ns: int  # 撮影日時（ローカル時刻として解釈。記録がなければ -1）
+    camera: str  # カメラ（メーカーと機種。記録がなければ空）
+    orientation: int  # EXIF の向き（1〜8。記録がなければ 1）
+
+
+def read_metadata(path: str) -> ImageMetadata:
+    """
+    画像のヘッダだけを読んでメタデータを取り出す（画素はデコードしない）
+
+    サイズと形式は QImageReader で、撮影情報は JPEG の EXIF から読む。
+    どのスレッドから呼んでもよい。
+
+    Args:
+        path: 画像ファイルのパス
+
+    Returns:
+        メタデータ（読めなかった項目は既定値。画像として解釈できなければ
+        形式が空）
+
+    Raises:
+        OSError: ファイルを開けない・読めない場合（一時的なこともあるので、
+            画像として解釈できない場合と区別する）
+    """
+    reader = QImageReader(path)
+    size = reader.size()
+    image_format = bytes(reader.format().data()).decode("ascii", "replace")
+    if not image_format and reader.error() in (
+        QImageReader.ImageReaderError.FileNotFoundError,
+        QImageReader.ImageReaderError.DeviceError,
+    ):
+        raise OSError(f"Failed to read {path}: {reader.errorString()}")
+    try:
+        exif = read_exif_info(path) if image_format == "jpeg" else None
+    except OSError:
+        exif = None
+
+    width, height = max(0, size.width()), max(0, size.height())
+    if exif is None:
+        return ImageMetadata(width, height, image_format, -1, "", 1)
+    if ORIENTATION_TRANSFORMS[exif.orientation][2]:
+        width, height = height, width
+    camera = exif.model
+    if exif.make and not exif.model.lower().startswith(exif.make.lower().split()[0]):
+        camera = f"{exif.make} {exif.model}".strip()
+    return ImageMetadata(
+        width,
+        height,
+        image_format,
+        _parse_exif_datetime(exif.captured),
+        camera,
+        exif.orientation,
+    )
+
+
+def _parse_exif_datetime(value: str) -> int:
+    """EXIF の日時（"YYYY:MM:DD HH:MM:SS"）をローカル時刻として ns に変換（不正なら -1）"""
+    try:
+        return int(datetime.strptime(value, "%Y:%m:%d %H:%M:%S").timestamp()) * (
+            1_000_000_000
+        )
+    except (ValueError, OverflowError, OSError):
+        return -1
+
+
+class MetadataIndex:
+    """
+    Playlist のエントリごとのメタデータを、列ごとの配列で保持する
+
+    エントリ番号（Playlist.entry_id）をそのまま行番号に使うので、表示中の
+    画像の情報は O(1) で引ける。幅・高さ・撮影日時・向きは数値の配列に、
+    形式とカメラは文字列の表への番号として持つ（100万件で約 30 MB）。
+    並べ替えや絞り込みは列だけを見て行い、画像ファイルには触れない。
+
+    同じスキャンの Playlist のエントリ番号に対してだけ有効。別のフォルダを
+    開いたら clear() する。GUI スレッドから使う。
+    """
+
+    def __init__(self) -> None:
+        """空のインデックスを作成"""
+        self.clear()
+
+    def clear(self) -> None:
+        """すべての行を取り除く"""
+        self._known = bytearray()  # エントリ番号 → 読み取り済みなら 1
+        self._widths = array("I")
+        self._heights = array("I")
+        self._captured = array("q")
+        self._orientations = bytearray()
+        self._formats = array("H")  # → _strings の番号
+        self._cameras = array("H")  # → _strings の番号
+        self._strings: List[str] = [""]
+        self._string_ids: Dict[str, int] = {"": 0}
+
+    def __len__(self) -> int:
+        """読み取り済みのエントリ数"""
+        return sum(self._known)
+
+    def set(self, entry_id: int, metadata: ImageMetadata) -> None:
+        """
+        エントリのメタデータを登録
+
+        Args:
+            entry_id: エントリ番号
+            metadata: メタデータ
+        """
+        if entry_id >= len(self._known):
+            grow = entry_id + 1 - len(self._known)
+            self._known.extend(bytes(grow))
+            self._widths.extend(array("I", bytes(4 * grow)))
+            self._heights.extend(array("I", bytes(4 * grow)))
+            self._captured.extend(array("q", [-1]) * grow)
+            self._orientations.extend(b"\x01" * grow)
+            self._formats.extend(array("H", bytes(2 * grow)))
+            self._cameras.extend(array("H", bytes(2 * grow)))
+        self._known[entry_id] = 1
+        self._widths[entry_id] = metadata.width
+        self._heights[entry_id] = metadata.height
+        self._captured[entry_id] = metadata.captured_ns
+        self._orientations[entry_id] = metadata.orientation
+        self._formats[entry_id] = self._string_id(metadata.format)
+        self._cameras[entry_id] = self._string_id(metadata.camera)
+
+    def get(self, entry_id: int) -> Optional[ImageMetadata]:
+        """
+        エントリのメタデータを返す
+
+        Args:
+            entry_id: エントリ番号
+
+        Returns:
+            メタデータ（まだ読み取っていない場合は None）
+        """
+        if entry_id >= len(self._known) or not self._known[entry_id]:
+            return None
+        return ImageMetadata(
+            self._widths[entry_id],
+            self._heights[entry_id],
+            self._strings[self._formats[entry_id]],
+            self._captured[entry_id],
+            self._strings[self._cameras[entry_id]],
+            self._orientations[entry_id],
+        )
+
+    def captured_times(self) -> Iterator[Tuple[int, int]]:
+        """撮影日時が記録されているエントリの（エントリ番号, 撮影日時 ns）"""
+        for entry_id, captured in enumerate(self._captured):
+            if captured >= 0 and self._known[entry_id]:
+                yield entry_id, captured
+
+    def matching(self, predicate: Callable[[ImageMetadata], bool]) -> List[int]:
+        """
+        条件に合うエントリ番号のリスト（絞り込み用）
+
+        Args:
+            predicate: メタデータを受け取り、残すなら True を返す関数
+
+        Returns:
+            エントリ番号（昇順）
+        """
+        return [
+            entry_id
+            for entry_id in range(len(self._known))
+            if self._known[entry_id] and predicate(self.get(entry_id))
+        ]
+
+    def memory_usage(self) -> int:
+        """保持しているデータのおおよそのバイト数"""
+        total = len(self._known) + len(self._orientations)
+        for column in (
+            self._widths,
+            self._heights,
+            self._captured,
+            self._formats,
+            self._cameras,
+        ):
+            total += column.itemsize * len(column)
+        return total + sum(len(s) + 50 for s in self._strings)
+
+    def _string_id(self, value: str) -> int:
+        """文字列の表の番号を返す（無ければ追加する）"""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+
+# 保存済みのメタデータ（パス → (ファイルサイズ, 更新日時 ns, メタデータ)）
+_StoredMetadata = Dict[str, Tuple[int, int, ImageMetadata]]
+
+
+def load_metadata_file(path: Path, root: str) -> _StoredMetadata:
+    """
+    保存済みのメタデータを読み込む（無い場合や形式が合わない場合は空）
+
+    Args:
+        path: 保存先ファイル
+        root: パスの基準にするフォルダ（保存時と同じもの）
+
+    Returns:
+        パス → (ファイルサイズ, 更新日時 ns, メタデータ)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != METADATA_FORMAT_VERSION or data.get("root") != root:
+        return {}
+    try:
+        columns = [data[name] for name in _STORED_COLUMNS]
+        strings = data["strings"]
+        stored: _StoredMetadata = {}
+        for rel, size, mtime, width, height, fmt, captured, camera, orientation in zip(
+            *columns
+        ):
+            stored[os.path.join(root, rel)] = (
+                size,
+                mtime,
+                ImageMetadata(
+                    width, height, strings[fmt], captured, strings[camera], orientation
+                ),
+            )
+    except (KeyError, TypeError, ValueError, IndexError):
+        return {}
+    return stored
+
+
+def save_metadata_file(path: Path, root: str, stored: _StoredMetadata) -> None:
+    """
+    メタデータを列ごとのリストとして保存（一時ファイル経由で置き換える）
+
+    Args:
+        path: 保存先ファイル
+        root: パスの基準にするフォルダ
+        stored: パス → (ファイルサイズ, 更新日時 ns, メタデータ)
+    """
+    prefix = os.path.join(root, "")
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    columns: Dict[str, list] = {name: [] for name in _STORED_COLUMNS}
+    for file_path, (size, mtime, meta) in stored.items():
+        rel = file_path[len(prefix):] if file_path.startswith(prefix) else file_path
+        for name, value in zip(
+            _STORED_COLUMNS,
+            (
+                rel,
+                size,
+                mtime,
+                meta.width,
+                meta.height,
+                string_id(meta.format),
+                meta.captured_ns,
+                string_id(meta.camera),
+                meta.orientation,
+            ),
+        ):
+            columns[name].append(value)
+    data = {
+        "version": METADATA_FORMAT_VERSION,
+        "root": root,
+        "strings": strings,
+        **columns,
+    }
+
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # キャッシュの保存に失敗しても動作には影響しない
+        print(f"Error saving metadata {path}: {e}")
+
+
+class MetadataScanWorker(QObject):
+    """
+    プレイリストのすべての画像のメタデータを読み取るワーカー
+
+    QThread に moveToThread して run() を呼び出す。保存済みのメタデータの
+    うち、ファイルサイズと更新日時が変わっていないものはファイルを開かずに
+    使う。読み取った結果は（エントリ番号, メタデータ）のリストとして
+    metadata_ready で少しずつ通知し、最後まで読み取ったら保存する。
+    各シグナルには scan_id を付けて送るので、受信側は古いスキャンの結果を
+    無視できる。
+    """
+
+    # この件数が溜まるか、この秒数が経過したら送る
+    BATCH_SIZE = 512
+    MAX_BATCH_DELAY = 0.25
+
+    metadata_ready = Signal(int, object)  # scan_id, [(エントリ番号, メタデータ)]
+    finished = Signal(int, bool)  # scan_id, 最後まで完了したか
+
+    def __init__(
+        self,
+        scan_id: int,
+        playlist: Playlist,
+        root: str,
+        cache_file: Optional[Path] = None,
+    ) -> None:
+        """
+        ワーカーを初期化
+
+        Args:
+            scan_id: 画像リストのスキャンの識別番号
+            playlist: 読み取る画像（ワーカーで使う複製）
+            root: 保存するパスの基準にするフォルダ
+            cache_file: メタデータの保存先（省略時は保存も再利用もしない）
+        """
+        super().__init__()
+        self.scan_id = scan_id
+        self.playlist = playlist
+        self.root = root
+        self.cache_file = cache_file
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """読み取りの中止を要求（どのスレッドから呼んでもよい）"""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        """中止が要求されているかどうか"""
+        return self._cancel_event.is_set()
+
+    @Slot()
+    @traced("metadata scan", "scan")
+    def run(self) -> None:
+        """表示順にメタデータを読み取り、バッチ単位で通知する"""
+        previous = (
+            load_metadata_file(self.cache_file, self.root) if self.cache_file else {}
+        )
+        stored: _StoredMetadata = {}
+        read_count = 0
+        batch: List[Tuple[int, ImageMetadata]] = []
+        last_emit = time.monotonic()
+
+        for position in range(len(self.playlist)):
+            if self.is_cancelled():
+                break
+            entry_id = self.playlist.entry_id(position)
+            path = str(self.playlist.path_of(entry_id))
+            size = self.playlist.size_of(entry_id)
+            mtime_ns = self.playlist.mtime_of(entry_id)
+            cached = previous.get(path)
+            if cached is not None and cached[:2] == (size, mtime_ns):
+                metadata = cached[2]
+            else:
+                try:
+                    metadata = read_metadata(path)
+                except OSError:
+                    # 読めなかったファイルは、次の読み取りで読み直す
+                    continue
+                read_count += 1
+            stored[path] = (size, mtime_ns, metadata)
+            batch.append((entry_id, metadata))
+
+            now = time.monotonic()
+            if len(batch) >= self.BATCH_SIZE or now - last_emit >= self.MAX_BATCH_DELAY:
+                self.metadata_ready.emit(self.scan_id, batch)
+                batch = []
+                last_emit = now
+
+        if batch:
+            self.metadata_ready.emit(self.scan_id, batch)
+        completed = not self.is_cancelled()
+        # 途中でキャンセルされた不完全な結果は保存しない
+        if completed and self.cache_file and (read_count or len(stored) != len(previous)):
+            save_metadata_file(self.cache_file, self.root, stored)
+        self.finished.emit(self.scan_id, completed)
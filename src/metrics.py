@@ -0,0 +1,403 @@
+"""
+BeginView - パフォーマンス計測モジュール
+各処理の所要時間をヒストグラムで集計し、画面表示やログの行にまとめる
+"""
+
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+
+class LatencyHistogram:
+    """
+    所要時間（ミリ秒）の分布を対数の刻みのバケットで数える
+
+    記録はバケットの番号を求めて数えるだけで、件数によらずメモリは一定。
+    パーセンタイルはバケットの上端で近似する（誤差は刻みの幅の約 19% 以内）。
+    """
+
+    # 最初のバケットの上端（ミリ秒）
+    BASE_MS = 0.01
+    # 2倍あたりのバケット数
+    STEPS_PER_DOUBLING = 4
+    # バケット数（最後のバケットの上端は約 100 秒。それより長いものも含む）
+    BUCKETS = 94
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        """空のヒストグラムを作成"""
+        self.counts: List[int] = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        """
+        所要時間を1件記録
+
+        Args:
+            ms: 所要時間（ミリ秒）
+        """
+        if ms <= self.BASE_MS:
+            bucket = 0
+        else:
+            bucket = min(
+                self.BUCKETS - 1,
+                math.ceil(math.log2(ms / self.BASE_MS) * self.STEPS_PER_DOUBLING),
+            )
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """別のヒストグラムの記録を加える"""
+        for bucket, count in enumerate(other.counts):
+            self.counts[bucket] += count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        """平均（記録が無ければ 0）"""
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """
+        パーセンタイルの近似値
+
+        Args:
+            fraction: 0 より大きく 1 以下の割合（0.95 なら 95 パーセンタイル）
+
+        Returns:
+            その順位の記録を含むバケットの上端（最大値を超えない）。記録が
+            無ければ 0
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                upper = self.BASE_MS * 2 ** (bucket / self.STEPS_PER_DOUBLING)
+                return min(upper, self.max_ms)
+        return self.max_ms
+
+
+class MetricsInterval(NamedTuple):
+    """PerformanceMetrics の1区間分の集計"""
+
+    duration_s: float  # 区間の長さ（秒）
+    latencies: Dict[str, LatencyHistogram]  # 名前 → 所要時間の分布
+    counters: Dict[str, int]  # 名前 → 回数
+
+
+class PerformanceMetrics:
+    """
+    名前ごとの所要時間のヒストグラムと回数のカウンタ
+
+    計測しない間（enabled が False）は start() が 0 を返し、stop()・record()・
+    count() は何もしないので、計測箇所をそのまま残しておいても負荷はほぼ無い。
+    集計は rotate() で区切る区間ごとに行い、直近 WINDOW 区間をまとめたものを
+    recent_latency()・recent_count() で取り出せる（画面表示用）。
+
+    GUI スレッドから使う。ワーカースレッドで計測した時間は、結果と一緒に
+    GUI スレッドへ渡してから record() する。
+    """
+
+    # recent_latency()・recent_count() にまとめる区間の数
+    WINDOW = 10
+
+    def __init__(self) -> None:
+        """計測しない状態で作成"""
+        self.enabled = False
+        self._latencies: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._history: Deque[MetricsInterval] = deque(maxlen=self.WINDOW)
+
+    def start(self) -> float:
+        """
+        計測を始める
+
+        Returns:
+            開始時刻（stop() に渡す）。計測しない間は 0
+        """
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, name: str, started: float) -> float:
+        """
+        start() からの経過時間を記録
+
+        Args:
+            name: 処理の名前
+            started: start() の戻り値（0 なら何もしない）
+
+        Returns:
+            経過時間（ミリ秒。計測しなかった場合は 0）
+        """
+        if not started:
+            return 0.0
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self.record(name, elapsed_ms)
+        return elapsed_ms
+
+    def record(self, name: str, ms: float) -> None:
+        """
+        所要時間を記録
+
+        Args:
+            name: 処理の名前
+            ms: 所要時間（ミリ秒）
+        """
+        if not self.enabled:
+            return
+        histogram = self._latencies.get(name)
+        if histogram is None:
+            histogram = self._latencies[name] = LatencyHistogram()
+        histogram.record(ms)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        回数を数える
+
+        Args:
+            name: カウンタの名前
+            amount: 加える数
+        """
+        if not self.enabled:
+            return
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def rotate(self) -> MetricsInterval:
+        """
+        今の区間を締めて、次の区間を始める
+
+        Returns:
+            締めた区間の集計
+        """
+        now = time.perf_counter()
+        interval = MetricsInterval(
+            now - self._started, self._latencies, self._counters
+        )
+        self._history.append(interval)
+        self._latencies = {}
+        self._counters = {}
+        self._started = now
+        return interval
+
+    def recent_latency(self, name: str) -> LatencyHistogram:
+        """直近 WINDOW 区間（締めたもの）の所要時間の分布"""
+        merged = LatencyHistogram()
+        for interval in self._history:
+            histogram = interval.latencies.get(name)
+            if histogram is not None:
+                merged.merge(histogram)
+        return merged
+
+    def recent_count(self, name: str) -> int:
+        """直近 WINDOW 区間（締めたもの）の回数"""
+        return sum(interval.counters.get(name, 0) for interval in self._history)
+
+    def clear(self) -> None:
+        """記録をすべて捨てる（次の区間は今から始まる）"""
+        self._latencies = {}
+        self._counters = {}
+        self._history.clear()
+        self._started = time.perf_counter()
+
+
+def latency_columns(
+    interval: MetricsInterval, names: Iterable[str]
+) -> Dict[str, object]:
+    """
+    区間の所要時間の分布をログの列にする
+
+    記録が無い処理も同じ列を出す（CSV の列を揃えるため）。
+
+    Args:
+        interval: 区間の集計
+        names: 列にする処理の名前
+
+    Returns:
+        "<名前>_count"・"_p50_ms"・"_p95_ms"・"_max_ms" → 値
+    """
+    columns: Dict[str, object] = {}
+    empty = LatencyHistogram()
+    for name in names:
+        histogram = interval.latencies.get(name, empty)
+        columns[f"{name}_count"] = histogram.count
+        columns[f"{name}_p50_ms"] = round(histogram.percentile(0.5), 2)
+        columns[f"{name}_p95_ms"] = round(histogram.percentile(0.95), 2)
+        columns[f"{name}_max_ms"] = round(histogram.max_ms, 2)
+    return columns
+
+
+def resident_memory() -> int:
+    """
+    このプロセスが使っている物理メモリ（バイト数）
+
+    Linux は /proc から、Windows は GetProcessMemoryInfo で今の値を取得する。
+    それ以外では getrusage の最大値で代用する。
+
+    Returns:
+        バイト数（取得できなければ 0）
+    """
+    if sys.platform == "win32":
+        return _windows_working_set()
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト数、それ以外は KiB
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _windows_working_set() -> int:
+    """Windows でのワーキングセットのサイズ（取得できなければ 0）"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    try:
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+    except OSError:
+        return 0
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [
+        wintypes.HANDLE,
+        ctypes.POINTER(ProcessMemoryCounters),
+        wintypes.DWORD,
+    ]
+    psapi.GetProcessMemoryInfo.restype = wintypes.BOOL
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not psapi.GetProcessMemoryInfo(
+        kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+    ):
+        return 0
+    return counters.WorkingSetSize
+
+
+class MetricsLog:
+    """
+    計測結果の行をファイルに追記する（サイズでローテーション）
+
+    拡張子が .csv なら CSV（列は最初の行で決め、ファイルごとに見出しの行を
+    書く）、それ以外は1行に1つの JSON（JSON Lines）。ファイルが max_bytes を
+    超えたら name.1, name.2, ... と名前を変えて backup_count 世代まで残す。
+    """
+
+    # ローテーションするサイズの既定値（バイト数）と、残す世代数の既定値
+    DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+    DEFAULT_BACKUP_COUNT = 5
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ) -> None:
+        """
+        ログファイルを開く（既存のファイルには追記する）
+
+        Args:
+            path: ログファイルのパス
+            max_bytes: ローテーションするサイズ
+            backup_count: 残す古いファイルの数
+
+        Raises:
+            OSError: ファイルを開けない場合
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._csv = self.path.suffix.lower() == ".csv"
+        self._fields: Optional[List[str]] = None
+        self._file: Optional[IO[str]] = None
+        self._open()
+
+    def write(self, row: Dict[str, object]) -> None:
+        """
+        1行追記する
+
+        Args:
+            row: 列名 → 値（CSV では最初の行に無かった列は書かない）
+
+        Raises:
+            OSError: 書き込めない場合
+        """
+        if self._file is None:
+            raise OSError(f"Metrics log is closed: {self.path}")
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+        if not self._csv:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            if self._fields is None:
+                self._fields = list(row)
+            writer = csv.DictWriter(
+                self._file, self._fields, restval="", extrasaction="ignore"
+            )
+            if self._file.tell() == 0:
+                writer.writeheader()
+            writer.writerow(row)
+        self._file.flush()
+
+    def close(self) -> None:
+        """ファイルを閉じる"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        """ログファイルを追記用に開く"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        # 追記モードでは開いた直後の位置が末尾とは限らないため
+        self._file.seek(0, os.SEEK_END)
+
+    def _rotate(self) -> None:
+        """古いファイルの名前を1つずつずらし、新しいファイルを開く"""
+        self.close()
+        for generation in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{generation}")
+            if source.exists():
+                os.replace(
+                    source, self.path.with_name(f"{self.path.name}.{generation + 1}")
+                )
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
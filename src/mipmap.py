@@ -0,0 +1,176 @@
+"""
+BeginView - ミップマップモジュール
+縮小表示用に、画像を半分ずつ縮小した段階（ピラミッド）をバックグラウンドで作る
+"""
+
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage
+
+from image_cache import ByteLRUCache
+from tracing import traced
+
+# これより小さくなる段階は作らない（縦横の長い方のピクセル数）
+MIN_LEVEL_SIZE = 64
+
+
+@traced("build pyramid", "scale")
+def build_pyramid(image: QImage) -> List[QImage]:
+    """
+    画像を縦横半分ずつ縮小した段階を作る
+
+    各段階は1つ前の段階を高品質に半分へ縮小して作るので、全体でも元の画像を
+    1回縮小するのと同程度の時間で済む。どのスレッドから呼んでもよい。
+
+    Args:
+        image: 元の画像
+
+    Returns:
+        1/2, 1/4, 1/8 ... の段階（元の画像は含まない）。長い方の辺が
+        MIN_LEVEL_SIZE を下回る段階は作らない
+    """
+    levels: List[QImage] = []
+    level = image
+    while max(level.width(), level.height()) // 2 >= MIN_LEVEL_SIZE:
+        level = level.scaled(
+            max(1, level.width() // 2),
+            max(1, level.height() // 2),
+            Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+        levels.append(level)
+    return levels
+
+
+def nearest_level(image: QImage, levels: List[QImage], width: int) -> QImage:
+    """
+    指定した幅以上で最も小さい段階を返す
+
+    Args:
+        image: 元の画像
+        levels: build_pyramid で作った段階
+        width: 縮小後の幅
+
+    Returns:
+        縮小元にする画像（どの段階も足りない場合は元の画像）
+    """
+    source = image
+    for level in levels:
+        if level.width() < width:
+            break
+        source = level
+    return source
+
+
+class _PyramidTask(QRunnable):
+    """1枚の画像のピラミッドを作るタスク（スレッドプールで実行）"""
+
+    def __init__(self, image: QImage, builder: "PyramidBuilder") -> None:
+        super().__init__()
+        self.key = image.cacheKey()
+        self.cancelled = False
+        self._image = image
+        self._builder = builder
+
+    def run(self) -> None:
+        if self.cancelled:
+            return
+        levels = build_pyramid(self._image)
+        # GUI スレッドの PyramidBuilder へキュー経由で届く
+        self._builder._built.emit(self, levels)
+
+
+class PyramidBuilder(QObject):
+    """
+    表示中の画像のピラミッドを必要になったときに1回だけ作る
+
+    pyramid() は作成済みであればそれを返し、なければワーカースレッドで作成を
+    開始して None を返す。完了したら pyramid_ready で通知する。別の画像の
+    ピラミッドを求められたら、待機中の作成は取り消す。表示中の画像の作成を
+    取り消さずに調べるだけの場合は cached() を使う。
+
+    作成済みのピラミッドは元の画像の QImage.cacheKey をキーに、バイト数上限
+    付きの LRU に残るため、前後の画像を行き来しても作り直さずに済む。
+    GUI スレッドから使う。
+    """
+
+    # 作成済みのピラミッドのキャッシュの既定の上限（バイト数）
+    DEFAULT_CACHE_BUDGET = 128 * 1024 * 1024
+
+    pyramid_ready = Signal()  # ピラミッドの作成が完了した
+
+    # ワーカースレッドからの結果受け渡し用（タスク, 段階のリスト）
+    _built = Signal(object, object)
+
+    def __init__(
+        self, cache_budget: int = DEFAULT_CACHE_BUDGET, parent: Optional[QObject] = None
+    ) -> None:
+        """
+        ピラミッドの作成を初期化
+
+        Args:
+            cache_budget: 作成済みのピラミッドのキャッシュの上限（バイト数）
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        # 表示中の画像の分だけ作るので1スレッドで足りる
+        self._pool = QThreadPool(self)
+        self._pool.setObjectName("beginview-pyramid")
+        self._pool.setMaxThreadCount(1)
+
+        self.cache: ByteLRUCache[List[QImage]] = ByteLRUCache(cache_budget)
+        self._pending: Dict[int, _PyramidTask] = {}  # 待機中または実行中
+        self._stopped = False
+        self._built.connect(self._on_built)
+
+    def pyramid(self, image: QImage) -> Optional[List[QImage]]:
+        """
+        画像のピラミッドを返す（まだなければ作成を開始する）
+
+        Args:
+            image: 元の画像
+
+        Returns:
+            build_pyramid で作った段階（作成中の場合は None）
+        """
+        key = image.cacheKey()
+        levels = self.cache.get(key)
+        if levels is not None or self._stopped:
+            return levels
+        for other in list(self._pending):
+            if other != key:
+                self._pending.pop(other).cancelled = True
+        if key not in self._pending:
+            task = _PyramidTask(image, self)
+            self._pending[key] = task
+            self._pool.start(task)
+        return None
+
+    def cached(self, image: QImage) -> Optional[List[QImage]]:
+        """
+        作成済みのピラミッドを返す（作成の開始も、待機中の作成の取り消しもしない）
+
+        Args:
+            image: 元の画像
+
+        Returns:
+            build_pyramid で作った段階（作成済みでなければ None）
+        """
+        return self.cache.get(image.cacheKey())
+
+    def shutdown(self) -> None:
+        """待機中のタスクを取り消し、実行中のタスクの完了を待つ"""
+        self._stopped = True
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._pending.clear()
+        self.cache.clear()
+
+    def _on_built(self, task: _PyramidTask, levels: List[QImage]) -> None:
+        """ワーカースレッドで作ったピラミッドを受け取る"""
+        if self._stopped or self._pending.get(task.key) is not task:
+            return  # 実行中に取り消された（別の画像に移った）
+        del self._pending[task.key]
+        self.cache.put(task.key, levels, sum(level.sizeInBytes() for level in levels))
+        self.pyramid_ready.emit()
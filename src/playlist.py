@@ -0,0 +1,479 @@
+"""
+BeginView - プレイリストモジュール
+大量の画像ファイルを少ないメモリで保持し、選択された並び順でソートされた状態を保つ
+"""
+
+import bisect
+import re
+from array import array
+from enum import Enum
+from itertools import chain
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from folder_index import DirectoryListing, FileRecord
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+class SortOrder(Enum):
+    """プレイリストの並び順（同順位はファイル名の自然順、ディレクトリの順）"""
+
+    NAME = "name"  # ファイル名の自然順
+    DIRECTORY = "directory"  # ディレクトリごとにファイル名順
+    MODIFIED = "modified"  # 更新日時の古い順
+    SIZE = "size"  # ファイルサイズの小さい順
+    CAPTURED = "captured"  # 撮影日時の古い順
+
+
+def _encode_number(match: "re.Match[str]") -> str:
+    """数字の並びを「"0" + 桁数 + 先頭の 0 を除いた数字」に置き換える"""
+    digits = match.group()
+    if not digits.isascii():
+        digits = str(int(digits))  # 全角数字などを ASCII に正規化
+    digits = digits.lstrip("0")
+    return "0" + chr(min(len(digits), 126) + 1) + digits
+
+
+def natural_sort_key(name: str) -> bytes:
+    """
+    ファイル名のエントリキーを作成
+
+    前半は自然順のソートキーで、バイト列として比較するだけで「img2」が
+    「img10」より前になるよう、大文字小文字を無視した UTF-8 に変換したうえで
+    数字の並びを桁数付きの表現に置き換えたもの。"0" と桁数のバイトは
+    数字以外の文字の並びには現れないため、数値同士は桁数、数字の順に比較される。
+
+    後半には区切りの NUL に続けて元のファイル名を格納する。キーが同じ
+    ファイル（大文字小文字や先頭の 0 だけが異なる名前）の順序を決めるとともに、
+    ファイル名を別に保持しなくて済むようにするため。
+
+    Args:
+        name: ファイル名
+
+    Returns:
+        エントリキー
+    """
+    natural = _DIGITS_RE.sub(_encode_number, name.lower())
+    return (natural + "\0" + name).encode("utf-8", "surrogateescape")
+
+
+def _name_from_key(key: bytes) -> str:
+    """エントリキーからファイル名を取り出す"""
+    return key[key.rindex(b"\0") + 1:].decode("utf-8", "surrogateescape")
+
+
+class Playlist:
+    """
+    画像ファイルのプレイリスト
+
+    Path のリストの代わりに、ディレクトリ名の表（同じディレクトリは1回だけ
+    保持）と、ファイルごとのエントリキー（自然順のソートキーとファイル名を
+    1つにまとめたバイト列）、ディレクトリ番号と表示順の配列で保持する。
+    並べ替えに使うサイズ・更新日時・撮影日時も、スキャン時の stat の結果を
+    配列の列として保持しておくため、並び順の変更でファイルにアクセスしない。
+
+    各ファイルには追加順の「エントリ番号」が振られ、削除されても番号は
+    再利用されない。名前順（エントリキー, ディレクトリ）のエントリ番号の
+    配列を常に保持してパスの検索に使い、名前順以外の並び順ではそれとは別に
+    表示順の配列を持つ。インデックスによるアクセスは O(1) で Path を作って返す。
+
+    100万件でおよそ 110 MB（Path のリストでは約 250 MB）。
+    """
+
+    def __init__(self, sort_order: SortOrder = SortOrder.NAME) -> None:
+        """
+        空のプレイリストを作成
+
+        Args:
+            sort_order: 並び順
+        """
+        self._sort_order = sort_order
+        self.clear()
+
+    def clear(self) -> None:
+        """すべてのファイルを取り除く"""
+        self._dirs: List[str] = []  # ディレクトリ表
+        self._dir_ids: Dict[str, int] = {}
+        self._keys: List[bytes] = []  # エントリ番号 → エントリキー
+        self._entry_dir = array("I")  # エントリ番号 → ディレクトリ番号
+        self._sizes = array("q")  # エントリ番号 → ファイルサイズ
+        self._mtimes = array("q")  # エントリ番号 → 更新日時（ns）
+        # エントリ番号 → 撮影日時（ns）。メタデータを読むまでは更新日時で代用する
+        self._captured = array("q")
+        self._removed = bytearray()  # エントリ番号 → 削除済みなら 1
+        self._order = array("I")  # 名前順 → エントリ番号
+        self._view = self._order  # 表示順 → エントリ番号（名前順の場合は同じ配列）
+        self._key_bytes = 0
+
+    @property
+    def sort_order(self) -> SortOrder:
+        """現在の並び順"""
+        return self._sort_order
+
+    def set_sort_order(self, sort_order: SortOrder) -> None:
+        """
+        並び順を変更
+
+        保持している列だけを使い、名前順の配列を安定ソートし直して表示順を
+        作る（100万件で約 1 秒）。エントリ番号は変わらないので、呼び出し側は
+        変更前の entry_id を position_of に渡せば同じファイルの位置が分かる。
+
+        Args:
+            sort_order: 新しい並び順
+        """
+        if sort_order == self._sort_order:
+            return
+        self._sort_order = sort_order
+        self._view = self._sorted_view(self._order)
+
+    def __len__(self) -> int:
+        """ファイル数"""
+        return len(self._view)
+
+    def __getitem__(self, index: int) -> Path:
+        """
+        表示順で index 番目のファイルのパスを返す
+
+        Args:
+            index: 表示順のインデックス（負の値は末尾から）
+
+        Returns:
+            ファイルのパス
+        """
+        return self.path_of(self._view[index])
+
+    def __iter__(self) -> Iterator[Path]:
+        """表示順にパスを返す"""
+        for entry_id in self._view:
+            yield self.path_of(entry_id)
+
+    def __contains__(self, path: object) -> bool:
+        """パスが含まれているかどうか"""
+        return isinstance(path, Path) and self._find_entry(path) is not None
+
+    def copy(self) -> "Playlist":
+        """
+        プレイリストの複製を作成
+
+        エントリキーの bytes オブジェクトは共有し、配列とリストだけを複製する
+        （100万件で数ミリ秒）。エントリ番号は複製元と共通。スキャンのワーカー
+        スレッドで構築中のプレイリストを GUI スレッドに渡すために使う。
+
+        Returns:
+            複製したプレイリスト
+        """
+        other = Playlist.__new__(Playlist)
+        other._sort_order = self._sort_order
+        other._dirs = self._dirs.copy()
+        other._dir_ids = self._dir_ids.copy()
+        other._keys = self._keys.copy()
+        other._entry_dir = array("I", self._entry_dir)
+        other._sizes = array("q", self._sizes)
+        other._mtimes = array("q", self._mtimes)
+        other._captured = array("q", self._captured)
+        other._removed = bytearray(self._removed)
+        other._order = array("I", self._order)
+        other._view = (
+            other._order if self._view is self._order else array("I", self._view)
+        )
+        other._key_bytes = self._key_bytes
+        return other
+
+    def add_listings(self, listings: Iterable[DirectoryListing]) -> None:
+        """
+        ディレクトリの列挙結果に含まれる画像を追加
+
+        Args:
+            listings: ディレクトリの列挙結果
+        """
+        new_ids: List[int] = []
+        for listing in listings:
+            if not listing.files:
+                continue
+            dir_id = self._dir_id(listing.path)
+            keys = [natural_sort_key(f.name) for f in listing.files]
+            start = len(self._keys)
+            self._keys.extend(keys)
+            self._entry_dir.extend([dir_id] * len(keys))
+            self._sizes.extend([f.size for f in listing.files])
+            mtimes = [f.mtime_ns for f in listing.files]
+            self._mtimes.extend(mtimes)
+            self._captured.extend(mtimes)
+            self._removed.extend(bytes(len(keys)))
+            self._key_bytes += sum(map(len, keys))
+            new_ids.extend(range(start, start + len(keys)))
+        self._merge(new_ids)
+
+    def remove_paths(self, paths: Iterable[Path]) -> List[int]:
+        """
+        画像ファイルを取り除く
+
+        Args:
+            paths: 取り除くファイルのパス（含まれていないものは無視する）
+
+        Returns:
+            取り除いたファイルの、取り除く前の表示順（昇順）
+        """
+        entry_ids = set()
+        for path in paths:
+            found = self._find_entry(path)
+            if found is not None:
+                entry_ids.add(found)
+        if not entry_ids:
+            return []
+
+        positions = sorted(self.position_of(e) for e in entry_ids)
+        if len(entry_ids) < 64:
+            if self._view is not self._order:
+                for pos in reversed(positions):
+                    del self._view[pos]
+            order_positions = sorted(
+                bisect.bisect_left(self._order, self._name_key(e), key=self._name_key)
+                for e in entry_ids
+            )
+            for pos in reversed(order_positions):
+                del self._order[pos]
+            for entry_id in entry_ids:
+                self._removed[entry_id] = 1
+        else:
+            for entry_id in entry_ids:
+                self._removed[entry_id] = 1
+            removed = self._removed
+            is_name = self._view is self._order
+            self._order = array("I", (e for e in self._order if not removed[e]))
+            self._view = (
+                self._order
+                if is_name
+                else array("I", (e for e in self._view if not removed[e]))
+            )
+        return positions
+
+    def path_of(self, entry_id: int) -> Path:
+        """
+        エントリ番号からパスを作成
+
+        Args:
+            entry_id: エントリ番号
+
+        Returns:
+            ファイルのパス
+        """
+        return Path(
+            self._dirs[self._entry_dir[entry_id]], _name_from_key(self._keys[entry_id])
+        )
+
+    def mtime_of(self, entry_id: int) -> int:
+        """
+        エントリの更新日時（スキャン時に取得したもの）
+
+        Args:
+            entry_id: エントリ番号
+
+        Returns:
+            更新日時（ns）
+        """
+        return self._mtimes[entry_id]
+
+    def size_of(self, entry_id: int) -> int:
+        """
+        エントリのファイルサイズ（スキャン時に取得したもの）
+
+        Args:
+            entry_id: エントリ番号
+
+        Returns:
+            ファイルサイズ（バイト）
+        """
+        return self._sizes[entry_id]
+
+    def set_captured(self, values: Iterable[Tuple[int, int]]) -> None:
+        """
+        撮影日時の列を更新（メタデータを読み取った後）
+
+        撮影日時順で表示中の場合は表示順を作り直す。エントリ番号は変わらない
+        ので、呼び出し側は変更前の entry_id を position_of に渡せば同じ
+        ファイルの位置が分かる。
+
+        Args:
+            values: （エントリ番号, 撮影日時 ns）。記録のないエントリは
+                更新日時のまま
+        """
+        for entry_id, captured in values:
+            if entry_id < len(self._captured):
+                self._captured[entry_id] = captured
+        if self._sort_order == SortOrder.CAPTURED:
+            self._view = self._sorted_view(self._order)
+
+    def entry_count(self) -> int:
+        """振ったエントリ番号の数（削除済みを含む。エントリ番号はこれより小さい）"""
+        return len(self._keys)
+
+    def entry_id(self, index: int) -> int:
+        """
+        表示順のインデックスからエントリ番号を返す
+
+        Args:
+            index: 表示順のインデックス
+
+        Returns:
+            エントリ番号
+        """
+        return self._view[index]
+
+    def position_of(self, entry_id: int) -> Optional[int]:
+        """
+        エントリの現在の表示順を二分探索で求める
+
+        Args:
+            entry_id: エントリ番号
+
+        Returns:
+            表示順のインデックス（削除済みの場合は None）
+        """
+        if entry_id >= len(self._removed) or self._removed[entry_id]:
+            return None
+        key = self._view_key()
+        pos = bisect.bisect_left(self._view, key(entry_id), key=key)
+        if pos < len(self._view) and self._view[pos] == entry_id:
+            return pos
+        return None
+
+    def index(self, path: Path) -> int:
+        """
+        パスの表示順を返す
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            表示順のインデックス
+
+        Raises:
+            ValueError: 含まれていない場合
+        """
+        entry_id = self._find_entry(path)
+        if entry_id is None:
+            raise ValueError(f"{path} is not in playlist")
+        return self.position_of(entry_id)
+
+    def memory_usage(self) -> int:
+        """保持しているデータのおおよそのバイト数"""
+        # bytes オブジェクト1個あたりのヘッダ（33 バイト）とリストのポインタ
+        total = self._key_bytes + len(self._keys) * (33 + 8)
+        for column in (self._entry_dir, self._sizes, self._mtimes, self._captured):
+            total += column.itemsize * len(column)
+        total += self._order.itemsize * len(self._order)
+        if self._view is not self._order:
+            total += self._view.itemsize * len(self._view)
+        total += len(self._removed)
+        total += sum(len(d) + 50 for d in self._dirs)
+        return total
+
+    def _dir_id(self, directory: str) -> int:
+        """ディレクトリ表の番号を返す（無ければ追加する）"""
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self._dirs)
+            self._dirs.append(directory)
+            self._dir_ids[directory] = dir_id
+        return dir_id
+
+    def _name_key(self, entry_id: int) -> Tuple[bytes, str]:
+        """名前順のキー（エントリキー, ディレクトリ）"""
+        return self._keys[entry_id], self._dirs[self._entry_dir[entry_id]]
+
+    def _view_key(self) -> Callable[[int], Any]:
+        """表示順のキーを返す関数（二分探索用）"""
+        order = self._sort_order
+        if order == SortOrder.NAME:
+            return self._name_key
+        if order == SortOrder.DIRECTORY:
+            return lambda e: (self._dirs[self._entry_dir[e]], self._keys[e])
+        column = self._sort_column()
+        return lambda e: (column[e], self._keys[e], self._dirs[self._entry_dir[e]])
+
+    def _sort_column(self) -> array:
+        """名前順の次に適用する安定ソートのキー列（エントリ番号 → 値）"""
+        order = self._sort_order
+        if order == SortOrder.SIZE:
+            return self._sizes
+        if order == SortOrder.MODIFIED:
+            return self._mtimes
+        if order == SortOrder.CAPTURED:
+            return self._captured
+        return self._dir_ranks()
+
+    def _dir_ranks(self) -> array:
+        """エントリ番号 → ディレクトリのパス順の順位"""
+        dir_rank = array("I", bytes(4 * len(self._dirs)))
+        for rank, dir_id in enumerate(
+            sorted(range(len(self._dirs)), key=self._dirs.__getitem__)
+        ):
+            dir_rank[dir_id] = rank
+        return array("I", map(dir_rank.__getitem__, self._entry_dir))
+
+    def _sorted_view(self, name_order: Iterable[int]) -> array:
+        """名前順のエントリ番号から表示順の配列を作成"""
+        if self._sort_order == SortOrder.NAME:
+            return self._order
+        return array("I", sorted(name_order, key=self._sort_column().__getitem__))
+
+    def _merge(self, new_ids: List[int]) -> None:
+        """
+        新しいエントリを名前順と表示順にマージする
+
+        追加分が少ない場合は挿入位置を二分探索で求めてつなぎ合わせ、多い場合は
+        全体をソートし直す。後者はタプルのキーを作らずに済むよう、ディレクトリ
+        順、エントリキー順（表示順ではさらに並び順の列）の複数回の安定ソートに
+        分け、どれも C で実装された __getitem__ をキー関数に使う（100万件の
+        名前順で約 1.3 秒、タプルの場合は約 4 秒）。
+        """
+        if not new_ids:
+            return
+        if len(new_ids) * 32 >= len(self._order):
+            order = sorted(
+                chain(self._order, new_ids), key=self._dir_ranks().__getitem__
+            )
+            order.sort(key=self._keys.__getitem__)
+            self._order = array("I", order)
+            self._view = self._sorted_view(order)
+            return
+
+        is_name = self._view is self._order
+        self._order = self._splice(self._order, new_ids, self._name_key)
+        if is_name:
+            self._view = self._order
+        else:
+            self._view = self._splice(self._view, new_ids, self._view_key())
+
+    @staticmethod
+    def _splice(
+        order: array, new_ids: List[int], key: Callable[[int], Any]
+    ) -> array:
+        """ソート済みの配列に少数のエントリを二分探索で挿入した配列を返す"""
+        merged = array("I")
+        prev = 0
+        for entry_id in sorted(new_ids, key=key):
+            pos = bisect.bisect_left(order, key(entry_id), lo=prev, key=key)
+            merged.extend(order[prev:pos])
+            merged.append(entry_id)
+            prev = pos
+        merged.extend(order[prev:])
+        return merged
+
+    def _find_entry(self, path: Path) -> Optional[int]:
+        """
+        パスを名前順の配列から探す
+
+        Returns:
+            エントリ番号。含まれていない場合は None
+        """
+        directory = str(path.parent)
+        if directory not in self._dir_ids:
+            return None
+        target = (natural_sort_key(path.name), directory)
+        pos = bisect.bisect_left(self._order, target, key=self._name_key)
+        if pos < len(self._order) and self._name_key(self._order[pos]) == target:
+            return self._order[pos]
+        return None
@@ -0,0 +1,306 @@
+"""
+BeginView - プレビューキャッシュモジュール
+縮小してデコードした画像を SQLite の1ファイルに保存し、次回以降はデコードせずに使う
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PySide6.QtGui import QImage
+
+
+class PreviewCache:
+    """
+    縮小した画像（プレビュー）のディスクキャッシュ
+
+    ファイルのパス・サイズ・更新日時から作ったキーと、縮小したときの最大
+    サイズ（枠）の組ごとに、圧縮した画像を SQLite のテーブルに保存する。
+    ファイルが書き換えられるとキーが変わるので、古いプレビューは使われずに
+    いずれ追い出される。何百万枚でも小さなファイルを大量に作らずに済む。
+
+    プレビューを保存するときは、THUMBNAIL_SIZE に収まるサムネイルもそこから
+    縮小して保存する（thumbnail() で読める）。元のファイルやプレビューを
+    デコードするより速いので、デコードを待つ間の表示に使える。
+
+    保存したデータの合計が上限を超えたら、最後に使われたのが古いものから
+    上限の EVICT_TO の割合まで削除する。同じファイルに別のプロセス
+    （ProcessDecoder のワーカー）も保存するので、削除する前に実際の合計を
+    読み直す。透過のない画像は JPEG、透過のある画像は PNG で保存する。
+
+    どのスレッドから呼んでもよい（1つの接続をロックで保護する）。
+    """
+
+    # 2: EXIF の向きを適用したプレビューを保存する
+    # 3: データの大きさの列を追加し、サムネイルも保存する
+    FORMAT_VERSION = 3
+    # 保存したプレビューの合計の既定の上限（バイト数）
+    DEFAULT_BUDGET = 1024 * 1024 * 1024
+    # 上限を超えたときに、上限のこの割合まで削除する（合計の読み直しが
+    # 保存のたびに起きないように）
+    EVICT_TO = 0.9
+    # サムネイルの最大サイズ
+    THUMBNAIL_SIZE = QSize(320, 320)
+    # 透過のない画像を保存するときの JPEG の品質
+    JPEG_QUALITY = 90
+
+    def __init__(self, path: Path, budget_bytes: int = DEFAULT_BUDGET) -> None:
+        """
+        キャッシュファイルを開く（無ければ作成する）
+
+        Args:
+            path: キャッシュファイルのパス
+            budget_bytes: 保存するプレビューの合計の上限（バイト数）
+
+        Raises:
+            OSError, sqlite3.Error: キャッシュファイルを開けない場合
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != self.FORMAT_VERSION:
+            self._db.executescript(
+                f"""
+                DROP TABLE IF EXISTS previews;
+                CREATE TABLE previews (
+                    file_key BLOB NOT NULL,
+                    max_width INTEGER NOT NULL,
+                    max_height INTEGER NOT NULL,
+                    original_width INTEGER NOT NULL,
+                    original_height INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (file_key, max_width, max_height)
+                ) WITHOUT ROWID;
+                CREATE INDEX previews_last_used ON previews (last_used, size);
+                PRAGMA user_version = {self.FORMAT_VERSION};
+                """
+            )
+        # 保存したデータの合計（このプロセスで保存・削除した分だけを反映した
+        # 見積もり。上限を超えたら読み直す）
+        self.total_bytes = self._stored_bytes()
+
+    @classmethod
+    def open(
+        cls, path: Path, budget_bytes: int = DEFAULT_BUDGET
+    ) -> Optional["PreviewCache"]:
+        """
+        キャッシュファイルを開く
+
+        Args:
+            path: キャッシュファイルのパス
+            budget_bytes: 保存するプレビューの合計の上限（バイト数）
+
+        Returns:
+            開いたキャッシュ（開けない場合は None。キャッシュなしで動作する）
+        """
+        try:
+            return cls(path, budget_bytes)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening preview cache {path}: {e}")
+            return None
+
+    def get(self, path: str, max_size: QSize) -> Optional[Tuple[QImage, QSize]]:
+        """
+        プレビューを読み込む
+
+        max_size 以上の枠で保存したもののうち、最も小さいものを返す。
+
+        Args:
+            path: 元の画像ファイルのパス
+            max_size: 必要な最大サイズ
+
+        Returns:
+            （プレビュー, 元の画像のサイズ）（保存されていない場合は None）
+        """
+        file_key = self._file_key(path)
+        if file_key is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT max_width, max_height, original_width, original_height, data"
+                " FROM previews"
+                " WHERE file_key = ? AND max_width >= ? AND max_height >= ?"
+                " ORDER BY max_width * max_height LIMIT 1",
+                (file_key, max_size.width(), max_size.height()),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            max_width, max_height, original_width, original_height, data = row
+            self._db.execute(
+                "UPDATE previews SET last_used = ?"
+                " WHERE file_key = ? AND max_width = ? AND max_height = ?",
+                (time.time_ns(), file_key, max_width, max_height),
+            )
+            self._db.commit()
+        image = QImage.fromData(data)
+        if image.isNull():
+            return None
+        return image, QSize(original_width, original_height)
+
+    def thumbnail(self, path: str) -> Optional[Tuple[QImage, QSize]]:
+        """
+        サムネイルを読み込む
+
+        Args:
+            path: 元の画像ファイルのパス
+
+        Returns:
+            （サムネイル, 元の画像のサイズ）（保存されていない場合は None）
+        """
+        return self.get(path, self.THUMBNAIL_SIZE)
+
+    def contains(self, path: str, max_size: QSize) -> bool:
+        """
+        max_size 以上の枠のプレビューが保存されているかどうか（使用日時は更新しない）
+
+        Args:
+            path: 元の画像ファイルのパス
+            max_size: 必要な最大サイズ
+        """
+        file_key = self._file_key(path)
+        if file_key is None:
+            return False
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM previews"
+                " WHERE file_key = ? AND max_width >= ? AND max_height >= ?",
+                (file_key, max_size.width(), max_size.height()),
+            ).fetchone()
+        return row is not None
+
+    def put(
+        self, path: str, max_size: QSize, image: QImage, original_size: QSize
+    ) -> None:
+        """
+        プレビューを保存し、上限を超えた分を古いものから削除する
+
+        プレビューが THUMBNAIL_SIZE より大きければ、縮小したサムネイルも
+        保存する。
+
+        Args:
+            path: 元の画像ファイルのパス
+            max_size: 縮小したときの最大サイズ
+            image: プレビュー
+            original_size: 元の画像のサイズ
+        """
+        file_key = self._file_key(path)
+        if file_key is None:
+            return
+        renditions = [(max_size, self._encode(image))]
+        thumbnail_size = self.THUMBNAIL_SIZE
+        if (
+            image.width() > thumbnail_size.width()
+            or image.height() > thumbnail_size.height()
+        ) and (
+            max_size.width() > thumbnail_size.width()
+            and max_size.height() > thumbnail_size.height()
+        ):
+            thumbnail = image.scaled(
+                thumbnail_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+            renditions.append((thumbnail_size, self._encode(thumbnail)))
+
+        now = time.time_ns()
+        with self._lock:
+            for size, blob in renditions:
+                old = self._db.execute(
+                    "SELECT size FROM previews"
+                    " WHERE file_key = ? AND max_width = ? AND max_height = ?",
+                    (file_key, size.width(), size.height()),
+                ).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO previews"
+                    " (file_key, max_width, max_height, original_width,"
+                    " original_height, size, last_used, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        file_key,
+                        size.width(),
+                        size.height(),
+                        original_size.width(),
+                        original_size.height(),
+                        len(blob),
+                        now,
+                        blob,
+                    ),
+                )
+                self.total_bytes += len(blob) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def close(self) -> None:
+        """キャッシュファイルを閉じる"""
+        with self._lock:
+            self._db.close()
+
+    def _stored_bytes(self) -> int:
+        """保存したデータの実際の合計（インデックスだけを読む）"""
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM previews"
+        ).fetchone()[0]
+
+    def _evict(self) -> None:
+        """上限を超えた分を、最後に使われたのが古いものから削除（ロック中に呼ぶ）"""
+        if self.total_bytes <= self.budget_bytes:
+            return
+        # 他のプロセスが保存・削除した分は見積もりに入っていないので読み直す
+        self.total_bytes = self._stored_bytes()
+        target = int(self.budget_bytes * self.EVICT_TO)
+        if self.total_bytes <= self.budget_bytes:
+            return
+        while self.total_bytes > target:
+            rows = self._db.execute(
+                "SELECT file_key, max_width, max_height, size FROM previews"
+                " ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for file_key, max_width, max_height, nbytes in rows:
+                self._db.execute(
+                    "DELETE FROM previews"
+                    " WHERE file_key = ? AND max_width = ? AND max_height = ?",
+                    (file_key, max_width, max_height),
+                )
+                self.total_bytes -= nbytes
+                if self.total_bytes <= target:
+                    return
+
+    def _encode(self, image: QImage) -> bytes:
+        """保存するために画像を圧縮（透過のない画像は JPEG、ある画像は PNG）"""
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        if image.hasAlphaChannel():
+            image.save(buffer, "PNG")
+        else:
+            image.save(buffer, "JPG", self.JPEG_QUALITY)
+        buffer.close()
+        return data.data()
+
+    @staticmethod
+    def _file_key(path: str) -> Optional[bytes]:
+        """パス・サイズ・更新日時から作るキー（ファイルが無い場合は None）"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = f"{path}|{st.st_size}|{st.st_mtime_ns}"
+        return hashlib.sha1(key.encode("utf-8", "surrogateescape")).digest()
@@ -0,0 +1,370 @@
+"""
+BeginView - プロセスでのデコードモジュール
+デコードを別プロセスで行い、デコードした画素は共有メモリでコピーせずに受け取る
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from PySide6.QtCore import QSize, SignalInstance
+from PySide6.QtGui import QImage
+
+from image_loader import (
+    ImageFormatError,
+    decode_image,
+    decode_preview,
+    warm_preview,
+)
+from preview_cache import PreviewCache
+from tracing import span
+
+# ワーカープロセスから送る画像（共有メモリの名前, 幅, 高さ, 1行のバイト数,
+# 形式（QImage.Format の値）, テキスト（元のサイズなど））
+SharedImage = Tuple[str, int, int, int, int, Dict[str, str]]
+
+
+class ProcessDecodeJob:
+    """
+    ProcessDecoder で行う1つのデコード
+
+    DecodeTask と同じく key・priority・cancelled・elapsed_ms・format_error を
+    持ち、完了したら finished に（ジョブ, 画像, エラーメッセージ）を送る。
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        function: Callable[..., QImage],
+        args: tuple,
+        finished: SignalInstance,
+        priority: int = 0,
+    ) -> None:
+        """
+        ジョブを作成
+
+        Args:
+            key: 結果を識別するキー
+            function: ワーカープロセスで呼ぶモジュールレベルの関数（引数の最後に
+                ワーカープロセスのディスクキャッシュを渡す）
+            args: function の引数（pickle できるもの）
+            finished: 結果を送るシグナル
+            priority: 優先度（大きいものから実行する）
+        """
+        self.key = key
+        self.priority = priority
+        self.cancelled = False
+        self.elapsed_ms = 0.0
+        self.format_error = False
+        self.function = function
+        self.args = args
+        self.finished = finished
+
+
+class ProcessDecoder:
+    """
+    画像のデコードを別プロセス（ワーカー）で行う
+
+    ワーカーはデコードした画素を共有メモリ（multiprocessing.shared_memory）に
+    書き込み、その名前を返す。GUI 側のプロセスは共有メモリをそのまま QImage
+    として包む（コピーしない）。共有メモリは QImage（とそこから作った Pixmap）
+    がすべて解放された時点で解放される。
+
+    ワーカーごとに GUI 側のスレッドが1つあり、優先度の高いジョブから取り出して
+    ワーカーに送り、結果を待つ。ワーカーが異常終了した場合（デコーダの
+    クラッシュなど）は、実行中のジョブを失敗として通知し、ワーカーを起動し
+    直す。壊れたファイルはワーカー内の例外として失敗を通知する。どちらの
+    場合もビューア本体には影響しない。
+
+    ワーカーはディスクキャッシュを自分で開いて使う（SQLite の WAL で複数の
+    プロセスから読み書きできる）。ファイルの読み込みもワーカーが行う。
+
+    GIL に縛られないので、CPU のコアが多い環境では縮小表示での高速な送りや
+    プレビューの作成でスレッドプールより多くの画像を同時にデコードできる。
+    ワーカーの起動（Qt の読み込み）と画素のコピー1回分の時間がかかる。
+    """
+
+    def __init__(
+        self, processes: int, disk_cache: Optional[PreviewCache] = None
+    ) -> None:
+        """
+        ワーカーを起動する（起動はバックグラウンドで行い、待たない）
+
+        Args:
+            processes: ワーカープロセスの数
+            disk_cache: プレビューのディスクキャッシュ（ワーカーは同じファイルを
+                開く。省略時は使わない）
+        """
+        self._context = multiprocessing.get_context("spawn")
+        self._cache_args = (
+            (disk_cache.path, disk_cache.budget_bytes) if disk_cache else None
+        )
+        # （-優先度, 投入順, ジョブ）。ジョブが None のものは終了の合図
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._order = itertools.count()  # 同じ優先度では投入した順
+        self._threads: List[threading.Thread] = []
+        for number in range(max(1, processes)):
+            thread = threading.Thread(
+                target=self._run_worker,
+                name=f"beginview-process-{number}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def process_count(self) -> int:
+        """ワーカープロセスの数"""
+        return len(self._threads)
+
+    def decode(
+        self,
+        key: Tuple[str, int, int, int],
+        finished: SignalInstance,
+        priority: int = 0,
+    ) -> ProcessDecodeJob:
+        """
+        画像のデコードを投入
+
+        Args:
+            key: ImagePrefetcher のキャッシュキー（パス, 更新日時 ns, 最大幅,
+                最大高さ）。最大サイズが 0 の場合は元の解像度でデコードする
+            finished: 結果を送るシグナル
+            priority: 優先度
+
+        Returns:
+            投入したジョブ（cancelled を立てると、実行前なら取り消せる）
+        """
+        path, _, width, height = key
+        return self._start(key, _decode, (path, width, height), finished, priority)
+
+    def warm(
+        self, path: str, max_size: QSize, finished: SignalInstance, priority: int = -1
+    ) -> ProcessDecodeJob:
+        """
+        プレビューがディスクキャッシュになければ作って保存するジョブを投入
+
+        Args:
+            path: 画像ファイルのパス
+            max_size: プレビューの最大サイズ
+            finished: 結果（空の画像）を送るシグナル
+            priority: 優先度
+
+        Returns:
+            投入したジョブ
+        """
+        args = (path, max_size.width(), max_size.height())
+        return self._start(path, _warm, args, finished, priority)
+
+    def shutdown(self) -> None:
+        """待機中のジョブを取り消し、実行中のジョブの完了を待ってワーカーを終了する"""
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancelled = True
+        for _ in self._threads:
+            self._queue.put((float("-inf"), next(self._order), None))
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def _start(
+        self,
+        key: Hashable,
+        function: Callable[..., QImage],
+        args: tuple,
+        finished: SignalInstance,
+        priority: int,
+    ) -> ProcessDecodeJob:
+        """ジョブを作って待ち行列に入れる"""
+        job = ProcessDecodeJob(key, function, args, finished, priority)
+        self._queue.put((-priority, next(self._order), job))
+        return job
+
+    def _spawn(self) -> Tuple[multiprocessing.process.BaseProcess, Connection]:
+        """ワーカープロセスを起動"""
+        connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_connection, self._cache_args),
+            daemon=True,
+        )
+        process.start()
+        worker_connection.close()
+        return process, connection
+
+    def _run_worker(self) -> None:
+        """ワーカー1つ分のスレッド：ジョブを送り、結果の画像を受け取る"""
+        process: Optional[multiprocessing.process.BaseProcess] = None
+        connection: Optional[Connection] = None
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            if job.cancelled:
+                continue
+            image = QImage()
+            started = time.perf_counter()
+            try:
+                if process is None:
+                    process, connection = self._spawn()
+                with span("decode (process)"):
+                    connection.send((job.function, job.args))
+                    shared, error, job.format_error = connection.recv()
+            except (EOFError, OSError) as e:
+                # ワーカーが異常終了した。このジョブは失敗とし、次のジョブの
+                # 前に起動し直す
+                shared = None
+                error = f"Decoder process failed: {e}"
+                if process is not None:
+                    process.join(1.0)
+                    if process.exitcode is not None:
+                        error = (
+                            f"Decoder process exited unexpectedly"
+                            f" (exit code {process.exitcode})"
+                        )
+                    else:
+                        process.kill()
+                    process = None
+            if shared is not None:
+                try:
+                    image = _attach(shared)
+                except OSError as e:
+                    error = f"Failed to open shared image: {e}"
+                try:
+                    connection.send(True)  # 開いたので、ワーカー側は閉じてよい
+                except OSError:
+                    pass  # 次のジョブを送るときに起動し直す
+            job.elapsed_ms = (time.perf_counter() - started) * 1000.0
+            job.finished.emit(job, image, error)
+
+        if process is not None:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            process.join(5.0)
+            if process.exitcode is None:
+                process.kill()
+
+
+class _SharedPixels(shared_memory.SharedMemory):
+    """
+    QImage の画素として使う共有メモリ
+
+    画素を参照する memoryview が残っている間は閉じられない（mmap が
+    BufferError を送出する）。その場合は対応付けを残したまま手放し、
+    memoryview が解放された時点で mmap ごと解放させる。
+    """
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+
+def _attach(shared: SharedImage) -> QImage:
+    """ワーカーが書き込んだ共有メモリを QImage として包む（コピーしない）"""
+    name, width, height, bytes_per_line, image_format, texts = shared
+    block = _SharedPixels(name)
+    # 名前は不要になったので消す（Windows では何もしない。最後のハンドルが
+    # 閉じた時点で消える）。GUI 側が異常終了しても共有メモリが残らない
+    block.unlink()
+    # QImage は渡したオブジェクトへの参照を、画素が不要になるまで保持する
+    image = QImage(
+        memoryview(block.buf),
+        width,
+        height,
+        bytes_per_line,
+        QImage.Format(image_format),
+    )
+    for key, value in texts.items():
+        image.setText(key, value)
+    return image
+
+
+def _export(
+    image: QImage,
+) -> Tuple[Optional[shared_memory.SharedMemory], Optional[SharedImage]]:
+    """デコードした画像を共有メモリに書き込む（空の画像の場合は何もしない）"""
+    if image.isNull():
+        return None, None
+    nbytes = image.sizeInBytes()
+    block = shared_memory.SharedMemory(create=True, size=nbytes)
+    block.buf[:nbytes] = image.constBits()
+    texts = {key: image.text(key) for key in image.textKeys()}
+    shared = (
+        block.name,
+        image.width(),
+        image.height(),
+        image.bytesPerLine(),
+        image.format().value,
+        texts,
+    )
+    return block, shared
+
+
+def _decode(
+    path: str, width: int, height: int, disk_cache: Optional[PreviewCache]
+) -> QImage:
+    """ワーカープロセスで画像をデコードする（最大サイズが 0 なら元の解像度）"""
+    if width:
+        return decode_preview(path, QSize(width, height), disk_cache)
+    return decode_image(path)
+
+
+def _warm(
+    path: str, width: int, height: int, disk_cache: Optional[PreviewCache]
+) -> QImage:
+    """ワーカープロセスでプレビューを作ってディスクキャッシュに保存する"""
+    if disk_cache is not None:
+        warm_preview(path, QSize(width, height), disk_cache)
+    return QImage()
+
+
+def _worker_main(
+    connection: Connection, cache_args: Optional[Tuple[object, int]]
+) -> None:
+    """
+    ワーカープロセスの本体
+
+    （関数, 引数）を受け取って実行し、（共有メモリの画像, エラーメッセージ,
+    ImageFormatError かどうか）を返す。共有メモリは GUI 側が開いたという
+    返事を受け取るまで閉じない（Windows では、すべてのハンドルが閉じた時点で共有メモリが消えるため）。
+    None を受け取るか、GUI 側との接続が切れたら終了する。
+    """
+    disk_cache = PreviewCache.open(*cache_args) if cache_args else None
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            function, args = message
+            try:
+                block, shared = _export(function(*args, disk_cache))
+            except Exception as e:
+                connection.send((None, str(e), isinstance(e, ImageFormatError)))
+                continue
+            connection.send((shared, "", False))
+            if block is not None:
+                try:
+                    connection.recv()
+                except EOFError:
+                    break
+                finally:
+                    block.close()
+    finally:
+        if disk_cache is not None:
+            disk_cache.close()
@@ -0,0 +1,193 @@
+"""
+BeginView - シャッフル再生モジュール
+プレイリストを並べ替えずに、擬似乱数の順列をその場で計算してランダムな順に巡る
+"""
+
+import random
+from typing import Dict, Iterator, Optional, Tuple
+
+from playlist import Playlist
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(value: int, key: int) -> int:
+    """Feistel のラウンド関数（splitmix64 の撹拌）"""
+    value = ((value ^ key) * 0x9E3779B97F4A7C15) & _MASK64
+    value ^= value >> 30
+    value = (value * 0xBF58476D1CE4E5B9) & _MASK64
+    value ^= value >> 27
+    value = (value * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class FeistelPermutation:
+    """
+    [0, 2**bits) の擬似乱数の全単射
+
+    上位と下位のビットに分けた Feistel 構造で、各ラウンドは片方をもう片方の
+    撹拌結果と XOR するだけなので常に可逆。ビット数が奇数でも、ラウンドごとに
+    幅の入れ替わる非対称な Feistel として扱う。表を持たないので、要素数に
+    よらずメモリは一定で、順方向・逆方向とも O(1)。
+    """
+
+    ROUNDS = 4  # 偶数（左右の幅が元に戻る）
+
+    def __init__(self, bits: int, seed: int) -> None:
+        """
+        順列を作成
+
+        Args:
+            bits: 定義域のビット数（1 以上）
+            seed: 乱数の種（同じ種なら同じ順列）
+        """
+        self.bits = bits
+        self._left_bits = bits // 2
+        self._right_bits = bits - self._left_bits
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    @property
+    def size(self) -> int:
+        """定義域の大きさ"""
+        return 1 << self.bits
+
+    def __call__(self, value: int) -> int:
+        """value の像"""
+        left_bits, right_bits = self._left_bits, self._right_bits
+        left = value >> right_bits
+        right = value & ((1 << right_bits) - 1)
+        for key in self._keys:
+            # (L, R) → (R, L ^ F(R))。幅は (左, 右) → (右, 左) に入れ替わる
+            left, right = right, left ^ (_mix(right, key) & ((1 << left_bits) - 1))
+            left_bits, right_bits = right_bits, left_bits
+        return (left << right_bits) | right
+
+    def inverse(self, value: int) -> int:
+        """像が value になる元"""
+        # ROUNDS が偶数なので、最後のラウンドの後の幅は最初と同じ
+        left_bits, right_bits = self._left_bits, self._right_bits
+        left = value >> right_bits
+        right = value & ((1 << right_bits) - 1)
+        for key in reversed(self._keys):
+            # (R, L ^ F(R)) → (L, R)
+            left_bits, right_bits = right_bits, left_bits
+            left, right = right ^ (_mix(left, key) & ((1 << left_bits) - 1)), left
+        return (left << right_bits) | right
+
+
+class ShuffleOrder:
+    """
+    プレイリストをランダムな順に巡るカーソル
+
+    エントリ番号（Playlist.entry_id）の空間の擬似乱数の順列を1周ずつ
+    たどり、まだ存在しない番号と削除済みのエントリは飛ばす（cycle walking）。
+    1周の中では同じ画像は繰り返さず、戻る操作も順列を逆にたどるだけで済む。
+    プレイリストを並べ替えたり、表示した画像を記録したりしないので、
+    件数によらずメモリは一定。
+
+    1周の定義域はその周を始めたときのエントリ数以上の2のべき乗に固定する。
+    スキャン中に見つかった画像も、定義域に収まる番号ならその周のまだ
+    たどっていない位置に現れ、収まらなければ次の周から加わる。周ごとに
+    別の種を使うので、毎周違う順になる。エントリ番号は並び順の変更では
+    変わらないため、並び順を変えても巡る順は変わらない。
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """
+        カーソルを作成（start() を呼ぶまでは使えない）
+
+        Args:
+            seed: 乱数の種（省略時はランダム）
+        """
+        self._seed = random.getrandbits(64) if seed is None else seed
+        # 周の番号 → (順列, その周の 0 番目に当たる順列の元)。たどったことのある
+        # 周だけを保持する（1周あたり数十バイト）
+        self._cycles: Dict[int, Tuple[FeistelPermutation, int]] = {}
+        self._cycle = 0
+        self._step = 0  # 周の中の位置
+
+    def start(self, playlist: Playlist, entry_id: int) -> None:
+        """
+        指定したエントリから新しい周を始める
+
+        Args:
+            playlist: プレイリスト
+            entry_id: 最初のエントリ（表示中の画像）
+        """
+        self._cycles.clear()
+        self._cycle = 0
+        self._step = 0
+        permutation = self._permutation(0, playlist)
+        origin = permutation.inverse(entry_id) if entry_id < permutation.size else 0
+        self._cycles[0] = (permutation, origin)
+
+    def move(self, playlist: Playlist, steps: int) -> Optional[Tuple[int, int]]:
+        """
+        カーソルを進める（負の値なら戻る）
+
+        Args:
+            playlist: プレイリスト
+            steps: 進める枚数
+
+        Returns:
+            移動先の（エントリ番号, 表示順のインデックス）。プレイリストが
+            空の場合は None（カーソルは動かさない）
+        """
+        target = None
+        for target in self._walk(playlist, steps > 0, abs(steps)):
+            pass
+        if target is None:
+            return None
+        self._cycle, self._step, entry_id, index = target
+        return entry_id, index
+
+    def upcoming(self, playlist: Playlist, forward: bool = True) -> Iterator[int]:
+        """
+        カーソルの次から巡る順に表示順のインデックスを返す（カーソルは動かさない）
+
+        Args:
+            playlist: プレイリスト
+            forward: 進む方向なら True、戻る方向なら False
+        """
+        for _, _, _, index in self._walk(playlist, forward):
+            yield index
+
+    def _walk(
+        self, playlist: Playlist, forward: bool, limit: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        カーソルの次から（周の番号, 周の中の位置, エントリ番号, インデックス）を返す
+
+        存在しないエントリは飛ばす。1周分たどっても1件も見つからなければ
+        （プレイリストが空）終わる。
+        """
+        if not playlist or not self._cycles:
+            return
+        cycle, step = self._cycle, self._step
+        permutation, origin = self._cycles[cycle]
+        found = 0
+        misses = 0
+        while limit is None or found < limit:
+            step += 1 if forward else -1
+            if not 0 <= step < permutation.size:
+                cycle += 1 if forward else -1
+                if cycle not in self._cycles:
+                    self._cycles[cycle] = (self._permutation(cycle, playlist), 0)
+                permutation, origin = self._cycles[cycle]
+                step = 0 if forward else permutation.size - 1
+            entry_id = permutation((origin + step) % permutation.size)
+            index = playlist.position_of(entry_id)
+            if index is None:
+                misses += 1
+                if misses > 2 * permutation.size:
+                    return
+                continue
+            misses = 0
+            found += 1
+            yield cycle, step, entry_id, index
+
+    def _permutation(self, cycle: int, playlist: Playlist) -> FeistelPermutation:
+        """周の順列を作成（定義域は現在のエントリ数以上の2のべき乗）"""
+        bits = max(1, (playlist.entry_count() - 1).bit_length())
+        return FeistelPermutation(bits, hash((self._seed, cycle)))
@@ -0,0 +1,215 @@
+"""
+BeginView - スライドショーのスケジューラモジュール
+画像を切り替える時刻（締め切り）を基準に、次の画像の準備と切り替えを通知する
+"""
+
+import math
+import time
+from enum import Enum
+from typing import NamedTuple, Optional
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from tracing import traced
+
+
+class LatePolicy(Enum):
+    """締め切りまでに次の画像を表示できなかった場合の動作"""
+
+    HOLD = "hold"  # 今の画像のまま待ち、表示できた時点から間隔を数え直す
+    SKIP = "skip"  # 準備できている先の画像へ飛ばし、締め切りの刻みは保つ
+
+
+class SlideshowStats(NamedTuple):
+    """SlideshowScheduler の記録"""
+
+    shown: int  # 締め切りに対して表示した枚数
+    missed: int  # そのうち締め切りに間に合わなかった枚数
+    skipped: int  # 間に合わずに飛ばした画像の枚数
+    max_late_ms: float  # 最も遅れた時間
+    total_late_ms: float  # 間に合わなかった分の遅れの合計
+
+
+def _now_ms() -> float:
+    """単調増加する現在時刻（ミリ秒）"""
+    return time.monotonic() * 1000.0
+
+
+class SlideshowScheduler(QObject):
+    """
+    スライドショーの切り替えを絶対時刻の締め切りで管理する
+
+    一定間隔のタイマーで切り替えると、デコードや縮小にかかった時間の分だけ
+    表示時間が延び、大きな画像が続くと遅れが積み重なる。このクラスは次の
+    締め切り（前の締め切り + 間隔）を絶対時刻で持ち、その少し前に prepare で
+    次の画像の準備（Pixmap への変換や縮小）を、締め切りに deadline で切り替えを
+    通知する。準備にかかる時間は計測して、次からはその分早めに通知する。
+
+    受け手は deadline を受けたら次の画像を表示し、実際に表示した時点で
+    frame_shown() を呼ぶ。締め切りから MISS_TOLERANCE_MS 以上遅れた場合は
+    間に合わなかったものとして記録する（stats()）。その後の締め切りは
+    policy による。HOLD は表示した時点から間隔を数え直し、SKIP は元の
+    締め切りの刻みを保つ（待っている間に過ぎた刻みは飛ばす）。間に合わない
+    画像を飛ばすかどうかは受け手が決め、飛ばした枚数を record_skipped() で
+    記録する。
+
+    GUI スレッドから使う。
+    """
+
+    # これ以下の遅れは間に合ったとみなす（ミリ秒。画面の更新1回分程度）
+    MISS_TOLERANCE_MS = 20.0
+    # 締め切りのどれだけ前に準備を始めるかの下限（ミリ秒）。計測した準備時間の
+    # 2倍と比べて長い方を使う。ただし間隔の半分を超えない
+    MIN_PREPARE_LEAD_MS = 50.0
+
+    prepare = Signal()  # 次の画像を準備する時刻になった
+    deadline = Signal()  # 次の画像に切り替える時刻になった
+
+    def __init__(
+        self,
+        interval_ms: int,
+        policy: LatePolicy = LatePolicy.HOLD,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """
+        停止した状態で作成
+
+        Args:
+            interval_ms: 1枚を表示する時間（ミリ秒）
+            policy: 締め切りに間に合わなかった場合の動作
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self.policy = policy
+        self._interval_ms = interval_ms
+        self._active = False
+        self._deadline = 0.0  # 次の締め切り（_now_ms() の時刻）
+        self._prepare_sent = False  # 次の締め切りに向けた prepare を送ったか
+        self._waiting = False  # deadline を送り、表示されるのを待っている
+        self._prepare_ms = 0.0  # 準備にかかった時間（指数移動平均）
+
+        self._shown = 0
+        self._missed = 0
+        self._skipped = 0
+        self._max_late_ms = 0.0
+        self._total_late_ms = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+    @property
+    def interval_ms(self) -> int:
+        """1枚を表示する時間（ミリ秒）"""
+        return self._interval_ms
+
+    def is_active(self) -> bool:
+        """再生中かどうか"""
+        return self._active
+
+    def set_interval(self, interval_ms: int) -> None:
+        """
+        表示する時間を変更（再生中なら次の締め切りを前の締め切りから数え直す）
+
+        Args:
+            interval_ms: 1枚を表示する時間（ミリ秒）
+        """
+        previous = self._interval_ms
+        self._interval_ms = interval_ms
+        if self._active and not self._waiting:
+            self._schedule(max(_now_ms(), self._deadline - previous + interval_ms))
+
+    def start(self) -> None:
+        """再生を開始する（今から1間隔後が最初の締め切り）"""
+        self._active = True
+        self._waiting = False
+        self._schedule(_now_ms() + self._interval_ms)
+
+    def restart(self) -> None:
+        """再生中なら、今から1間隔後を締め切りとして数え直す（手動で移動した場合）"""
+        if self._active:
+            self.start()
+
+    def stop(self) -> None:
+        """再生を停止する"""
+        self._active = False
+        self._waiting = False
+        self._timer.stop()
+
+    def frame_shown(self) -> None:
+        """
+        締め切りに対する画像を表示したことを知らせる
+
+        deadline を送った後の最初の呼び出しだけを数え、次の締め切りを決める。
+        それ以外の呼び出し（手動での移動など）は無視する。
+        """
+        if not self._active or not self._waiting:
+            return
+        self._waiting = False
+        now = _now_ms()
+        late = now - self._deadline
+        self._shown += 1
+        base = self._deadline
+        if late > self.MISS_TOLERANCE_MS:
+            self._missed += 1
+            self._total_late_ms += late
+            self._max_late_ms = max(self._max_late_ms, late)
+            if self.policy == LatePolicy.HOLD:
+                base = now
+        deadline = base + self._interval_ms
+        # 待っている間に過ぎた刻みは飛ばす（表示した画像を少なくとも間隔の
+        # 半分は表示する）
+        while deadline < now + self._interval_ms / 2:
+            deadline += self._interval_ms
+        self._schedule(deadline)
+
+    def record_skipped(self, count: int) -> None:
+        """
+        間に合わずに飛ばした画像の枚数を記録
+
+        Args:
+            count: 飛ばした枚数
+        """
+        self._skipped += count
+
+    def stats(self) -> SlideshowStats:
+        """これまでの締め切りに対する記録"""
+        return SlideshowStats(
+            shown=self._shown,
+            missed=self._missed,
+            skipped=self._skipped,
+            max_late_ms=self._max_late_ms,
+            total_late_ms=self._total_late_ms,
+        )
+
+    def _prepare_lead_ms(self) -> float:
+        """締め切りのどれだけ前に prepare を送るか"""
+        lead = max(self.MIN_PREPARE_LEAD_MS, self._prepare_ms * 2)
+        return min(lead, self._interval_ms / 2)
+
+    def _schedule(self, deadline: float) -> None:
+        """次の締め切りを設定し、その前の prepare の時刻にタイマーを掛ける"""
+        self._deadline = deadline
+        self._prepare_sent = False
+        wait = self._deadline - self._prepare_lead_ms() - _now_ms()
+        self._timer.start(max(0, int(wait)))
+
+    @traced("slideshow timer", "timer")
+    def _on_timeout(self) -> None:
+        """prepare を送ってから締め切りまで待ち、締め切りに deadline を送る"""
+        if not self._prepare_sent:
+            self._prepare_sent = True
+            started = _now_ms()
+            self.prepare.emit()
+            elapsed = _now_ms() - started
+            if self._prepare_ms:
+                self._prepare_ms = self._prepare_ms * 0.8 + elapsed * 0.2
+            else:
+                self._prepare_ms = elapsed
+            if not self._active or not self._prepare_sent:
+                return  # 準備中に停止された、または締め切りが設定し直された
+            self._timer.start(max(0, math.ceil(self._deadline - _now_ms())))
+            return
+        self._waiting = True
+        self.deadline.emit()
@@ -0,0 +1,189 @@
+"""
+BeginView - タイル読み込みモジュール
+巨大な画像の見えている範囲だけを、表示に必要な解像度のタイルとして読み込む
+"""
+
+import math
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRect, QRectF, QSize, QThreadPool, Signal
+from PySide6.QtGui import QImage
+
+from image_cache import ByteLRUCache
+from image_loader import DecodeTask, decode_region, decode_thread_count
+
+# タイルのキャッシュキー（パス, 更新日時 ns, 縮小段階, 列, 行）
+TileKey = Tuple[str, int, int, int, int]
+
+
+class TileLoader(QObject):
+    """
+    巨大な画像をタイルに分けて、必要な部分だけをスレッドプールでデコードする
+
+    縮小段階 level のタイルは、元の画像の (TILE_SIZE << level) ピクセル四方を
+    1/2^level に縮小した TILE_SIZE ピクセル四方の画像。表示倍率に対して
+    足りる範囲で最も粗い段階を使うので、どの倍率でもデコードする画素数は
+    表示領域の高々4倍程度に収まる。
+
+    tiles() に見えている範囲と表示倍率を渡すと、デコード済みのタイルを返し、
+    足りないタイルを中央に近い順にスレッドプールへ投入する。範囲から外れた
+    タイルの待機中のデコードは取り消す。デコードが完了したら tiles_ready で
+    通知するので、改めて tiles() を呼んで描画し直す。
+
+    デコード済みのタイルはバイト数上限付きの LRU に残るため、同じ場所へ
+    戻った場合はデコードし直さずに済む。GUI スレッドから使う。
+    """
+
+    # タイルの大きさ（デコード後のピクセル数、縦横とも）
+    TILE_SIZE = 1024
+    # デコード済みのタイルのキャッシュの既定の上限（バイト数）
+    DEFAULT_CACHE_BUDGET = 256 * 1024 * 1024
+
+    tiles_ready = Signal()  # タイルのデコードが完了した
+
+    # ワーカースレッドからの結果受け渡し用（タスク, 画像, エラーメッセージ）
+    _decoded = Signal(object, QImage, str)
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        cache_budget: int = DEFAULT_CACHE_BUDGET,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """
+        タイルの読み込みを初期化
+
+        Args:
+            max_threads: デコードに使うスレッド数（省略時は CPU 数に応じて決める）
+            cache_budget: デコード済みのタイルのキャッシュの上限（バイト数）
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setObjectName("beginview-tile")
+        self._pool.setMaxThreadCount(max_threads or decode_thread_count())
+
+        self.cache: ByteLRUCache[QImage] = ByteLRUCache(cache_budget)
+        self._pending: Dict[TileKey, DecodeTask] = {}  # 待機中または実行中
+        self._failed: Set[TileKey] = set()  # 読み込めなかったタイル（再試行しない）
+        self._path = ""
+        self._mtime_ns = 0
+        self._size = QSize()
+        self._stopped = False
+        self._decoded.connect(self._on_decoded)
+
+    def set_image(self, path: str, mtime_ns: int, size: QSize) -> None:
+        """
+        タイルを読み込む画像を設定（前の画像の待機中のデコードは取り消す）
+
+        Args:
+            path: 画像のパス
+            mtime_ns: 画像の更新日時
+            size: 元の画像のサイズ
+        """
+        if (path, mtime_ns) == (self._path, self._mtime_ns):
+            return
+        self._cancel_pending(set())
+        self._failed.clear()
+        self._path = path
+        self._mtime_ns = mtime_ns
+        self._size = QSize(size)
+
+    def tiles(self, visible: QRectF, scale: float) -> List[Tuple[QRect, QImage]]:
+        """
+        見えている範囲のタイルのうちデコード済みのものを返し、足りないものの
+        デコードを要求する
+
+        Args:
+            visible: 見えている範囲（元の解像度での座標）
+            scale: 元の画像に対する表示倍率
+
+        Returns:
+            （タイルの範囲（元の解像度での座標）, タイルの画像）のリスト
+        """
+        if self._stopped or not self._path or visible.isEmpty():
+            return []
+        level = self.level_for(scale)
+        span = self.TILE_SIZE << level
+        image_rect = QRect(0, 0, self._size.width(), self._size.height())
+        first_col = max(0, int(visible.left()) // span)
+        first_row = max(0, int(visible.top()) // span)
+        last_col = min(
+            (self._size.width() - 1) // span, math.ceil(visible.right()) // span
+        )
+        last_row = min(
+            (self._size.height() - 1) // span, math.ceil(visible.bottom()) // span
+        )
+        center = visible.center()
+
+        wanted: List[Tuple[float, TileKey, QRect]] = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                rect = QRect(col * span, row * span, span, span).intersected(image_rect)
+                key = (self._path, self._mtime_ns, level, col, row)
+                distance = (rect.center().x() - center.x()) ** 2 + (
+                    rect.center().y() - center.y()
+                ) ** 2
+                wanted.append((distance, key, rect))
+        wanted.sort(key=lambda item: item[0])
+        self._cancel_pending({key for _, key, _ in wanted})
+
+        result: List[Tuple[QRect, QImage]] = []
+        for priority, (_, key, rect) in enumerate(reversed(wanted)):
+            image = self.cache.get(key)
+            if image is not None:
+                result.append((rect, image))
+                continue
+            if key in self._pending or key in self._failed:
+                continue
+            size = QSize(
+                max(1, -(-rect.width() >> level)), max(1, -(-rect.height() >> level))
+            )
+            task = DecodeTask(
+                key, partial(decode_region, self._path, rect, size), self._decoded
+            )
+            self._pending[key] = task
+            self._pool.start(task, priority)
+        return result
+
+    @staticmethod
+    def level_for(scale: float) -> int:
+        """
+        表示倍率に対して解像度が足りる、最も粗い縮小段階
+
+        Args:
+            scale: 元の画像に対する表示倍率
+
+        Returns:
+            縮小段階（0 は元の解像度、1 は 1/2、2 は 1/4 ...）
+        """
+        if scale >= 1.0 or scale <= 0.0:
+            return 0
+        return int(math.floor(math.log2(1.0 / scale)))
+
+    def shutdown(self) -> None:
+        """待機中のタスクを取り消し、実行中のタスクの完了を待つ"""
+        self._stopped = True
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._pending.clear()
+        self.cache.clear()
+
+    def _cancel_pending(self, keep: Set[TileKey]) -> None:
+        """keep に含まれないタイルの待機中のデコードを取り消す"""
+        for key in list(self._pending):
+            if key not in keep:
+                self._pending.pop(key).cancelled = True
+
+    def _on_decoded(self, task: DecodeTask, image: QImage, error: str) -> None:
+        """ワーカースレッドのデコード結果を受け取る"""
+        key = task.key
+        if self._stopped or self._pending.get(key) is not task:
+            return  # 実行中に取り消された（見えている範囲から外れた）
+        del self._pending[key]
+        if error:
+            self._failed.add(key)
+            return
+        self.cache.put(key, image, image.sizeInBytes())
+        self.tiles_ready.emit()
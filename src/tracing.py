@@ -0,0 +1,220 @@
+"""
+BeginView - タイムライン記録モジュール
+処理の区間をスレッドごとに記録し、Chrome の trace event 形式で書き出す
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from PySide6.QtCore import QThread
+
+F = TypeVar("F", bound=Callable)
+
+# 記録した区間（名前, 分類, 開始 ns, 終了 ns, スレッド ID）
+_SpanRecord = Tuple[str, str, int, int, int]
+
+
+class TraceRecorder:
+    """
+    処理の区間を決まった件数のリングバッファに記録する
+
+    件数を超えたら古い区間から捨てるので、長時間記録し続けてもメモリは
+    一定（直近の区間だけが残る）。どのスレッドから記録してもよい。
+    save() で Chrome の trace event 形式（JSON）に書き出すと、Perfetto や
+    chrome://tracing でスレッドごとのタイムラインとして見られる。
+    """
+
+    # 保持する区間の既定の件数（1件あたり百数十バイト程度）
+    DEFAULT_CAPACITY = 200_000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """
+        空のバッファを作成
+
+        Args:
+            capacity: 保持する区間の件数
+        """
+        self.capacity = max(1, capacity)
+        self.recorded = 0  # これまでに記録した件数（捨てたものを含む）
+        self._spans: Deque[_SpanRecord] = deque(maxlen=self.capacity)
+        self._thread_names: Dict[int, str] = {}
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, category: str, start_ns: int, end_ns: int) -> None:
+        """
+        今のスレッドで行った区間を記録
+
+        Args:
+            name: 処理の名前
+            category: 分類（ビューアーで絞り込むのに使う）
+            start_ns: 開始時刻（time.perf_counter_ns()）
+            end_ns: 終了時刻（time.perf_counter_ns()）
+        """
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = _thread_name()
+        with self._lock:
+            self._spans.append((name, category, start_ns, end_ns, tid))
+            self.recorded += 1
+
+    def save(self, path: Path) -> None:
+        """
+        記録した区間を Chrome の trace event 形式で書き出す
+
+        Args:
+            path: 書き出すファイル
+
+        Raises:
+            OSError: 書き込めない場合
+        """
+        with self._lock:
+            spans = list(self._spans)
+            recorded = self.recorded
+        pid = os.getpid()
+        events: list = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": 0,
+                "args": {"name": "BeginView"},
+            }
+        ]
+        for tid, thread_name in list(self._thread_names.items()):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": thread_name},
+                }
+            )
+        for name, category, start_ns, end_ns, tid in spans:
+            events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start_ns - self._origin_ns) / 1000.0,
+                    "dur": (end_ns - start_ns) / 1000.0,
+                    "pid": pid,
+                    "tid": tid,
+                }
+            )
+        data = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "capacity": self.capacity,
+                "dropped_spans": recorded - len(spans),
+            },
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def _thread_name() -> str:
+    """今のスレッドの名前（Qt のスレッドプールのスレッドは Qt での名前）"""
+    thread = threading.current_thread()
+    if isinstance(thread, threading._DummyThread):
+        # Python から開始していないスレッド
+        return QThread.currentThread().objectName() or thread.name
+    return thread.name
+
+
+# 記録中の TraceRecorder（start() を呼ぶまでは記録しない）
+_recorder: Optional[TraceRecorder] = None
+
+
+def start(capacity: int = TraceRecorder.DEFAULT_CAPACITY) -> TraceRecorder:
+    """
+    記録を開始する（以降の span()・traced() の区間を記録する）
+
+    Args:
+        capacity: 保持する区間の件数
+
+    Returns:
+        記録先
+    """
+    global _recorder
+    _recorder = TraceRecorder(capacity)
+    return _recorder
+
+
+def recorder() -> Optional[TraceRecorder]:
+    """記録中の TraceRecorder（記録していなければ None）"""
+    return _recorder
+
+
+class _SpanContext:
+    """span() が返す with 文用のオブジェクト"""
+
+    __slots__ = ("name", "category", "_start_ns")
+
+    def __init__(self, name: str, category: str) -> None:
+        self.name = name
+        self.category = category
+        self._start_ns = 0
+
+    def __enter__(self) -> "_SpanContext":
+        if _recorder is not None:
+            self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if _recorder is not None and self._start_ns:
+            _recorder.add(
+                self.name, self.category, self._start_ns, time.perf_counter_ns()
+            )
+
+
+def span(name: str, category: str = "pipeline") -> _SpanContext:
+    """
+    with 文の中の処理を1つの区間として記録する
+
+    記録していない間は時刻も取らない。
+
+    Args:
+        name: 処理の名前
+        category: 分類
+    """
+    return _SpanContext(name, category)
+
+
+def traced(name: str, category: str = "pipeline") -> Callable[[F], F]:
+    """
+    関数の呼び出しを1つの区間として記録するデコレータ
+
+    記録していない間は、元の関数を呼ぶ前に1回比較するだけ。
+
+    Args:
+        name: 処理の名前
+        category: 分類
+    """
+
+    def decorate(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _recorder.add(name, category, start_ns, time.perf_counter_ns())
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate